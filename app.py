@@ -3,7 +3,12 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from config import Config
 from database import db
-from routes import assets, notifications, maintenance, reports, dashboard, auth, tin_bao, vu_an, bi_can, tam_giam
+from cli import register_commands
+from utils.query_stats import init_query_instrumentation
+from utils.metrics import init_metrics
+from utils.schema import init_schema
+from services.job_service import init_jobs
+from routes import assets, notifications, maintenance, reports, dashboard, auth, tin_bao, vu_an, bi_can, tam_giam, jobs
 # Import models to ensure they're registered with SQLAlchemy
 from models import (
     DanhSachVuKhiCongCuHoTro,
@@ -19,7 +24,8 @@ from models import (
     VuAn,
     BiCan,
     LichSuChuyenDoi,
-    TamGiam
+    TamGiam,
+    Job
 )
 
 app = Flask(__name__)
@@ -31,6 +37,21 @@ db.init_app(app)
 # Initialize Flask-Migrate
 migrate = Migrate(app, db)
 
+# Inspect database schema once (tables/columns used by dashboard and notifications)
+init_schema(app)
+
+# SQL instrumentation (opt-in via SQL_INSTRUMENTATION)
+init_query_instrumentation(app)
+
+# Metrics (latency histograms, in-flight gauges, error counters) at /api/metrics (opt-in via METRICS_ENABLED)
+init_metrics(app)
+
+# Fail background jobs left queued/running by a worker process that is gone
+init_jobs(app)
+
+# CLI commands (flask stats rebuild)
+register_commands(app)
+
 # CORS configuration
 CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
 
@@ -41,6 +62,7 @@ app.register_blueprint(notifications.bp, url_prefix='/api/notifications')
 app.register_blueprint(maintenance.bp, url_prefix='/api/maintenance')
 app.register_blueprint(reports.bp, url_prefix='/api/reports')
 app.register_blueprint(dashboard.bp, url_prefix='/api/dashboard')
+app.register_blueprint(jobs.bp, url_prefix='/api/jobs')
 # Phase 2 blueprints
 app.register_blueprint(tin_bao.bp, url_prefix='/api/tin-bao')
 app.register_blueprint(vu_an.bp, url_prefix='/api/vu-an')
@@ -0,0 +1 @@
+# Benchmark package: synthetic data generator and endpoint load driver
@@ -0,0 +1,410 @@
+"""
+Synthetic data generator for benchmarks
+Fills the five asset tables, lich_su_kiem_tra_bao_tri, tin_bao, vu_an, bi_can
+and tam_giam with bulk inserts at a configurable scale factor.
+
+Usage (from the backend folder, preferably against a separate database):
+    python -m benchmarks.generate_data --database-url sqlite:///bench.db --scale 1
+    python -m benchmarks.generate_data --scale 5 --rows tin_bao=200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+# Rows generated per table at scale 1.0 (~160k rows in total)
+BASE_ROWS = {
+    'weapons': 20000,
+    'vehicles': 5000,
+    'water': 5000,
+    'technical': 10000,
+    'office': 10000,
+    'maintenance': 50000,
+    'tin_bao': 30000,
+    'vu_an': 10000,
+    'bi_can': 15000,
+    'tam_giam': 5000
+}
+
+BATCH_SIZE = 5000
+
+# Generated dates are relative to this day, so a seed yields the same data whenever it runs
+REFERENCE_DATE = date(2026, 1, 1)
+
+DIEU_LUAT = [
+    'Trộm cắp tài sản', 'Cố ý gây thương tích', 'Gây rối trật tự công cộng',
+    'Lừa đảo chiếm đoạt tài sản', 'Tàng trữ trái phép chất ma túy', 'Đánh bạc'
+]
+DIA_DIEM = [
+    'ấp 1, xã Phước Thái, tỉnh Đồng Nai', 'ấp 6, xã Phước Thái, tỉnh Đồng Nai',
+    'ấp 7, xã Phước Thái, tỉnh Đồng Nai', 'ấp Bà Ký, xã Long Phước, tỉnh Đồng Nai'
+]
+HO_TEN = ['Nguyễn Văn An', 'Trần Thị Bình', 'Lê Văn Cường', 'Phạm Thị Dung', 'Hoàng Văn Em', 'Võ Thị Phương']
+TRANG_THAI_TIN_BAO = ['Tiếp nhận', 'Đang điều tra', 'Chuyển thành vụ án', 'Không khởi tố']
+TRANG_THAI_VU_AN = ['Mới tạo', 'Khởi tố vụ án', 'Khởi tố bị can', 'Đình chỉ']
+DINH_KY = ['1 tháng', '3 tháng', '6 tháng', '12 tháng']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark data')
+    parser.add_argument('--database-url', help='Target database (defaults to DATABASE_URL)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Scale factor applied to BASE_ROWS')
+    parser.add_argument('--rows', action='append', default=[], metavar='TABLE=N',
+                        help=f"Override row count for one table ({', '.join(BASE_ROWS)})")
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+    parser.add_argument('--reference-date', type=date.fromisoformat, default=REFERENCE_DATE,
+                        help=f'Day generated dates are relative to (YYYY-MM-DD, default {REFERENCE_DATE})')
+    return parser.parse_args(argv)
+
+
+def resolve_row_counts(scale, overrides):
+    counts = {table: int(rows * scale) for table, rows in BASE_ROWS.items()}
+    for override in overrides:
+        table, _, value = override.partition('=')
+        if table not in counts or not value.isdigit():
+            raise SystemExit(f"Invalid --rows value: {override}")
+        counts[table] = int(value)
+    return counts
+
+
+class DataGenerator:
+    def __init__(self, seed=42, reference_date=REFERENCE_DATE):
+        self.rng = random.Random(seed)
+        self.today = reference_date
+        self.now = datetime.combine(reference_date, datetime.min.time())
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def random_date(self, days_back=730, days_forward=0):
+        return self.today + timedelta(days=self.rng.randint(-days_back, days_forward))
+
+    def base_row(self):
+        return {'id': self.uuid(), 'created_at': self.now, 'updated_at': self.now, 'is_deleted': False}
+
+    def inspection_fields(self):
+        last = self.random_date(365)
+        return {
+            'dinh_ky_kiem_tra': self.rng.choice(DINH_KY),
+            'ngay_kiem_tra_gan_nhat': last,
+            'ngay_kiem_tra_tiep_theo': last + timedelta(days=self.rng.choice([30, 90, 180, 365])),
+            'ket_qua_kiem_tra': self.rng.choice(['Đạt', 'Không đạt']),
+            'nam_het_han': self.rng.randint(2025, 2035),
+            'phuong_thuc_xu_ly': 'Tiếp tục sử dụng'
+        }
+
+    def weapons(self, idx):
+        nguyen_gia = self.rng.randint(1, 50) * 1000000
+        row = self.base_row()
+        row.update(self.inspection_fields())
+        row.update({
+            'ma_tai_san': f'VKBM{idx:07d}',
+            'ma_danh_muc': self.rng.choice(['Súng', 'Đạn', 'Công cụ hỗ trợ']),
+            'ten_tai_san': f'Súng AKM báng gấp {idx}',
+            'don_vi_tinh': 'Khẩu',
+            'nam_su_dung': self.rng.randint(2000, 2025),
+            'so_luong': self.rng.randint(1, 10),
+            'nguyen_gia': nguyen_gia,
+            'gia_tri_con_lai': nguyen_gia // 2,
+            'so_hieu': f'{self.rng.randint(100000, 999999)}',
+            'loai_tai_san': 'Đặc biệt',
+            'thuc_te_ban_giao': 'Có',
+            'vi_tri_tai_san': 'Kho vũ khí',
+            'nguoi_su_dung': self.rng.choice(HO_TEN)
+        })
+        return row
+
+    def vehicles(self, idx):
+        row = self.base_row()
+        row.update(self.inspection_fields())
+        row.update({
+            'ma_tai_san': f'PTBM{idx:07d}',
+            'danh_muc_phuong_tien': self.rng.choice(['Ô tô', 'Moto']),
+            'ten_phuong_tien': f'Honda Wave S 110 số {idx}',
+            'don_vi_tinh': 'Chiếc',
+            'nguyen_gia': self.rng.randint(15, 500) * 1000000,
+            'so_luong': 1,
+            'bien_so_ky_hieu': f'60{self.rng.choice("ABC")}{self.rng.randint(1, 9)}-{self.rng.randint(0, 999):03d}.{self.rng.randint(0, 99):02d}',
+            'so_khung_so_than_vo': f'RLHJC{self.rng.randint(10 ** 11, 10 ** 12 - 1)}',
+            'so_may': f'JC90E-{self.rng.randint(0, 9999999):07d}',
+            'nam_trang_bi': self.rng.randint(2005, 2025),
+            'loai_tai_san': 'Quản lý',
+            'thuc_te_ban_giao': 'Có',
+            'ngay_dang_kiem': self.random_date(180, 180),
+            'ngay_thay_nhot': self.random_date(180, 180),
+            'ngay_thay_vo': self.random_date(180, 180)
+        })
+        return row
+
+    def water(self, idx):
+        row = self.base_row()
+        row.update(self.inspection_fields())
+        row.pop('dinh_ky_kiem_tra')
+        row.update({
+            'ma_tai_san': f'TTBM{idx:07d}',
+            'danh_muc_trang_thiet_bi': self.rng.choice(['Phao áo', 'Phao tròn', 'Phao cứu sinh']),
+            'ten_trang_bi': f'Phao áo cứu sinh tiêu chuẩn {idx}',
+            'don_vi_tinh': 'Chiếc',
+            'nguyen_gia': self.rng.randint(1, 20) * 100000,
+            'so_luong': self.rng.randint(1, 20),
+            'ma_hieu': f'PA-{idx:06d}',
+            'nam_trang_bi': self.rng.randint(2015, 2025),
+            'loai_tai_san': 'Chuyên dụng'
+        })
+        return row
+
+    def technical(self, idx):
+        nguyen_gia = self.rng.randint(1, 30) * 1000000
+        row = self.base_row()
+        row.update(self.inspection_fields())
+        row.update({
+            'ma_tai_san': f'TBBM{idx:07d}',
+            'ten_tai_san': f'Máy tính để bàn Dell OptiPlex {idx}',
+            'nam_su_dung': self.rng.randint(2015, 2025),
+            'so_luong': self.rng.randint(1, 10),
+            'nguyen_gia': nguyen_gia,
+            'gia_tri_con_lai': nguyen_gia // 3,
+            'loai_tai_san': 'Quản lý',
+            'thuc_te_ban_giao': 'Có'
+        })
+        return row
+
+    def office(self, idx):
+        nguyen_gia = self.rng.randint(1, 10) * 1000000
+        row = self.base_row()
+        row.update(self.inspection_fields())
+        row.update({
+            'ma_tai_san': f'VPBM{idx:07d}',
+            'ten_tai_san': f'Bàn làm việc văn phòng {idx}',
+            'nam_su_dung': self.rng.randint(2010, 2025),
+            'so_luong': self.rng.randint(1, 20),
+            'nguyen_gia': nguyen_gia,
+            'gia_tri_con_lai': nguyen_gia // 2,
+            'loai_tai_san': 'Quản lý',
+            'thuc_te_ban_giao': 'Có',
+            'hinh_thuc': 'Mua mới',
+            'su_kien': 'Sửa chữa',
+            'chi_phi': self.rng.randint(1, 10) * 100000
+        })
+        return row
+
+    def maintenance(self, idx, asset_codes):
+        return {
+            'id': self.uuid(),
+            'ma_tai_san': self.rng.choice(asset_codes),
+            'loai_hinh': self.rng.choice(['Kiểm tra', 'Bảo trì', 'Sửa chữa']),
+            'ngay_thuc_hien': self.random_date(730),
+            'nguoi_thuc_hien': self.rng.choice(HO_TEN),
+            'chi_tiet_cong_viec': 'Kiểm tra định kỳ, vệ sinh và bảo dưỡng',
+            'chi_phi': self.rng.randint(0, 20) * 100000,
+            'ket_qua': 'Đạt',
+            'created_at': self.now
+        }
+
+    def tin_bao(self, stt):
+        dieu_luat = self.rng.choice(DIEU_LUAT)
+        noi_xay_ra = self.rng.choice(DIA_DIEM)
+        ngay_xay_ra = self.random_date(1095)
+        row = self.base_row()
+        row.update({
+            'stt': stt,
+            'dieu_luat': dieu_luat,
+            'ten_nguon_tin': self.rng.choice(HO_TEN),
+            'ngay_xay_ra': ngay_xay_ra,
+            'noi_xay_ra': noi_xay_ra,
+            'noi_dung_nguon_tin': f'Khoảng {self.rng.randint(0, 23)} giờ ngày {ngay_xay_ra:%d/%m/%Y} tại {noi_xay_ra} xảy ra vụ việc {dieu_luat.lower()}, người dân trình báo công an xã.',
+            'ngay_phan_cong': ngay_xay_ra + timedelta(days=1),
+            'cong_an_phu_trach': self.rng.choice(HO_TEN),
+            'don_vi': 'CAX Phước Thái',
+            'gia_han': 0,
+            'ngay_het_han': ngay_xay_ra + timedelta(days=60),
+            'trang_thai': self.rng.choice(TRANG_THAI_TIN_BAO)
+        })
+        return row
+
+    def vu_an(self, stt, tin_bao_id):
+        dieu_luat = self.rng.choice(DIEU_LUAT)
+        noi_xay_ra = self.rng.choice(DIA_DIEM)
+        row = self.base_row()
+        row.update({
+            'stt': stt,
+            'tin_bao_id': tin_bao_id,
+            'dieu_luat': dieu_luat,
+            'toi_danh': dieu_luat,
+            'ngay_xay_ra': self.random_date(1095),
+            'noi_xay_ra': noi_xay_ra,
+            'thong_tin_vu_an': f'Vụ án {dieu_luat.lower()} xảy ra tại {noi_xay_ra}, đang tiến hành điều tra xác minh.',
+            'so_khoi_to_vu_an': f'KT-{stt:06d}',
+            'tong_so_bi_can': 0,
+            'thong_tin_bi_can': '',
+            'dieu_tra_vien': self.rng.choice(HO_TEN),
+            'don_vi': 'CAX Phước Thái',
+            'trang_thai': self.rng.choice(TRANG_THAI_VU_AN)
+        })
+        return row
+
+    def bi_can(self, vu_an_id):
+        row = self.base_row()
+        row.update({
+            'vu_an_id': vu_an_id,
+            'ho_ten': self.rng.choice(HO_TEN),
+            'nam_sinh': self.rng.randint(1960, 2005),
+            'dia_chi_thuong_tru': self.rng.choice(DIA_DIEM),
+            'so_cmnd': f'{self.rng.randint(10 ** 11, 10 ** 12 - 1)}',
+            'nghe_nghiep': 'Lao động tự do',
+            'dang_vien': False,
+            'bien_phap_ngan_chan': self.rng.choice(['Tạm giam', 'Cấm đi khỏi nơi cư trú']),
+            'trang_thai': 'Chưa khởi tố'
+        })
+        return row
+
+    def tam_giam(self, bi_can):
+        ngay_bat_giam = self.random_date(365)
+        row = self.base_row()
+        row.update({
+            'vu_an_id': bi_can['vu_an_id'],
+            'bi_can_id': bi_can['id'],
+            'ngay_bat_giam': ngay_bat_giam,
+            'ngay_het_han_giam': ngay_bat_giam + timedelta(days=self.rng.choice([30, 60, 90])),
+            'ly_do_tam_giam': 'Khởi tố bị can',
+            'trang_thai_giam': self.rng.choice(['Đang giam', 'Đã trả tự do'])
+        })
+        return row
+
+
+def bulk_insert(db, model_class, rows):
+    """Insert rows in batches with executemany, committing per batch"""
+    from sqlalchemy import insert
+
+    # Bulk statements skip the ORM hooks that fill the folded search column
+    if hasattr(model_class, 'build_search_text'):
+        for row in rows:
+            row['search_text'] = model_class.build_search_text(row)
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model_class), rows[start:start + BATCH_SIZE])
+        db.session.commit()
+
+
+def generate(counts, seed=42, reference_date=REFERENCE_DATE):
+    from sqlalchemy import func
+    from app import app
+    from database import db
+    from services.sequence_service import SequenceService
+    from services.stats_service import AssetStatsService
+    from utils.schema import refresh_schema
+    from models import (
+        DanhSachVuKhiCongCuHoTro,
+        DanhSachPhuongTien,
+        DanhSachThietBiKyThuatNghiepVu,
+        DanhSachThietBiVanPhongDoanhTrai,
+        DanhSachTrangThietBiThuy,
+        LichSuKiemTraBaoTri,
+        TinBao,
+        VuAn,
+        BiCan,
+        TamGiam
+    )
+
+    asset_models = {
+        'weapons': DanhSachVuKhiCongCuHoTro,
+        'vehicles': DanhSachPhuongTien,
+        'water': DanhSachTrangThietBiThuy,
+        'technical': DanhSachThietBiKyThuatNghiepVu,
+        'office': DanhSachThietBiVanPhongDoanhTrai
+    }
+    generator = DataGenerator(seed, reference_date)
+    sequence_service = SequenceService()
+
+    with app.app_context():
+        db.create_all()
+        refresh_schema()
+        timings = {}
+
+        asset_codes = []
+        for asset_type, model_class in asset_models.items():
+            start = time.perf_counter()
+            offset = model_class.query.count()
+            make_row = getattr(generator, asset_type)
+            rows = [make_row(offset + idx) for idx in range(counts[asset_type])]
+            bulk_insert(db, model_class, rows)
+            asset_codes.extend(row['ma_tai_san'] for row in rows[:1000])
+            timings[asset_type] = time.perf_counter() - start
+
+        # Bulk inserts bypass AssetService, so recompute the summary table once
+        AssetStatsService().rebuild()
+        db.session.commit()
+
+        start = time.perf_counter()
+        if asset_codes:
+            rows = [generator.maintenance(idx, asset_codes) for idx in range(counts['maintenance'])]
+            bulk_insert(db, LichSuKiemTraBaoTri, rows)
+        timings['maintenance'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        max_stt = db.session.query(func.max(TinBao.stt)).scalar() or 0
+        tin_bao_rows = [generator.tin_bao(max_stt + idx + 1) for idx in range(counts['tin_bao'])]
+        bulk_insert(db, TinBao, tin_bao_rows)
+        if tin_bao_rows:
+            # STTs were written directly: move the counter past them so create_tin_bao does not reuse one
+            sequence_service.raise_stt(TinBao, tin_bao_rows[-1]['stt'])
+            db.session.commit()
+        timings['tin_bao'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        max_stt = db.session.query(func.max(VuAn.stt)).scalar() or 0
+        vu_an_rows = [
+            generator.vu_an(
+                max_stt + idx + 1,
+                tin_bao_rows[idx]['id'] if idx < len(tin_bao_rows) else None
+            )
+            for idx in range(counts['vu_an'])
+        ]
+        bulk_insert(db, VuAn, vu_an_rows)
+        if vu_an_rows:
+            sequence_service.raise_stt(VuAn, vu_an_rows[-1]['stt'])
+            db.session.commit()
+        timings['vu_an'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bi_can_rows = []
+        if vu_an_rows:
+            bi_can_rows = [
+                generator.bi_can(vu_an_rows[idx % len(vu_an_rows)]['id'])
+                for idx in range(counts['bi_can'])
+            ]
+            bulk_insert(db, BiCan, bi_can_rows)
+        timings['bi_can'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if bi_can_rows:
+            rows = [
+                generator.tam_giam(bi_can_rows[idx % len(bi_can_rows)])
+                for idx in range(counts['tam_giam'])
+            ]
+            bulk_insert(db, TamGiam, rows)
+        timings['tam_giam'] = time.perf_counter() - start
+
+    return timings
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    counts = resolve_row_counts(args.scale, args.rows)
+
+    print(f"Generating {sum(counts.values())} rows (scale={args.scale}, seed={args.seed}, "
+          f"reference date={args.reference_date})...")
+    timings = generate(counts, seed=args.seed, reference_date=args.reference_date)
+    for table, seconds in timings.items():
+        rows_per_second = counts[table] / seconds if seconds else 0
+        print(f"   - {table}: {counts[table]} rows in {seconds:.2f}s ({rows_per_second:,.0f} rows/s)")
+    print("✓ Benchmark data generated")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+"""
+Benchmark driver: runs each API endpoint through the Flask test client and
+reports p50/p95/p99 latency and rows/s. Results are written as JSON so runs
+can be compared across commits.
+
+Exports are timed with the artifact cache off, so they measure building the
+workbook; the *.cache_hit cases time serving an already cached file.
+
+Usage (from the backend folder, after benchmarks.generate_data):
+    python -m benchmarks.run_benchmarks --database-url sqlite:///bench.db
+    python -m benchmarks.run_benchmarks --only assets --iterations 50
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/<previous>.json
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+BENCH_USERNAME = 'bench_admin'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run API benchmarks')
+    parser.add_argument('--database-url', help='Target database (defaults to DATABASE_URL)')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed iterations per read endpoint')
+    parser.add_argument('--heavy-iterations', type=int, default=3, help='Timed iterations for exports/imports')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed warmup iterations per endpoint')
+    parser.add_argument('--import-rows', type=int, default=1000, help='Rows per generated tin báo import file')
+    parser.add_argument('--only', action='append', default=[], help='Run only cases whose name contains this text')
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/<timestamp>_<commit>.json)')
+    parser.add_argument('--baseline', help='Previous results JSON to compare against')
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], stderr=subprocess.DEVNULL).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def count_rows(response):
+    """Number of records carried by a JSON list/page response"""
+    if response.is_json:
+        payload = response.get_json(silent=True)
+        if isinstance(payload, list):
+            return len(payload)
+        if isinstance(payload, dict):
+            for key in ('items', 'data'):
+                if isinstance(payload.get(key), list):
+                    return len(payload[key])
+            if 'success_count' in payload:
+                return payload['success_count']
+    return 0
+
+
+def build_import_file(rows, offset):
+    """Excel workbook shaped like the tin báo import template"""
+    import pandas as pd
+
+    records = []
+    for idx in range(rows):
+        records.append({
+            'Điều luật': 'Trộm cắp tài sản',
+            'Tên nguồn tin': f'Nguyễn Văn {offset + idx}',
+            'Ngày xảy ra': f'{(idx % 28) + 1:02d}/11/2025',
+            'Nơi xảy ra': 'ấp 6, xã Phước Thái, tỉnh Đồng Nai',
+            'Nội dung nguồn tin': 'Người dân trình báo bị mất xe máy trước cửa nhà vào ban đêm.',
+            'Ngày phân công': '2025-11-20',
+            'Điều tra viên': 'Nguyễn Tấn Lợi',
+            'Đơn vị': 'CAX Phước Thái',
+            'Gia hạn': 0
+        })
+    output = io.BytesIO()
+    pd.DataFrame(records).to_excel(output, index=False)
+    output.seek(0)
+    return output
+
+
+class DatabaseSnapshot:
+    """
+    Copy of the SQLite benchmark database taken before a case that writes to it
+    (tin báo import), restored after every iteration so each one starts from
+    the same data and the database is left as generated.
+    """
+
+    def __init__(self, app):
+        from sqlalchemy.engine import make_url
+
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+            raise ValueError('write benchmarks need a file-based SQLite database to restore')
+        self.app = app
+        self.path = url.database
+        fd, self.snapshot_path = tempfile.mkstemp(suffix='.db', prefix='bench_snapshot_')
+        os.close(fd)
+        self._copy(self.path, self.snapshot_path)
+
+    @staticmethod
+    def _copy(source_path, target_path):
+        with closing(sqlite3.connect(source_path)) as source, closing(sqlite3.connect(target_path)) as target:
+            source.backup(target)
+
+    def restore(self):
+        from database import db
+
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()  # no pooled connection may hold the file while it is overwritten
+        self._copy(self.snapshot_path, self.path)
+
+    def close(self):
+        os.remove(self.snapshot_path)
+
+
+class BenchmarkRunner:
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.client = app.test_client()
+        self.headers = {'Authorization': f'Bearer {self._bench_token()}'}
+        self.results = {}
+
+    def _bench_token(self):
+        from database import db
+        from models import User
+        from utils.auth import generate_token, hash_password
+
+        with self.app.app_context():
+            user = User.query.filter_by(username=BENCH_USERNAME, is_deleted=False).first()
+            if not user:
+                user = User(
+                    username=BENCH_USERNAME,
+                    email='bench_admin@phuocthai.local',
+                    password_hash=hash_password(os.urandom(16).hex()),
+                    full_name='Benchmark',
+                    role='admin',
+                    is_active=True
+                )
+                db.session.add(user)
+                db.session.commit()
+            return generate_token(user)
+
+    def selected(self, name):
+        return not self.args.only or any(part in name for part in self.args.only)
+
+    def run_case(self, name, request_fn, iterations, rows_fn=count_rows, reset_fn=None):
+        """Time request_fn; reset_fn (untimed) runs after every call, warmups included"""
+        if not self.selected(name):
+            return
+        for _ in range(self.args.warmup):
+            request_fn().get_data()
+            if reset_fn:
+                reset_fn()
+
+        durations = []
+        total_rows = 0
+        statuses = set()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = request_fn()
+            response.get_data()  # consume streamed bodies inside the timing
+            durations.append(time.perf_counter() - start)
+            statuses.add(response.status_code)
+            total_rows += rows_fn(response)
+            if reset_fn:
+                reset_fn()
+
+        durations.sort()
+        total_time = sum(durations)
+        self.results[name] = {
+            'iterations': iterations,
+            'status': sorted(statuses),
+            'p50_ms': round(percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 95) * 1000, 3),
+            'p99_ms': round(percentile(durations, 99) * 1000, 3),
+            'mean_ms': round(total_time / iterations * 1000, 3),
+            'rows': total_rows,
+            'rows_per_second': round(total_rows / total_time, 1) if total_time else 0
+        }
+        result = self.results[name]
+        print(f"   {name:<40} p50={result['p50_ms']:>9.2f}ms p95={result['p95_ms']:>9.2f}ms "
+              f"p99={result['p99_ms']:>9.2f}ms rows/s={result['rows_per_second']:>12,.1f} status={result['status']}")
+
+    def get(self, url):
+        return lambda: self.client.get(url, headers=self.headers)
+
+    @contextmanager
+    def artifact_cache(self):
+        """Turn the artifact cache on (in a scratch directory) for the cases inside"""
+        from utils.artifact_cache import get_artifact_cache
+
+        with self.app.app_context():
+            cache = get_artifact_cache()
+        previous = cache.directory, cache.max_size
+        cache.directory = tempfile.mkdtemp(prefix='bench_artifacts_')
+        cache.max_size = 256 * 1024 * 1024
+        try:
+            yield
+        finally:
+            shutil.rmtree(cache.directory, ignore_errors=True)
+            cache.directory, cache.max_size = previous
+
+    def run_cache_hit_case(self, name, url, iterations):
+        """Time serving a cached artifact: one untimed request stores it first; no rows are counted"""
+        if not self.selected(name):
+            return
+        with self.artifact_cache():
+            request_fn = self.get(url)
+            request_fn().get_data()
+            self.run_case(name, request_fn, iterations, rows_fn=lambda r: 0)
+
+    def run(self, table_counts):
+        iterations = self.args.iterations
+        heavy = self.args.heavy_iterations
+
+        for asset_type in ('weapons', 'vehicles', 'water', 'technical', 'office'):
+            self.run_case(f'assets.{asset_type}.page1', self.get(f'/api/assets/{asset_type}?page=1&per_page=20'), iterations)
+            deep_page = max(1, table_counts.get(asset_type, 0) // 20 - 1)
+            self.run_case(f'assets.{asset_type}.deep_page', self.get(f'/api/assets/{asset_type}?page={deep_page}&per_page=20'), iterations)
+            self.run_case(f'assets.{asset_type}.search', self.get(f'/api/assets/{asset_type}?search=12'), iterations)
+        # Typo'd plate number (A/B swapped, separators dropped)
+        self.run_case('assets.vehicles.fuzzy', self.get('/api/assets/vehicles?search=60B3 12345&match=fuzzy'), iterations)
+
+        self.run_case('notifications.top5', self.get('/api/notifications?limit=5'), iterations)
+        self.run_case('notifications.all', self.get('/api/notifications'), heavy)
+        self.run_case('notifications.count', self.get('/api/notifications/count'), iterations, rows_fn=lambda r: 1)
+        self.run_case('dashboard.stats', self.get('/api/dashboard/stats'), iterations, rows_fn=lambda r: 1)
+        self.run_case('dashboard.alerts', self.get('/api/dashboard/alerts?limit=5'), iterations)
+
+        self.run_case('tin_bao.page1', self.get('/api/tin-bao?page=1&per_page=20'), iterations)
+        self.run_case('tin_bao.deep_page', self.get(f"/api/tin-bao?page={max(1, table_counts.get('tin_bao', 0) // 20 - 1)}&per_page=20"), iterations)
+        self.run_case('tin_bao.search', self.get('/api/tin-bao?search=trom'), iterations)
+        self.run_case('tin_bao.search_fts', self.get('/api/tin-bao?search=trom&search_mode=fts'), iterations)
+        self.run_case('vu_an.page1', self.get('/api/vu-an?page=1&per_page=100'), iterations)
+        self.run_case('vu_an.search', self.get('/api/vu-an?search=Phước'), iterations)
+        self.run_case('vu_an.search_fts', self.get('/api/vu-an?search=Phước&search_mode=fts'), iterations)
+        self.run_case('tam_giam.page1', self.get('/api/tam-giam?page=1&per_page=100'), iterations)
+
+        self.run_case('reports.expiring', self.get('/api/reports/expiring'), heavy)
+        self.run_case('reports.export', self.get('/api/reports/summary/export'), heavy,
+                      rows_fn=lambda r: sum(table_counts.get(t, 0) for t in ('weapons', 'vehicles', 'water', 'technical', 'office')))
+        self.run_case('assets.weapons.export', self.get('/api/assets/weapons/export'), heavy,
+                      rows_fn=lambda r: table_counts.get('weapons', 0))
+        self.run_cache_hit_case('reports.export.cache_hit', '/api/reports/summary/export', iterations)
+        self.run_cache_hit_case('assets.weapons.export.cache_hit', '/api/assets/weapons/export', iterations)
+
+        import_offset = [0]
+
+        def import_tin_bao():
+            import_offset[0] += self.args.import_rows
+            data = {'file': (build_import_file(self.args.import_rows, import_offset[0]), 'tin_bao.xlsx')}
+            return self.client.post('/api/tin-bao/import', headers=self.headers, data=data,
+                                    content_type='multipart/form-data')
+
+        if self.selected('tin_bao.import'):
+            try:
+                snapshot = DatabaseSnapshot(self.app)
+            except ValueError as e:
+                print(f"   {'tin_bao.import':<40} skipped: {e}")
+            else:
+                try:
+                    self.run_case('tin_bao.import', import_tin_bao, heavy, reset_fn=snapshot.restore)
+                finally:
+                    snapshot.close()
+        return self.results
+
+
+def table_row_counts(app):
+    from database import db
+    from sqlalchemy import func
+    from models import (
+        DanhSachVuKhiCongCuHoTro,
+        DanhSachPhuongTien,
+        DanhSachThietBiKyThuatNghiepVu,
+        DanhSachThietBiVanPhongDoanhTrai,
+        DanhSachTrangThietBiThuy,
+        LichSuKiemTraBaoTri,
+        TinBao,
+        VuAn,
+        BiCan,
+        TamGiam
+    )
+
+    models = {
+        'weapons': DanhSachVuKhiCongCuHoTro,
+        'vehicles': DanhSachPhuongTien,
+        'water': DanhSachTrangThietBiThuy,
+        'technical': DanhSachThietBiKyThuatNghiepVu,
+        'office': DanhSachThietBiVanPhongDoanhTrai,
+        'maintenance': LichSuKiemTraBaoTri,
+        'tin_bao': TinBao,
+        'vu_an': VuAn,
+        'bi_can': BiCan,
+        'tam_giam': TamGiam
+    }
+    with app.app_context():
+        return {name: db.session.query(func.count()).select_from(model).scalar() for name, model in models.items()}
+
+
+def print_comparison(baseline_path, results):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nComparison with {baseline.get('commit')} ({baseline_path}):")
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous.get('p50_ms'):
+            continue
+        change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100
+        print(f"   {name:<40} p50 {previous['p50_ms']:>9.2f}ms -> {result['p50_ms']:>9.2f}ms ({change:+.1f}%)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import app
+
+    # Time building exports, not reading files the artifact cache kept (see run_cache_hit_case)
+    app.config['ARTIFACT_CACHE_MAX_SIZE'] = 0
+
+    counts = table_row_counts(app)
+    print(f"Row counts: {counts}")
+    runner = BenchmarkRunner(app, args)
+    results = runner.run(counts)
+
+    commit, dirty = git_revision()
+    payload = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'database_dialect': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'row_counts': counts,
+        'settings': {
+            'iterations': args.iterations,
+            'heavy_iterations': args.heavy_iterations,
+            'warmup': args.warmup,
+            'import_rows': args.import_rows
+        },
+        'results': results
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.baseline:
+        print_comparison(args.baseline, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
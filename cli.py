@@ -0,0 +1,96 @@
+"""
+Maintenance commands, run with the Flask CLI (FLASK_APP=app.py):
+    flask stats rebuild         Recompute the asset_stats summary table from the asset tables
+    flask search rebuild        Re-index the tin báo / vụ án full-text (FTS5) indexes
+    flask sequences reconcile   Reseed the STT / asset code counters from existing rows
+"""
+import click
+from flask.cli import AppGroup
+
+from database import db
+
+stats_cli = AppGroup('stats', help='Asset statistics summary table')
+search_cli = AppGroup('search', help='Full-text search indexes')
+sequences_cli = AppGroup('sequences', help='STT and asset code counters')
+
+
+@stats_cli.command('rebuild')
+@click.option('--asset-type', 'asset_types', multiple=True,
+              help='Only rebuild these asset types (weapons, vehicles, water, technical, office)')
+def rebuild_stats(asset_types):
+    """Recompute asset_stats to repair drift"""
+    from services.stats_service import AssetStatsService
+    from utils.schema import refresh_schema
+
+    stats_service = AssetStatsService()
+    invalid = [asset_type for asset_type in asset_types if asset_type not in stats_service.model_map]
+    if invalid:
+        raise click.BadParameter(f"Invalid asset type: {', '.join(invalid)}")
+
+    refresh_schema()
+    totals = stats_service.rebuild(asset_types or None)
+    db.session.commit()
+
+    for asset_type, values in totals.items():
+        click.echo(f"✓ {asset_type}: {values['total']} tài sản, nguyên giá {values['nguyen_gia']}, "
+                   f"giá trị còn lại {values['gia_tri_con_lai']}")
+
+
+@search_cli.command('rebuild')
+def rebuild_search():
+    """Create missing FTS5 indexes and re-index every row"""
+    from utils.fts import FTS_INDEXES, create_fts_index
+    from utils.schema import refresh_schema
+
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('FTS5 search indexes are only available on SQLite')
+
+    with db.engine.begin() as connection:
+        for table_name in FTS_INDEXES:
+            create_fts_index(connection, table_name)
+            click.echo(f"✓ {table_name}_fts")
+    refresh_schema()
+
+
+@sequences_cli.command('reconcile')
+def reconcile_sequences():
+    """Reseed counters to the highest number in use (after restoring a backup or editing STTs by hand)"""
+    from models import SequenceCounter, TinBao, VuAn
+    from services.asset_service import ASSET_CODE_PREFIXES, AssetService
+    from services.sequence_service import SequenceService
+    from utils.schema import refresh_schema
+
+    refresh_schema()
+    sequence_service = SequenceService()
+    if not sequence_service.available():
+        raise click.ClickException('sequence_counters table not found, run `flask db upgrade` first')
+
+    for model_class in (TinBao, VuAn):
+        name = sequence_service.stt_counter_name(model_class)
+        value = sequence_service.max_stt(model_class)
+        sequence_service.reconcile(name, value)
+        click.echo(f"✓ {name} = {value}")
+
+    # Asset code counters are per month: only reseed the ones already created
+    asset_service = AssetService()
+    type_by_prefix = {prefix: asset_type for asset_type, prefix in ASSET_CODE_PREFIXES.items()}
+    names = db.session.execute(
+        db.select(SequenceCounter.name).where(SequenceCounter.name.like('ma_tai_san:%'))
+    ).scalars().all()
+    for name in names:
+        search_pattern = name.split(':', 1)[1]
+        asset_type = type_by_prefix.get(search_pattern[:2])
+        if asset_type is None:
+            continue
+        value = asset_service._max_code_sequence(search_pattern, asset_service.model_map[asset_type])
+        sequence_service.reconcile(name, value)
+        click.echo(f"✓ {name} = {value}")
+
+    db.session.commit()
+
+
+def register_commands(app):
+    """Attach the maintenance command groups to the app CLI"""
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(sequences_cli)
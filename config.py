@@ -24,8 +24,52 @@ class Config:
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
     
+    # SQL instrumentation (X-Query-Count / Server-Timing headers, N+1 warnings)
+    SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', 'False').lower() == 'true'
+    SQL_REPEATED_STATEMENT_THRESHOLD = int(os.getenv('SQL_REPEATED_STATEMENT_THRESHOLD', 10))
+    
+    # Metrics endpoint (/api/metrics, Prometheus text format), off unless enabled
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # when set, scrapers must send "Authorization: Bearer <token>"
+    
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_DELTA = 86400  # 24 hours
+    
+    # Auth user cache (principals cached across requests, invalidated on user writes)
+    AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))  # seconds, 0 = disabled
+    AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 1024))
+    
+    # Notification badge counts (cleared on asset/maintenance writes)
+    NOTIFICATION_COUNT_CACHE_TTL = int(os.getenv('NOTIFICATION_COUNT_CACHE_TTL', 30))  # seconds, 0 = disabled
+    
+    # Dashboard stats snapshot (cleared on asset writes)
+    DASHBOARD_STATS_TTL = int(os.getenv('DASHBOARD_STATS_TTL', 60))  # seconds, 0 = disabled
+    
+    # Fuzzy asset lookup (?match=fuzzy) on the in-process trigram index
+    FUZZY_SEARCH_MAX_RESULTS = int(os.getenv('FUZZY_SEARCH_MAX_RESULTS', 200))
+    FUZZY_SEARCH_THRESHOLD = float(os.getenv('FUZZY_SEARCH_THRESHOLD', 0.3))  # share of query trigrams that must match
+    FUZZY_INDEX_MAX_AGE = int(os.getenv('FUZZY_INDEX_MAX_AGE', 300))  # seconds before a full rebuild, 0 = never
+    
+    # Excel exports (streamed from a temp spool; rows fetched in batches)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+    EXPORT_SPOOL_MAX_SIZE = int(os.getenv('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))  # bytes kept in memory before spilling to disk
+    
+    # Generated exports/templates cached on disk, keyed by (type, filters, data version)
+    ARTIFACT_CACHE_DIR = os.getenv('ARTIFACT_CACHE_DIR', os.path.join(BASE_DIR, 'exports'))
+    ARTIFACT_CACHE_MAX_SIZE = int(os.getenv('ARTIFACT_CACHE_MAX_SIZE', 256 * 1024 * 1024))  # bytes, 0 = disabled
+    ARTIFACT_CACHE_MAX_AGE = int(os.getenv('ARTIFACT_CACHE_MAX_AGE', 7 * 86400))  # seconds since last use, 0 = no limit
+    
+    # Excel imports: rows validated and inserted per transaction
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 500))
+    UPLOAD_DIR = os.getenv('UPLOAD_DIR', os.path.join(BASE_DIR, 'imports'))  # uploaded files awaiting import
+    
+    # Background jobs (?async=1 on imports/exports): in-process thread pool per job type,
+    # so the concurrency limits apply per server process (a 4-worker server runs up to 4x)
+    JOB_IMPORT_CONCURRENCY = int(os.getenv('JOB_IMPORT_CONCURRENCY', 1))  # per import type
+    JOB_EXPORT_CONCURRENCY = int(os.getenv('JOB_EXPORT_CONCURRENCY', 2))  # per export type
+    JOB_PROGRESS_INTERVAL = float(os.getenv('JOB_PROGRESS_INTERVAL', 1))  # seconds between progress writes
+    JOB_RESULTS_DIR = os.getenv('JOB_RESULTS_DIR', os.path.join(BASE_DIR, 'job_results'))
+    JOB_RESULT_MAX_AGE = int(os.getenv('JOB_RESULT_MAX_AGE', 86400))  # seconds export files are kept, 0 = forever
 
@@ -15,6 +15,7 @@ from models import (
     LichSuKiemTraBaoTri,
     DanhMucLoaiTaiSan
 )
+import utils.fts  # noqa: F401 - creates the FTS5 search indexes together with tin_bao/vu_an
 from datetime import date, timedelta
 
 # Create Flask app
@@ -106,6 +106,9 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+    # Schema changed: drop the startup snapshot so it is re-inspected on next use
+    current_app.extensions.pop('db_schema', None)
+
 
 if context.is_offline_mode():
     run_migrations_offline()
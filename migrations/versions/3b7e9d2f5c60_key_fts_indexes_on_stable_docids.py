@@ -0,0 +1,40 @@
+"""Key the FTS5 indexes on stable docids instead of the implicit rowid
+
+Revision ID: 3b7e9d2f5c60
+Revises: 8c2d4e6f1a39
+Create Date: 2026-10-18 18:41:57.216430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.fts import create_fts_index, drop_statements
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9d2f5c60'
+down_revision = '8c2d4e6f1a39'
+branch_labels = None
+depends_on = None
+
+# Columns indexed at this revision (before 9e4a7c1d3b52 switched to search_text)
+FTS_COLUMNS = {
+    'tin_bao': ('dieu_luat', 'ten_nguon_tin', 'noi_xay_ra', 'noi_dung_nguon_tin'),
+    'vu_an': ('toi_danh', 'dieu_luat', 'noi_xay_ra', 'thong_tin_vu_an', 'so_khoi_to_vu_an'),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    # The triggers keep their names, so the rowid-keyed ones must go first
+    for table_name, columns in FTS_COLUMNS.items():
+        for statement in drop_statements(table_name):
+            op.execute(statement)
+        create_fts_index(bind, table_name, columns)
+
+
+def downgrade():
+    # The docid-keyed index is also what c7f3b1e8d905 creates now; nothing to undo
+    pass
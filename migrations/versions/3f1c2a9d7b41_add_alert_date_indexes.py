@@ -0,0 +1,38 @@
+"""Add indexes on inspection/reminder date columns used by notifications
+
+Revision ID: 3f1c2a9d7b41
+Revises: 9127ec7ea299
+Create Date: 2026-10-18 09:12:40.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b41'
+down_revision = '9127ec7ea299'
+branch_labels = None
+depends_on = None
+
+
+ALERT_DATE_INDEXES = [
+    ('danh_sach_vu_khi_cong_cu_ho_tro', 'ngay_kiem_tra_tiep_theo'),
+    ('danh_sach_phuong_tien', 'ngay_kiem_tra_tiep_theo'),
+    ('danh_sach_phuong_tien', 'ngay_dang_kiem'),
+    ('danh_sach_phuong_tien', 'ngay_thay_nhot'),
+    ('danh_sach_phuong_tien', 'ngay_thay_vo'),
+    ('danh_sach_trang_thiet_bi_thuy', 'ngay_kiem_tra_tiep_theo'),
+    ('danh_sach_thiet_bi_ky_thuat_nghiep_vu', 'ngay_kiem_tra_tiep_theo'),
+    ('danh_sach_thiet_bi_van_phong_doanh_trai', 'ngay_kiem_tra_tiep_theo'),
+]
+
+
+def upgrade():
+    for table_name, column_name in ALERT_DATE_INDEXES:
+        op.create_index(op.f(f'ix_{table_name}_{column_name}'), table_name, [column_name], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for table_name, column_name in reversed(ALERT_DATE_INDEXES):
+        op.drop_index(op.f(f'ix_{table_name}_{column_name}'), table_name=table_name, if_exists=True)
@@ -0,0 +1,38 @@
+"""Drop the B-tree indexes on search_text (unusable for LIKE '%term%')
+
+Revision ID: 8c2d4e6f1a39
+Revises: 5e1b7c9a2d48
+Create Date: 2026-10-18 18:20:11.503912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2d4e6f1a39'
+down_revision = '5e1b7c9a2d48'
+branch_labels = None
+depends_on = None
+
+
+# Tables that got ix_<table>_search_text from an earlier version of e2a5c8f1b364
+TABLES = (
+    'danh_sach_vu_khi_cong_cu_ho_tro',
+    'danh_sach_phuong_tien',
+    'danh_sach_trang_thiet_bi_thuy',
+    'danh_sach_thiet_bi_ky_thuat_nghiep_vu',
+    'danh_sach_thiet_bi_van_phong_doanh_trai',
+    'tin_bao',
+    'vu_an',
+)
+
+
+def upgrade():
+    for table_name in TABLES:
+        op.drop_index(op.f(f'ix_{table_name}_search_text'), table_name=table_name, if_exists=True)
+
+
+def downgrade():
+    # Nothing to restore: e2a5c8f1b364 no longer creates these indexes
+    pass
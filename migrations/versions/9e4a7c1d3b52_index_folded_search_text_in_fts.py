@@ -0,0 +1,45 @@
+"""Index the folded search_text column in the FTS5 tables
+
+Revision ID: 9e4a7c1d3b52
+Revises: 3b7e9d2f5c60
+Create Date: 2026-10-18 20:14:38.502917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.fts import FTS_INDEXES, create_fts_index, drop_statements
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4a7c1d3b52'
+down_revision = '3b7e9d2f5c60'
+branch_labels = None
+depends_on = None
+
+# Raw columns the index covered before this revision (restored on downgrade)
+PREVIOUS_COLUMNS = {
+    'tin_bao': ('dieu_luat', 'ten_nguon_tin', 'noi_xay_ra', 'noi_dung_nguon_tin'),
+    'vu_an': ('toi_danh', 'dieu_luat', 'noi_xay_ra', 'thong_tin_vu_an', 'so_khoi_to_vu_an'),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    # unicode61 does not fold đ: index the text utils.text.fold_text already folded
+    for table_name in FTS_INDEXES:
+        for statement in drop_statements(table_name):
+            op.execute(statement)
+        create_fts_index(bind, table_name)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for table_name, columns in PREVIOUS_COLUMNS.items():
+        for statement in drop_statements(table_name):
+            op.execute(statement)
+        create_fts_index(bind, table_name, columns)
@@ -0,0 +1,35 @@
+"""Add (created_at, id) indexes for keyset pagination of asset lists
+
+Revision ID: a4d9e6c3f258
+Revises: 6b8e0d4f2c17
+Create Date: 2026-10-18 10:41:07.903215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d9e6c3f258'
+down_revision = '6b8e0d4f2c17'
+branch_labels = None
+depends_on = None
+
+
+ASSET_TABLES = [
+    'danh_sach_vu_khi_cong_cu_ho_tro',
+    'danh_sach_phuong_tien',
+    'danh_sach_trang_thiet_bi_thuy',
+    'danh_sach_thiet_bi_ky_thuat_nghiep_vu',
+    'danh_sach_thiet_bi_van_phong_doanh_trai',
+]
+
+
+def upgrade():
+    for table_name in ASSET_TABLES:
+        op.create_index(f'ix_{table_name}_created_at_id', table_name, ['created_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for table_name in reversed(ASSET_TABLES):
+        op.drop_index(f'ix_{table_name}_created_at_id', table_name=table_name, if_exists=True)
@@ -0,0 +1,41 @@
+"""Add FTS5 full-text indexes for tin_bao and vu_an
+
+Revision ID: c7f3b1e8d905
+Revises: a4d9e6c3f258
+Create Date: 2026-10-18 11:20:33.581904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.fts import create_fts_index, drop_statements
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f3b1e8d905'
+down_revision = 'a4d9e6c3f258'
+branch_labels = None
+depends_on = None
+
+# Columns indexed at this revision (search_text did not exist yet; see 9e4a7c1d3b52)
+FTS_COLUMNS = {
+    'tin_bao': ('dieu_luat', 'ten_nguon_tin', 'noi_xay_ra', 'noi_dung_nguon_tin'),
+    'vu_an': ('toi_danh', 'dieu_luat', 'noi_xay_ra', 'thong_tin_vu_an', 'so_khoi_to_vu_an'),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for table_name, columns in FTS_COLUMNS.items():
+        create_fts_index(bind, table_name, columns)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for table_name in FTS_COLUMNS:
+        for statement in drop_statements(table_name):
+            op.execute(statement)
@@ -0,0 +1,55 @@
+"""Add folded search_text columns for accent-insensitive search
+
+Revision ID: e2a5c8f1b364
+Revises: c7f3b1e8d905
+Create Date: 2026-10-18 12:05:48.270119
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from utils.text import fold_text
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a5c8f1b364'
+down_revision = 'c7f3b1e8d905'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_FIELDS = {
+    'danh_sach_vu_khi_cong_cu_ho_tro': ('ma_tai_san', 'ten_tai_san', 'so_hieu'),
+    'danh_sach_phuong_tien': ('ma_tai_san', 'ten_phuong_tien', 'bien_so_ky_hieu'),
+    'danh_sach_trang_thiet_bi_thuy': ('ma_tai_san', 'ten_trang_bi', 'ma_hieu'),
+    'danh_sach_thiet_bi_ky_thuat_nghiep_vu': ('ma_tai_san', 'ten_tai_san'),
+    'danh_sach_thiet_bi_van_phong_doanh_trai': ('ma_tai_san', 'ten_tai_san'),
+    'tin_bao': ('dieu_luat', 'ten_nguon_tin', 'noi_xay_ra', 'noi_dung_nguon_tin'),
+    'vu_an': ('toi_danh', 'dieu_luat', 'noi_xay_ra', 'thong_tin_vu_an', 'so_khoi_to_vu_an'),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table_name, fields in SEARCH_FIELDS.items():
+        op.add_column(table_name, sa.Column('search_text', sa.Text(), nullable=True))
+
+        # Backfill with the same folding the models apply on write
+        table = sa.table(table_name, sa.column('id'), sa.column('search_text'), *[sa.column(name) for name in fields])
+        rows = bind.execute(sa.select(table.c.id, *[table.c[name] for name in fields])).all()
+        updates = [
+            {'row_id': row.id, 'value': fold_text(' '.join(str(value) for value in row[1:] if value))}
+            for row in rows
+        ]
+        if updates:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values(search_text=sa.bindparam('value')),
+                updates
+            )
+
+
+def downgrade():
+    for table_name in reversed(list(SEARCH_FIELDS)):
+        op.drop_index(op.f(f'ix_{table_name}_search_text'), table_name=table_name, if_exists=True)
+        # Plain ALTER TABLE: a batch (copy-and-move) rebuild would drop the FTS triggers
+        op.drop_column(table_name, 'search_text')
@@ -0,0 +1,24 @@
+"""Add (ngay_bat_giam, id) index for the tạm giam register order
+
+Revision ID: f8b3d6a1c472
+Revises: e2a5c8f1b364
+Create Date: 2026-10-18 14:12:35.418062
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3d6a1c472'
+down_revision = 'e2a5c8f1b364'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tam_giam_ngay_bat_giam_id', 'tam_giam', ['ngay_bat_giam', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_tam_giam_ngay_bat_giam_id', table_name='tam_giam', if_exists=True)
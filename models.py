@@ -1,5 +1,8 @@
 from database import db
 from datetime import datetime
+import json
+from sqlalchemy import and_, event
+from utils.text import fold_terms, fold_text
 import uuid as uuid_lib
 
 class BaseModel(db.Model):
@@ -11,8 +14,43 @@ class BaseModel(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_deleted = db.Column(db.Boolean, default=False)
 
-class DanhSachVuKhiCongCuHoTro(BaseModel):
+class SearchTextMixin:
+    """Cột search_text: các trường tìm kiếm ghép lại, bỏ dấu, chữ thường (xem utils.text.fold_text)"""
+    __search_fields__ = ()
+    
+    # Substring match (LIKE '%term%') scans the table: a B-tree index cannot serve it.
+    # tin_bao and vu_an also index this column in FTS5 (search_mode=fts, utils.fts).
+    search_text = db.Column(db.Text)
+    
+    @classmethod
+    def build_search_text(cls, values):
+        """Folded search text from an instance or a dict of column values"""
+        get = values.get if isinstance(values, dict) else lambda name: getattr(values, name, None)
+        return fold_text(' '.join(str(get(name)) for name in cls.__search_fields__ if get(name)))
+    
+    @classmethod
+    def search_filter(cls, search):
+        """Every folded word of `search` must appear in search_text; None when it has no words"""
+        terms = fold_terms(search)
+        if not terms:
+            return None
+        return and_(*[cls.search_text.contains(term, autoescape=True) for term in terms])
+    
+    @classmethod
+    def apply_search(cls, query, search):
+        """Restrict `query` by search_filter, or leave it unchanged when `search` has no words"""
+        criterion = cls.search_filter(search)
+        return query if criterion is None else query.filter(criterion)
+
+@event.listens_for(SearchTextMixin, 'before_insert', propagate=True)
+@event.listens_for(SearchTextMixin, 'before_update', propagate=True)
+def _refresh_search_text(mapper, connection, target):
+    target.search_text = target.build_search_text(target)
+
+class DanhSachVuKhiCongCuHoTro(SearchTextMixin, BaseModel):
     __tablename__ = 'danh_sach_vu_khi_cong_cu_ho_tro'
+    __table_args__ = (db.Index('ix_danh_sach_vu_khi_cong_cu_ho_tro_created_at_id', 'created_at', 'id'),)  # keyset pagination
+    __search_fields__ = ('ma_tai_san', 'ten_tai_san', 'so_hieu')
     
     ma_tai_san = db.Column(db.String(50), unique=True, nullable=False)
     ma_danh_muc = db.Column(db.String(20), nullable=False)
@@ -29,7 +67,7 @@ class DanhSachVuKhiCongCuHoTro(BaseModel):
     vi_tri_tai_san = db.Column(db.String(100))
     nguoi_su_dung = db.Column(db.String(100))
     ngay_kiem_tra_gan_nhat = db.Column(db.Date)
-    ngay_kiem_tra_tiep_theo = db.Column(db.Date)
+    ngay_kiem_tra_tiep_theo = db.Column(db.Date, index=True)
     ket_qua_kiem_tra = db.Column(db.String(20))
     nam_het_han = db.Column(db.Integer)
     phuong_thuc_xu_ly = db.Column(db.String(50))
@@ -63,8 +101,10 @@ class DanhSachVuKhiCongCuHoTro(BaseModel):
             'is_deleted': self.is_deleted
         }
 
-class DanhSachPhuongTien(BaseModel):
+class DanhSachPhuongTien(SearchTextMixin, BaseModel):
     __tablename__ = 'danh_sach_phuong_tien'
+    __table_args__ = (db.Index('ix_danh_sach_phuong_tien_created_at_id', 'created_at', 'id'),)  # keyset pagination
+    __search_fields__ = ('ma_tai_san', 'ten_phuong_tien', 'bien_so_ky_hieu')
     
     ma_tai_san = db.Column(db.String(50), unique=True, nullable=False)
     danh_muc_phuong_tien = db.Column(db.String(50), nullable=False)
@@ -78,16 +118,16 @@ class DanhSachPhuongTien(BaseModel):
     nam_trang_bi = db.Column(db.Integer)
     loai_tai_san = db.Column(db.String(50))
     thuc_te_ban_giao = db.Column(db.String(10))
-    ngay_dang_kiem = db.Column(db.Date)
-    ngay_thay_nhot = db.Column(db.Date)
-    ngay_thay_vo = db.Column(db.Date)
+    ngay_dang_kiem = db.Column(db.Date, index=True)
+    ngay_thay_nhot = db.Column(db.Date, index=True)
+    ngay_thay_vo = db.Column(db.Date, index=True)
     sua_chua = db.Column(db.Text)
     phi_duong_bo = db.Column(db.Text)
     nam_het_han = db.Column(db.Integer)
     phuong_thuc_xu_ly = db.Column(db.String(50))
     dinh_ky_kiem_tra = db.Column(db.String(20))
     ngay_kiem_tra_gan_nhat = db.Column(db.Date)
-    ngay_kiem_tra_tiep_theo = db.Column(db.Date)
+    ngay_kiem_tra_tiep_theo = db.Column(db.Date, index=True)
     ket_qua_kiem_tra = db.Column(db.String(20))
     ghi_chu = db.Column(db.Text)
     
@@ -123,8 +163,10 @@ class DanhSachPhuongTien(BaseModel):
             'is_deleted': self.is_deleted
         }
 
-class DanhSachThietBiKyThuatNghiepVu(BaseModel):
+class DanhSachThietBiKyThuatNghiepVu(SearchTextMixin, BaseModel):
     __tablename__ = 'danh_sach_thiet_bi_ky_thuat_nghiep_vu'
+    __table_args__ = (db.Index('ix_danh_sach_thiet_bi_ky_thuat_nghiep_vu_created_at_id', 'created_at', 'id'),)  # keyset pagination
+    __search_fields__ = ('ma_tai_san', 'ten_tai_san')
     
     ma_tai_san = db.Column(db.String(50), unique=True, nullable=False)
     ten_tai_san = db.Column(db.String(255), nullable=False)
@@ -136,7 +178,7 @@ class DanhSachThietBiKyThuatNghiepVu(BaseModel):
     thuc_te_ban_giao = db.Column(db.String(10))
     dinh_ky_kiem_tra = db.Column(db.String(20))
     ngay_kiem_tra_gan_nhat = db.Column(db.Date)
-    ngay_kiem_tra_tiep_theo = db.Column(db.Date)
+    ngay_kiem_tra_tiep_theo = db.Column(db.Date, index=True)
     ket_qua_kiem_tra = db.Column(db.String(20))
     nam_het_han = db.Column(db.Integer)
     phuong_thuc_xu_ly = db.Column(db.String(50))
@@ -165,8 +207,10 @@ class DanhSachThietBiKyThuatNghiepVu(BaseModel):
             'is_deleted': self.is_deleted
         }
 
-class DanhSachThietBiVanPhongDoanhTrai(BaseModel):
+class DanhSachThietBiVanPhongDoanhTrai(SearchTextMixin, BaseModel):
     __tablename__ = 'danh_sach_thiet_bi_van_phong_doanh_trai'
+    __table_args__ = (db.Index('ix_danh_sach_thiet_bi_van_phong_doanh_trai_created_at_id', 'created_at', 'id'),)  # keyset pagination
+    __search_fields__ = ('ma_tai_san', 'ten_tai_san')
     
     ma_tai_san = db.Column(db.String(50), unique=True, nullable=False)
     ten_tai_san = db.Column(db.String(255), nullable=False)
@@ -181,7 +225,7 @@ class DanhSachThietBiVanPhongDoanhTrai(BaseModel):
     chi_phi = db.Column(db.Numeric(15, 0))
     dinh_ky_kiem_tra = db.Column(db.String(20))
     ngay_kiem_tra_gan_nhat = db.Column(db.Date)
-    ngay_kiem_tra_tiep_theo = db.Column(db.Date)
+    ngay_kiem_tra_tiep_theo = db.Column(db.Date, index=True)
     ket_qua_kiem_tra = db.Column(db.String(20))
     nam_het_han = db.Column(db.Integer)
     phuong_thuc_xu_ly = db.Column(db.String(50))
@@ -241,8 +285,10 @@ class LichSuKiemTraBaoTri(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
-class DanhSachTrangThietBiThuy(BaseModel):
+class DanhSachTrangThietBiThuy(SearchTextMixin, BaseModel):
     __tablename__ = 'danh_sach_trang_thiet_bi_thuy'
+    __table_args__ = (db.Index('ix_danh_sach_trang_thiet_bi_thuy_created_at_id', 'created_at', 'id'),)  # keyset pagination
+    __search_fields__ = ('ma_tai_san', 'ten_trang_bi', 'ma_hieu')
     
     ma_tai_san = db.Column(db.String(50), unique=True, nullable=False)
     danh_muc_trang_thiet_bi = db.Column(db.String(50), nullable=False)
@@ -254,7 +300,7 @@ class DanhSachTrangThietBiThuy(BaseModel):
     nam_trang_bi = db.Column(db.Integer)
     loai_tai_san = db.Column(db.String(50))
     ngay_kiem_tra_gan_nhat = db.Column(db.Date)
-    ngay_kiem_tra_tiep_theo = db.Column(db.Date)
+    ngay_kiem_tra_tiep_theo = db.Column(db.Date, index=True)
     ket_qua_kiem_tra = db.Column(db.String(20))
     nam_het_han = db.Column(db.Integer)
     phuong_thuc_xu_ly = db.Column(db.String(50))
@@ -299,6 +345,78 @@ class DanhMucLoaiTaiSan(db.Model):
             'mo_ta': self.mo_ta
         }
 
+class AssetStats(db.Model):
+    """Số lượng và tổng giá trị theo loại tài sản, cập nhật theo delta khi ghi tài sản"""
+    __tablename__ = 'asset_stats'
+    
+    asset_type = db.Column(db.String(20), primary_key=True)  # weapons, vehicles, water, technical, office
+    total = db.Column(db.Integer, nullable=False, default=0)
+    nguyen_gia = db.Column(db.Numeric(18, 0), nullable=False, default=0)
+    gia_tri_con_lai = db.Column(db.Numeric(18, 0), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'asset_type': self.asset_type,
+            'total': self.total,
+            'nguyen_gia': float(self.nguyen_gia) if self.nguyen_gia is not None else 0,
+            'gia_tri_con_lai': float(self.gia_tri_con_lai) if self.gia_tri_con_lai is not None else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class SequenceCounter(db.Model):
+    """Bộ đếm tuần tự (mã tài sản theo tiền tố + tháng, ...), cấp phát bằng UPDATE nguyên tử"""
+    __tablename__ = 'sequence_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)  # e.g. ma_tai_san:VK2610
+    value = db.Column(db.Integer, nullable=False, default=0)  # last value handed out
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class Job(BaseModel):
+    """Tác vụ nền (import/export Excel) chạy ngoài request, theo dõi qua /api/jobs/<id>"""
+    __tablename__ = 'jobs'
+
+    job_type = db.Column(db.String(50), nullable=False, index=True)  # asset_import, tin_bao_import, asset_export, report_export
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    params = db.Column(db.Text)  # JSON
+    processed = db.Column(db.Integer, nullable=False, default=0)  # rows processed so far
+    total = db.Column(db.Integer)  # rows expected, when known
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    result_path = db.Column(db.String(500))  # file produced by export jobs
+    result_filename = db.Column(db.String(255))
+    result_mimetype = db.Column(db.String(100))
+    created_by = db.Column(db.String(36), index=True)  # users.id
+    worker = db.Column(db.String(100))  # host:pid:boot id of the process whose thread pool runs it
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'params': json.loads(self.params) if self.params else None,
+            'processed': self.processed,
+            'total': self.total,
+            'error_count': self.error_count,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'download_url': f'/api/jobs/{self.id}/download' if self.result_path else None,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
 class User(BaseModel):
     __tablename__ = 'users'
     
@@ -327,9 +445,10 @@ class User(BaseModel):
 
 # ==================== PHASE 2: QUẢN LÝ TIN BÁO & VỤ ÁN ====================
 
-class TinBao(BaseModel):
+class TinBao(SearchTextMixin, BaseModel):
     """Tin báo đang hiện hành"""
     __tablename__ = 'tin_bao'
+    __search_fields__ = ('dieu_luat', 'ten_nguon_tin', 'noi_xay_ra', 'noi_dung_nguon_tin')
     
     stt = db.Column(db.Integer, nullable=False, unique=True)
     dieu_luat = db.Column(db.String(255), nullable=False)
@@ -385,9 +504,10 @@ class TinBao(BaseModel):
         }
 
 
-class VuAn(BaseModel):
+class VuAn(SearchTextMixin, BaseModel):
     """Vụ án đang được điều tra"""
     __tablename__ = 'vu_an'
+    __search_fields__ = ('toi_danh', 'dieu_luat', 'noi_xay_ra', 'thong_tin_vu_an', 'so_khoi_to_vu_an')
     
     stt = db.Column(db.Integer, nullable=False, unique=True)
     tin_bao_id = db.Column(db.String(36), db.ForeignKey('tin_bao.id', ondelete='SET NULL'), nullable=True)
@@ -422,6 +542,7 @@ class VuAn(BaseModel):
     # Relationships
     bi_can_list = db.relationship('BiCan', backref='vu_an', lazy=True, cascade='all, delete-orphan')
     tam_giam_list = db.relationship('TamGiam', backref='vu_an', lazy=True, cascade='all, delete-orphan')
+    tin_bao = db.relationship('TinBao', foreign_keys=[tin_bao_id], viewonly=True)
     
     def to_dict(self):
         return {
@@ -529,6 +650,7 @@ class LichSuChuyenDoi(BaseModel):
 class TamGiam(BaseModel):
     """Tạm giam - Liên kết với vụ án"""
     __tablename__ = 'tam_giam'
+    __table_args__ = (db.Index('ix_tam_giam_ngay_bat_giam_id', 'ngay_bat_giam', 'id'),)  # list order + keyset pagination
     
     vu_an_id = db.Column(db.String(36), db.ForeignKey('vu_an.id', ondelete='CASCADE'), nullable=False)
     bi_can_id = db.Column(db.String(36), db.ForeignKey('bi_can.id', ondelete='CASCADE'), nullable=False)
@@ -1,29 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from services.asset_service import AssetService
+from services.job_service import JobService, wants_async
+from routes.jobs import job_accepted
 from utils.validation import validate_asset_data
 from utils.auth import require_auth, require_admin, get_current_user
+from utils.metrics import time_excel_job
+from utils.pagination import InvalidCursorError, get_pagination_args
 from datetime import datetime
 
 bp = Blueprint('assets', __name__)
 asset_service = AssetService()
+job_service = JobService()
 
 @bp.route('/<asset_type>', methods=['GET'])
 @require_auth
 def get_assets(asset_type):
     """Get list of assets by type"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        pagination = get_pagination_args(request.args)
         search = request.args.get('search', '')
+        match = request.args.get('match')  # 'fuzzy': typo-tolerant lookup on codes/plates/serials
         filters = dict(request.args)
         
         # Remove pagination params from filters
-        filters.pop('page', None)
-        filters.pop('per_page', None)
-        filters.pop('search', None)
+        for key in ('page', 'per_page', 'search', 'match', 'cursor', 'with_total'):
+            filters.pop(key, None)
         
-        result = asset_service.get_assets(asset_type, page, per_page, search, filters)
+        result = asset_service.get_assets(
+            asset_type, pagination['page'], pagination['per_page'], search, filters,
+            cursor=pagination['cursor'], with_total=pagination['with_total'], match=match
+        )
         return jsonify(result), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -90,26 +99,52 @@ def delete_asset(asset_type, asset_id):
 @bp.route('/<asset_type>/export', methods=['GET'])
 @require_admin
 def export_assets(asset_type):
-    """Export assets to Excel - Only admin"""
+    """
+    Export assets to Excel - Only admin (?async=1: background job, download from /api/jobs/<id>;
+    ?format=csv: CSV streamed straight from the query)
+    """
     from flask import send_file
-    import os
+    from services.export_service import XLSX_MIMETYPE, csv_response
     
     try:
         filters = dict(request.args)
-        file_path = asset_service.export_to_excel(asset_type, filters)
+        filters.pop('async', None)
+        export_format = filters.pop('format', 'xlsx').lower()
+        if export_format not in ('xlsx', 'csv'):
+            return jsonify({'error': f"Invalid format: {export_format}"}), 400
         
-        if os.path.exists(file_path):
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name=f"{asset_type}_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        if export_format == 'csv':
+            chunks = asset_service.export_to_csv(asset_type, filters)
+            return csv_response(chunks, f"{asset_type}_{datetime.now().strftime('%Y%m%d')}.csv")
+        
+        download_name = f"{asset_type}_{datetime.now().strftime('%Y%m%d')}.xlsx"
+        if wants_async(request):
+            if asset_type not in asset_service.model_map:
+                return jsonify({'error': f"Invalid asset type: {asset_type}"}), 400
+            job = job_service.submit(
+                'asset_export', _export_assets_job, asset_type, filters, download_name,
+                params={'asset_type': asset_type, 'filters': filters}, user_id=get_current_user().id
             )
-        else:
-            return jsonify({'error': 'File not found'}), 404
+            return job_accepted(job)
+        
+        # Temp spool with the xlsx bytes; send_file streams and closes it
+        with time_excel_job('asset_export'):
+            spool = asset_service.export_to_excel(asset_type, filters)
+        return send_file(
+            spool,
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=XLSX_MIMETYPE
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _export_assets_job(job, asset_type, filters, download_name):
+    from services.export_service import XLSX_MIMETYPE
+    
+    job.save_file(asset_service.export_to_excel(asset_type, filters), download_name, XLSX_MIMETYPE)
+    return {'asset_type': asset_type, 'filename': download_name}
+
 @bp.route('/<asset_type>/import/template', methods=['GET'])
 def download_import_template(asset_type):
     """Download Excel template for import"""
@@ -134,7 +169,7 @@ def download_import_template(asset_type):
 @bp.route('/<asset_type>/import', methods=['POST'])
 @require_admin
 def import_assets(asset_type):
-    """Import assets from Excel file - Only admin"""
+    """Import assets from Excel file - Only admin (?async=1: background job, result at /api/jobs/<id>)"""
     from werkzeug.utils import secure_filename
     import os
     
@@ -151,7 +186,7 @@ def import_assets(asset_type):
             return jsonify({'error': 'Invalid file format. Please upload Excel file (.xlsx or .xls)'}), 400
         
         # Save uploaded file
-        upload_dir = 'imports'
+        upload_dir = current_app.config.get('UPLOAD_DIR', 'imports')
         if not os.path.exists(upload_dir):
             os.makedirs(upload_dir)
         
@@ -160,8 +195,17 @@ def import_assets(asset_type):
         filepath = os.path.join(upload_dir, f"{timestamp}_{filename}")
         file.save(filepath)
         
+        if wants_async(request):
+            # The job removes the uploaded file when it is done
+            job = job_service.submit(
+                'asset_import', _import_assets_job, filepath, asset_type,
+                params={'asset_type': asset_type, 'filename': filename}, user_id=get_current_user().id
+            )
+            return job_accepted(job)
+        
         # Import data
-        result = asset_service.import_from_excel(filepath, asset_type)
+        with time_excel_job('asset_import'):
+            result = asset_service.import_from_excel(filepath, asset_type)
         
         # Clean up uploaded file
         try:
@@ -173,3 +217,17 @@ def import_assets(asset_type):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _import_assets_job(job, filepath, asset_type):
+    import os
+    
+    try:
+        result = asset_service.import_from_excel(filepath, asset_type, progress=job.progress)
+    finally:
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+    processed = result.get('success_count', 0) + result.get('skipped_count', 0)
+    job.progress(processed, errors=len(result.get('errors', [])), force=True)
+    return result
+
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import User
 from database import db
-from utils.auth import generate_token, hash_password, check_password, require_auth, require_admin, get_current_user
+from utils.auth import generate_token, hash_password, check_password, require_auth, require_admin, get_current_user, invalidate_user_cache
 from datetime import datetime
 
 bp = Blueprint('auth', __name__)
@@ -130,6 +130,8 @@ def change_password():
         user.updated_at = datetime.utcnow()
         
         db.session.commit()
+        # Drop principal cached by concurrent requests between flush and commit
+        invalidate_user_cache(user.id)
         
         return jsonify({'message': 'Đổi mật khẩu thành công'}), 200
         
@@ -0,0 +1,53 @@
+from flask import Blueprint, jsonify, send_file
+from services.job_service import JobService
+from utils.auth import require_auth, get_current_user
+import os
+
+bp = Blueprint('jobs', __name__)
+job_service = JobService()
+
+def _get_own_job(job_id):
+    """Job visible to the current user (its creator, or an admin)"""
+    job = job_service.get_job(job_id)
+    if not job:
+        return None
+    user = get_current_user()
+    if job.created_by != user.id and not user.is_admin():
+        return None
+    return job
+
+@bp.route('/<job_id>', methods=['GET'])
+@require_auth
+def get_job(job_id):
+    """Trạng thái, tiến độ và kết quả của tác vụ nền"""
+    try:
+        job = _get_own_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<job_id>/download', methods=['GET'])
+@require_auth
+def download_job_result(job_id):
+    """Tải file kết quả của tác vụ export"""
+    try:
+        job = _get_own_job(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status != 'succeeded' or not job.result_path or not os.path.exists(job.result_path):
+            return jsonify({'error': 'Job result not available'}), 404
+        return send_file(
+            job.result_path,
+            as_attachment=True,
+            download_name=job.result_filename,
+            mimetype=job.result_mimetype
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def job_accepted(job):
+    """202 response for an endpoint that queued a background job"""
+    status_url = f"/api/jobs/{job['id']}"
+    return jsonify({'job_id': job['id'], 'status': job['status'], 'status_url': status_url, 'job': job}), 202, {'Location': status_url}
@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify, send_file
 from services.report_service import ReportService
-from utils.auth import require_auth, require_admin
-import os
+from services.job_service import JobService, wants_async
+from routes.jobs import job_accepted
+from utils.auth import require_auth, require_admin, get_current_user
+from utils.metrics import time_excel_job
+from services.export_service import XLSX_MIMETYPE, csv_response
+from datetime import datetime
 
 bp = Blueprint('reports', __name__)
 report_service = ReportService()
+job_service = JobService()
 
 @bp.route('/<report_type>', methods=['GET'])
 @require_auth
@@ -21,20 +26,42 @@ def get_report(report_type):
 @bp.route('/<report_type>/export', methods=['GET'])
 @require_admin
 def export_report(report_type):
-    """Export report to Excel - Only admin"""
+    """
+    Export report to Excel - Only admin (?async=1: background job, download from /api/jobs/<id>;
+    ?format=csv: asset lists streamed as CSV)
+    """
     try:
         filters = dict(request.args)
-        file_path = report_service.export_report(report_type, filters)
+        filters.pop('async', None)
+        export_format = filters.pop('format', 'xlsx').lower()
+        if export_format not in ('xlsx', 'csv'):
+            return jsonify({'error': f"Invalid format: {export_format}"}), 400
         
-        if os.path.exists(file_path):
-            filename = os.path.basename(file_path)
-            return send_file(
-                file_path,
-                as_attachment=True,
-                download_name=filename,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        if export_format == 'csv':
+            chunks = report_service.export_report_csv(report_type, filters)
+            return csv_response(chunks, f"bao_cao_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        
+        download_name = f"bao_cao_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        if wants_async(request):
+            job = job_service.submit(
+                'report_export', _export_report_job, report_type, filters, download_name,
+                params={'report_type': report_type, 'filters': filters}, user_id=get_current_user().id
             )
-        return jsonify({'error': 'File not found'}), 404
+            return job_accepted(job)
+        
+        # Temp spool with the xlsx bytes; send_file streams and closes it
+        with time_excel_job('report_export'):
+            spool = report_service.export_report(report_type, filters)
+        return send_file(
+            spool,
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=XLSX_MIMETYPE
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _export_report_job(job, report_type, filters, download_name):
+    job.save_file(report_service.export_report(report_type, filters), download_name, XLSX_MIMETYPE)
+    return {'report_type': report_type, 'filename': download_name}
+
@@ -4,6 +4,8 @@ from database import db
 from utils.auth import require_auth, require_admin, get_current_user
 from datetime import datetime, timedelta
 from sqlalchemy import func, or_
+from utils.pagination import InvalidCursorError, get_pagination_args, paginate
+from utils.serialization import list_columns, row_to_dict
 
 bp = Blueprint('tam_giam', __name__)
 
@@ -12,16 +14,28 @@ bp = Blueprint('tam_giam', __name__)
 def get_tam_giam_list():
     """Danh sách tạm giam với search, filter, pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        pagination = get_pagination_args(request.args)
         search = request.args.get('search', '').strip()
         trang_thai = request.args.get('trang_thai_giam', '').strip()
         
-        query = TamGiam.query.filter_by(is_deleted=False)
+        # Detention columns + bị can / vụ án fields from outer joins: one query per page
+        query = (
+            db.session.query(
+                *list_columns(TamGiam),
+                BiCan.ho_ten.label('bi_can_ho_ten'),
+                BiCan.nam_sinh.label('bi_can_nam_sinh'),
+                VuAn.stt.label('vu_an_stt'),
+                VuAn.toi_danh.label('vu_an_toi_danh')
+            )
+            .select_from(TamGiam)
+            .outerjoin(BiCan, BiCan.id == TamGiam.bi_can_id)
+            .outerjoin(VuAn, VuAn.id == TamGiam.vu_an_id)
+            .filter(TamGiam.is_deleted == False)
+        )
         
         # Search
         if search:
-            query = query.join(BiCan).filter(
+            query = query.filter(
                 or_(
                     BiCan.ho_ten.ilike(f'%{search}%'),
                     VuAn.toi_danh.ilike(f'%{search}%')
@@ -32,35 +46,27 @@ def get_tam_giam_list():
         if trang_thai:
             query = query.filter(TamGiam.trang_thai_giam == trang_thai)
         
-        # Pagination
-        total = query.count()
-        items = query.order_by(TamGiam.ngay_bat_giam.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        # Pagination (keyset on ngay_bat_giam DESC, id when ?cursor= is given)
+        items, meta = paginate(query, [(TamGiam.ngay_bat_giam, True), (TamGiam.id, False)], **pagination)
         
         # Include thông tin bị can và vụ án
         result_items = []
-        for item in items:
-            item_dict = item.to_dict()
-            bi_can = BiCan.query.get(item.bi_can_id)
-            vu_an = VuAn.query.get(item.vu_an_id)
-            if bi_can:
-                item_dict['bi_can'] = {
-                    'ho_ten': bi_can.ho_ten,
-                    'nam_sinh': bi_can.nam_sinh
-                }
-            if vu_an:
-                item_dict['vu_an'] = {
-                    'stt': vu_an.stt,
-                    'toi_danh': vu_an.toi_danh
-                }
+        for row in items:
+            item_dict = row_to_dict(row)
+            bi_can = {'ho_ten': item_dict.pop('bi_can_ho_ten'), 'nam_sinh': item_dict.pop('bi_can_nam_sinh')}
+            vu_an = {'stt': item_dict.pop('vu_an_stt'), 'toi_danh': item_dict.pop('vu_an_toi_danh')}
+            if bi_can['ho_ten'] is not None:
+                item_dict['bi_can'] = bi_can
+            if vu_an['stt'] is not None:
+                item_dict['vu_an'] = vu_an
             result_items.append(item_dict)
         
         return jsonify({
             'items': result_items,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
+            **meta
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
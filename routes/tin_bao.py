@@ -1,65 +1,116 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, current_app, request, jsonify, send_file
 from models import TinBao, VuAn, LichSuChuyenDoi
 from database import db
+from utils.artifact_cache import artifact_key, get_artifact_cache
 from utils.auth import require_auth, require_admin, get_current_user
+from utils.metrics import time_excel_job
+from utils.pagination import InvalidCursorError, get_pagination_args, iter_keyset, paginate
+from utils.fts import apply_fts_search
+from services.export_service import XLSX_MIMETYPE, ExportService, csv_response
+from services.sequence_service import SequenceService
+from services.tin_bao_import_service import TinBaoImportError, TinBaoImportService
+from services.job_service import JobService, wants_async
+from routes.jobs import job_accepted
 from datetime import datetime, date
-import re
-from sqlalchemy import func, or_
+from itertools import chain
+from sqlalchemy import or_
 import pandas as pd
 import io
+import os
 import uuid
+from werkzeug.utils import secure_filename
 from openpyxl.utils import get_column_letter
-from collections import Counter
 
 bp = Blueprint('tin_bao', __name__)
+sequence_service = SequenceService()
+tin_bao_import_service = TinBaoImportService()
+job_service = JobService()
 
 @bp.route('', methods=['GET'])
 @require_auth
 def get_tin_bao_list():
     """Danh sách tin báo với search, filter, pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        pagination = get_pagination_args(request.args)
         search = request.args.get('search', '').strip()
-        trang_thai = request.args.get('trang_thai', '').strip()
-        cong_an_phu_trach = request.args.get('cong_an_phu_trach', '').strip()
+        search_mode = request.args.get('search_mode', '').strip()
         
         query = TinBao.query.filter_by(is_deleted=False)
         
-        # Search
-        if search:
-            query = query.filter(
-                or_(
-                    TinBao.dieu_luat.ilike(f'%{search}%'),
-                    TinBao.ten_nguon_tin.ilike(f'%{search}%'),
-                    TinBao.noi_xay_ra.ilike(f'%{search}%'),
-                    TinBao.noi_dung_nguon_tin.ilike(f'%{search}%')
-                )
-            )
+        # Search (search_mode=fts: FTS5 index, BM25 ranking, prefix terms)
+        fts_query = apply_fts_search(query, TinBao, search) if search and search_mode == 'fts' else None
+        if fts_query is not None:
+            if pagination['cursor'] is not None:
+                raise InvalidCursorError('search_mode=fts chỉ hỗ trợ phân trang theo page')
+            query = fts_query
+        elif search:
+            # Accent-insensitive match on the folded search_text column
+            query = TinBao.apply_search(query, search)
         
         # Filter
-        if trang_thai:
-            query = query.filter(TinBao.trang_thai == trang_thai)
-        if cong_an_phu_trach:
-            query = query.filter(TinBao.cong_an_phu_trach.ilike(f'%{cong_an_phu_trach}%'))
+        query = _filter_tin_bao(query, request.args)
         
-        # Pagination
-        total = query.count()
-        items = query.order_by(TinBao.stt.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        # Pagination (keyset on stt DESC, id when ?cursor= is given)
+        items, meta = paginate(query, [(TinBao.stt, True), (TinBao.id, False)], **pagination)
         
         return jsonify({
             'items': [item.to_dict() for item in items],
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
+            **meta
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         import traceback
         print(f"Error in get_tin_bao_list: {str(e)}")
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def _filter_tin_bao(query, args):
+    """Filters shared by the list and the register export"""
+    trang_thai = args.get('trang_thai', '').strip()
+    cong_an_phu_trach = args.get('cong_an_phu_trach', '').strip()
+    if trang_thai:
+        query = query.filter(TinBao.trang_thai == trang_thai)
+    if cong_an_phu_trach:
+        query = query.filter(TinBao.cong_an_phu_trach.ilike(f'%{cong_an_phu_trach}%'))
+    return query
+
+@bp.route('/export', methods=['GET'])
+@require_auth
+def export_tin_bao():
+    """Xuất sổ tin báo theo STT (mặc định Excel; ?format=csv: CSV stream), cùng bộ lọc với danh sách"""
+    try:
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format not in ('xlsx', 'csv'):
+            return jsonify({'error': f"Invalid format: {export_format}"}), 400
+        
+        query = TinBao.query.filter_by(is_deleted=False)
+        search = request.args.get('search', '').strip()
+        if search:
+            query = TinBao.apply_search(query, search)
+        query = _filter_tin_bao(query, request.args)
+        
+        export_service = ExportService()
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+        headers = export_service.get_register_headers('tin_bao')
+        
+        def rows():
+            # Keyset batches: batch_size rows in memory, and no lock held while the client downloads
+            for tin_bao in iter_keyset(query, [(TinBao.stt, False), (TinBao.id, False)], batch_size):
+                yield export_service.get_register_values(tin_bao.to_dict(), 'tin_bao')
+        
+        download_name = f"so_tin_bao_{datetime.now().strftime('%Y%m%d')}.{export_format}"
+        if export_format == 'csv':
+            return csv_response(export_service.stream_csv(chain([headers], rows()), batch_size), download_name)
+        
+        with time_excel_job('register_export'):
+            spool = export_service.export_rows_to_excel(
+                'Sổ tin báo', headers, rows(),
+                spool_size=current_app.config.get('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+        return send_file(spool, as_attachment=True, download_name=download_name, mimetype=XLSX_MIMETYPE)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('', methods=['POST'])
 @require_auth
 def create_tin_bao():
@@ -77,9 +128,8 @@ def create_tin_bao():
         if not data.get('noi_dung_nguon_tin') or len(data.get('noi_dung_nguon_tin', '')) < 20:
             return jsonify({'error': 'Nội dung bắt buộc, mô tả chi tiết (tối thiểu 20 ký tự)'}), 400
         
-        # Auto-generate STT
-        max_stt = db.session.query(func.max(TinBao.stt)).scalar() or 0
-        new_stt = max_stt + 1
+        # Auto-generate STT (atomic counter, no max(stt) race between concurrent requests)
+        new_stt = sequence_service.allocate_stt(TinBao)
         
         # Parse dates
         ngay_xay_ra = datetime.strptime(data['ngay_xay_ra'], '%Y-%m-%d').date() if data.get('ngay_xay_ra') else None
@@ -244,9 +294,7 @@ def chuyen_thanh_vu_an(tin_bao_id):
         current_user = get_current_user()
         
         # Auto-generate STT vụ án
-        max_stt = db.session.query(func.max(VuAn.stt)).scalar() or 0
-        new_stt = db.session.query(func.max(VuAn.stt)).scalar() or 0
-        new_stt = max_stt + 1
+        new_stt = sequence_service.allocate_stt(VuAn)
         
         # Parse dates
         ngay_chuyen = datetime.utcnow().date()
@@ -409,22 +457,26 @@ def export_template():
             ]
         ]
 
-        df = pd.DataFrame(sample_rows, columns=template_columns)
+        def build():
+            df = pd.DataFrame(sample_rows, columns=template_columns)
+
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                df.to_excel(writer, sheet_name='Tin báo', index=False)
+                worksheet = writer.sheets['Tin báo']
 
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Tin báo', index=False)
-            worksheet = writer.sheets['Tin báo']
+                for idx, col in enumerate(df.columns, 1):
+                    max_length = max(
+                        df[col].astype(str).map(len).max(),
+                        len(str(col))
+                    )
+                    col_letter = get_column_letter(idx)
+                    worksheet.column_dimensions[col_letter].width = min(max_length + 2, 55)
 
-            for idx, col in enumerate(df.columns, 1):
-                max_length = max(
-                    df[col].astype(str).map(len).max(),
-                    len(str(col))
-                )
-                col_letter = get_column_letter(idx)
-                worksheet.column_dimensions[col_letter].width = min(max_length + 2, 55)
+            output.seek(0)
+            return output
 
-        output.seek(0)
+        output = get_artifact_cache().open(artifact_key('tin_bao_template', template_columns, sample_rows), build)
 
         return send_file(
             output,
@@ -441,7 +493,7 @@ def export_template():
 @bp.route('/import', methods=['POST'])
 @require_auth
 def import_tin_bao():
-    """Import tin báo từ file Excel"""
+    """Import tin báo từ file Excel (?async=1: chạy nền, kết quả tại /api/jobs/<id>)"""
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'Không tìm thấy file'}), 400
@@ -453,238 +505,26 @@ def import_tin_bao():
         if not file.filename.endswith(('.xlsx', '.xls')):
             return jsonify({'error': 'File phải là định dạng Excel (.xlsx hoặc .xls)'}), 400
         
-        # Đọc file Excel
-        df = pd.read_excel(file, sheet_name=0)
-        
-        # Validate columns (theo đúng header file thực tế)
-        required_columns = ['Điều luật', 'Ngày xảy ra', 'Nơi xảy ra', 'Nội dung nguồn tin']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({
-                'error': f'Thiếu các cột bắt buộc: {", ".join(missing_columns)}'
-            }), 400
-
-        # Pre-validate STT trong file để tránh trùng với dữ liệu hiện có
-        stt_map_by_row = {}
-        provided_stts = []
-        stt_errors = []
-        if 'STT' in df.columns:
-            for index, row in df.iterrows():
-                stt_raw = row.get('STT')
-                if pd.notna(stt_raw) and str(stt_raw).strip() != '':
-                    try:
-                        stt_int = int(float(stt_raw))
-                        stt_map_by_row[index] = stt_int
-                        provided_stts.append(stt_int)
-                    except ValueError:
-                        row_number = index + 2
-                        stt_errors.append(f"Dòng {row_number}: STT phải là số nguyên")
-
-        if stt_errors:
-            return jsonify({'error': 'STT không hợp lệ trong file import', 'details': stt_errors}), 400
-
-        duplicate_stts = [value for value, count in Counter(provided_stts).items() if count > 1]
-        if duplicate_stts:
-            duplicate_stts.sort()
-            return jsonify({
-                'error': 'Trùng STT ngay trong file import',
-                'conflict_stt': duplicate_stts,
-                'message': 'Mỗi tin báo phải có STT duy nhất. Vui lòng chỉnh sửa file trước khi import.'
-            }), 400
-
-        if provided_stts:
-            existing_conflicts = (
-                TinBao.query
-                .filter(TinBao.is_deleted == False, TinBao.stt.in_(provided_stts))
-                .with_entities(TinBao.stt)
-                .all()
+        if wants_async(request):
+            # Lưu file upload; tác vụ nền xóa file khi xong
+            upload_dir = current_app.config.get('UPLOAD_DIR', 'imports')
+            os.makedirs(upload_dir, exist_ok=True)
+            filename = secure_filename(file.filename)
+            filepath = os.path.join(upload_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}_{filename}")
+            file.save(filepath)
+            job = job_service.submit(
+                'tin_bao_import', _import_tin_bao_job, filepath,
+                params={'filename': filename}, user_id=get_current_user().id
             )
-            if existing_conflicts:
-                conflict_values = sorted({stt for (stt,) in existing_conflicts})
-                return jsonify({
-                    'error': 'STT đã tồn tại trong hệ thống',
-                    'conflict_stt': conflict_values,
-                    'message': 'Vui lòng xóa các tin báo có STT này trong hệ thống trước khi import file Excel mới.'
-                }), 400
-
-        # Dọn sạch các bản ghi đã bị soft-delete để tránh chiếm STT
-        TinBao.query.filter_by(is_deleted=True).delete(synchronize_session=False)
-
-        def parse_date_field(raw_value, label, row_number, allow_empty=False):
-            if allow_empty and (pd.isna(raw_value) or str(raw_value).strip() == ''):
-                return None
-
-            if raw_value is None or (isinstance(raw_value, float) and pd.isna(raw_value)):
-                if allow_empty:
-                    return None
-                raise ValueError(f"Dòng {row_number}: {label} bắt buộc")
-
-            if isinstance(raw_value, datetime):
-                return raw_value.date()
-            if isinstance(raw_value, date):
-                return raw_value
-            if isinstance(raw_value, pd.Timestamp):
-                return raw_value.date()
-
-            # Excel serial numbers
-            if isinstance(raw_value, (int, float)):
-                try:
-                    return (pd.to_datetime('1899-12-30') + pd.to_timedelta(raw_value, unit='D')).date()
-                except Exception:
-                    raise ValueError(f"Dòng {row_number}: {label} không hợp lệ (giá trị số)")
-
-            text = str(raw_value).strip()
-            if text == '':
-                if allow_empty:
-                    return None
-                raise ValueError(f"Dòng {row_number}: {label} bắt buộc")
-
-            allowed_formats = [
-                '%Y-%m-%d',
-                '%d/%m/%Y',
-                '%d-%m-%Y',
-                '%d.%m.%Y',
-                '%Y/%m/%d',
-                '%d %m %Y'
-            ]
-            for fmt in allowed_formats:
-                try:
-                    return datetime.strptime(text, fmt).date()
-                except ValueError:
-                    continue
-
-            try:
-                return pd.to_datetime(text, dayfirst=True).date()
-            except Exception:
-                raise ValueError(f"Dòng {row_number}: {label} không hợp lệ (hỗ trợ các định dạng YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY)")
-
-        max_stt = db.session.query(func.max(TinBao.stt)).scalar() or 0
-        success_count = 0
-        error_count = 0
-        errors = []
-
-        def parse_int_field(raw_value):
-            if pd.isna(raw_value) or str(raw_value).strip() == '':
-                return 0
-            try:
-                return int(float(raw_value))
-            except (ValueError, TypeError):
-                text = str(raw_value)
-                digits = re.findall(r'\d+', text)
-                if digits:
-                    return int(digits[0])
-                return 0
-
-        for index, row in df.iterrows():
-            row_number = index + 2  # header = row 1
-            try:
-                provided_stt = stt_map_by_row.get(index)
-                if provided_stt is not None:
-                    stt_value = provided_stt
-                    if provided_stt > max_stt:
-                        max_stt = provided_stt
-                else:
-                    max_stt += 1
-                    stt_value = max_stt
-
-                dieu_luat = str(row.get('Điều luật', '')).strip()
-                noi_xay_ra = str(row.get('Nơi xảy ra', '')).strip()
-                noi_dung = str(row.get('Nội dung nguồn tin', '')).strip()
-
-                if not dieu_luat or len(dieu_luat) < 2:
-                    errors.append(f"Dòng {row_number}: Điều luật bắt buộc, tối thiểu 2 ký tự")
-                    error_count += 1
-                    continue
-
-                if not noi_xay_ra or len(noi_xay_ra) < 5:
-                    errors.append(f"Dòng {row_number}: Nơi xảy ra bắt buộc, tối thiểu 5 ký tự")
-                    error_count += 1
-                    continue
-
-                if not noi_dung or len(noi_dung) < 20:
-                    errors.append(f"Dòng {row_number}: Nội dung nguồn tin bắt buộc, tối thiểu 20 ký tự")
-                    error_count += 1
-                    continue
-
-                try:
-                    ngay_xay_ra = parse_date_field(row.get('Ngày xảy ra'), 'Ngày xảy ra', row_number)
-                except ValueError as e:
-                    errors.append(str(e))
-                    error_count += 1
-                    continue
-
-                try:
-                    ngay_phan_cong = parse_date_field(row.get('Ngày phân công'), 'Ngày phân công', row_number, allow_empty=True)
-                except ValueError as e:
-                    errors.append(str(e))
-                    error_count += 1
-                    continue
-
-                try:
-                    ngay_het_han = parse_date_field(row.get('Ngày hết hạn'), 'Ngày hết hạn', row_number, allow_empty=True)
-                except ValueError as e:
-                    errors.append(str(e))
-                    error_count += 1
-                    continue
-
-                gia_han_value = parse_int_field(row.get('Gia hạn'))
-
-                trang_thai_from_file = str(row.get('Kết quả giải quyết (Khởi tố, Không KT, TĐC, chuyển)', '')).strip() if pd.notna(row.get('Kết quả giải quyết (Khởi tố, Không KT, TĐC, chuyển)')) else ''
-
-                extra_notes = []
-                so_qd_text = str(row.get('Số QĐ', '')).strip() if pd.notna(row.get('Số QĐ')) else ''
-                if so_qd_text:
-                    extra_notes.append(f"Số QĐ: {so_qd_text}")
-                ngay_ra_qd_text = str(row.get('Ngày ra QĐ', '')).strip() if pd.notna(row.get('Ngày ra QĐ')) else ''
-                if ngay_ra_qd_text:
-                    extra_notes.append(f"Ngày ra QĐ: {ngay_ra_qd_text}")
-                can_bo_quan_ly = str(row.get('Cán bộ quản lý hồ sơ', '')).strip() if pd.notna(row.get('Cán bộ quản lý hồ sơ')) else ''
-                if can_bo_quan_ly:
-                    extra_notes.append(f"Cán bộ quản lý hồ sơ: {can_bo_quan_ly}")
-                ghi_chu_raw = str(row.get('Ghi chú', '')).strip() if pd.notna(row.get('Ghi chú')) else ''
-                if ghi_chu_raw:
-                    extra_notes.append(ghi_chu_raw)
-
-                tin_bao = TinBao(
-                    stt=stt_value,
-                    dieu_luat=dieu_luat,
-                    ten_nguon_tin=str(row.get('Tên nguồn tin', '')).strip() if pd.notna(row.get('Tên nguồn tin')) else None,
-                    ngay_xay_ra=ngay_xay_ra,
-                    noi_xay_ra=noi_xay_ra,
-                    noi_dung_nguon_tin=noi_dung,
-                    so_qd_phan_cong_ptt=str(row.get('Số QĐ phân công PTT/Trưởng CAX ủy quyền', '')).strip() if pd.notna(row.get('Số QĐ phân công PTT/Trưởng CAX ủy quyền')) else None,
-                    so_qd_phan_cong_dtv=str(row.get('Số QĐ phân công ĐTV', '')).strip() if pd.notna(row.get('Số QĐ phân công ĐTV')) else None,
-                    ngay_phan_cong=ngay_phan_cong,
-                    ket_qua_giai_quyet=trang_thai_from_file if trang_thai_from_file else None,
-                    dia_chi_bi_hai=None,
-                    thong_tin_doi_tuong=str(row.get('Bị can (đối với vụ khởi tố)', '')).strip() if pd.notna(row.get('Bị can (đối với vụ khởi tố)')) else None,
-                    cong_an_phu_trach=str(row.get('Điều tra viên', '')).strip() if pd.notna(row.get('Điều tra viên')) else None,
-                    don_vi=str(row.get('Đơn vị', 'CAX Phước Thái')).strip() if pd.notna(row.get('Đơn vị')) else 'CAX Phước Thái',
-                    kiem_sat_vien=str(row.get('Kiểm sát viên', '')).strip() if pd.notna(row.get('Kiểm sát viên')) else None,
-                    gia_han=gia_han_value,
-                    ngay_het_han=ngay_het_han,
-                    tinh_trang_ho_so=str(row.get('Tình trạng hồ sơ', '')).strip() if pd.notna(row.get('Tình trạng hồ sơ')) else None,
-                    ghi_chu=' | '.join(extra_notes) if extra_notes else None,
-                    trang_thai=trang_thai_from_file if trang_thai_from_file else 'Tiếp nhận'
-                )
-
-                db.session.add(tin_bao)
-                success_count += 1
-
-            except Exception as e:
-                errors.append(f"Dòng {row_number}: {str(e)}")
-                error_count += 1
-                continue
-        
-        db.session.commit()
+            return job_accepted(job)
         
-        return jsonify({
-            'message': f'Import thành công {success_count} tin báo',
-            'success_count': success_count,
-            'error_count': error_count,
-            'errors': errors[:10]  # Chỉ trả về 10 lỗi đầu tiên
-        }), 200
+        with time_excel_job('tin_bao_import'):
+            result = tin_bao_import_service.import_from_excel(file)
+        return jsonify(result), 200
         
+    except TinBaoImportError as e:
+        db.session.rollback()
+        return jsonify(e.payload), 400
     except Exception as e:
         db.session.rollback()
         import traceback
@@ -692,3 +532,14 @@ def import_tin_bao():
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def _import_tin_bao_job(job, filepath):
+    try:
+        result = tin_bao_import_service.import_from_excel(filepath, progress=job.progress)
+    finally:
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+    job.progress(result['success_count'] + result['error_count'], errors=result['error_count'], force=True)
+    return result
+
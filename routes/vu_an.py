@@ -1,73 +1,128 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, send_file
 from models import VuAn, BiCan, TamGiam, TinBao
 from database import db
 from utils.auth import require_auth, require_admin, get_current_user
 from datetime import datetime, timedelta
-from sqlalchemy import func, or_
+import hashlib
+from itertools import chain
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import selectinload
+from utils.pagination import InvalidCursorError, get_pagination_args, iter_keyset, paginate
+from utils.fts import apply_fts_search
+from utils.metrics import time_excel_job
+from utils.serialization import list_columns, row_to_dict
+from services.export_service import XLSX_MIMETYPE, ExportService, csv_response
+from services.sequence_service import SequenceService
 
 bp = Blueprint('vu_an', __name__)
+sequence_service = SequenceService()
 
 @bp.route('', methods=['GET'])
 @require_auth
 def get_vu_an_list():
     """Danh sách vụ án với search, filter, pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        pagination = get_pagination_args(request.args)
         search = request.args.get('search', '').strip()
-        trang_thai = request.args.get('trang_thai', '').strip()
-        bien_phap = request.args.get('bien_phap_ngan_chan', '').strip()
-        dieu_tra_vien = request.args.get('dieu_tra_vien', '').strip()
+        search_mode = request.args.get('search_mode', '').strip()
         
-        query = VuAn.query.filter_by(is_deleted=False)
+        # Column tuples + tin_bao.stt from an outer join: one query per page
+        query = _vu_an_rows_query()
         
-        # Search
-        if search:
-            query = query.filter(
-                or_(
-                    VuAn.toi_danh.ilike(f'%{search}%'),
-                    VuAn.dieu_luat.ilike(f'%{search}%'),
-                    VuAn.noi_xay_ra.ilike(f'%{search}%'),
-                    VuAn.thong_tin_vu_an.ilike(f'%{search}%'),
-                    VuAn.so_khoi_to_vu_an.ilike(f'%{search}%')
-                )
-            )
+        # Search (search_mode=fts: FTS5 index, BM25 ranking, prefix terms)
+        fts_query = apply_fts_search(query, VuAn, search) if search and search_mode == 'fts' else None
+        if fts_query is not None:
+            if pagination['cursor'] is not None:
+                raise InvalidCursorError('search_mode=fts chỉ hỗ trợ phân trang theo page')
+            query = fts_query
+        elif search:
+            # Accent-insensitive match on the folded search_text column
+            query = VuAn.apply_search(query, search)
         
         # Filter
-        if trang_thai:
-            query = query.filter(VuAn.trang_thai == trang_thai)
-        if bien_phap:
-            query = query.filter(VuAn.bien_phap_ngan_chan == bien_phap)
-        if dieu_tra_vien:
-            query = query.filter(VuAn.dieu_tra_vien.ilike(f'%{dieu_tra_vien}%'))
+        query = _filter_vu_an(query, request.args)
         
-        # Pagination
-        total = query.count()
-        items = query.order_by(VuAn.stt.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        # Pagination (keyset on stt DESC, id when ?cursor= is given)
+        items, meta = paginate(query, [(VuAn.stt, True), (VuAn.id, False)], **pagination)
         
         # Include tin_bao info if exists
         result_items = []
-        for item in items:
-            item_dict = item.to_dict()
-            if item.tin_bao_id:
-                tin_bao = TinBao.query.get(item.tin_bao_id)
-                if tin_bao:
-                    item_dict['tin_bao_stt'] = tin_bao.stt
+        for row in items:
+            item_dict = row_to_dict(row)
+            if item_dict['tin_bao_stt'] is None:
+                del item_dict['tin_bao_stt']
             result_items.append(item_dict)
         
         return jsonify({
             'items': result_items,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (total + per_page - 1) // per_page
+            **meta
         }), 200
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         import traceback
         print(f"Error in get_vu_an_list: {str(e)}")
         print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+def _vu_an_rows_query():
+    """Vụ án column tuples with tin_bao_stt (outer join), not deleted"""
+    return (
+        db.session.query(*list_columns(VuAn), TinBao.stt.label('tin_bao_stt'))
+        .select_from(VuAn)
+        .outerjoin(TinBao, TinBao.id == VuAn.tin_bao_id)
+        .filter(VuAn.is_deleted == False)
+    )
+
+def _filter_vu_an(query, args):
+    """Filters shared by the list and the register export"""
+    trang_thai = args.get('trang_thai', '').strip()
+    bien_phap = args.get('bien_phap_ngan_chan', '').strip()
+    dieu_tra_vien = args.get('dieu_tra_vien', '').strip()
+    if trang_thai:
+        query = query.filter(VuAn.trang_thai == trang_thai)
+    if bien_phap:
+        query = query.filter(VuAn.bien_phap_ngan_chan == bien_phap)
+    if dieu_tra_vien:
+        query = query.filter(VuAn.dieu_tra_vien.ilike(f'%{dieu_tra_vien}%'))
+    return query
+
+@bp.route('/export', methods=['GET'])
+@require_auth
+def export_vu_an():
+    """Xuất sổ vụ án theo STT (mặc định Excel; ?format=csv: CSV stream), cùng bộ lọc với danh sách"""
+    try:
+        export_format = request.args.get('format', 'xlsx').lower()
+        if export_format not in ('xlsx', 'csv'):
+            return jsonify({'error': f"Invalid format: {export_format}"}), 400
+        
+        query = _vu_an_rows_query()
+        search = request.args.get('search', '').strip()
+        if search:
+            query = VuAn.apply_search(query, search)
+        query = _filter_vu_an(query, request.args)
+        
+        export_service = ExportService()
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+        headers = export_service.get_register_headers('vu_an')
+        
+        def rows():
+            # Column tuples in keyset batches: no ORM objects, and no lock held while the client downloads
+            for row in iter_keyset(query, [(VuAn.stt, False), (VuAn.id, False)], batch_size):
+                yield export_service.get_register_values(row_to_dict(row), 'vu_an')
+        
+        download_name = f"so_vu_an_{datetime.now().strftime('%Y%m%d')}.{export_format}"
+        if export_format == 'csv':
+            return csv_response(export_service.stream_csv(chain([headers], rows()), batch_size), download_name)
+        
+        with time_excel_job('register_export'):
+            spool = export_service.export_rows_to_excel(
+                'Sổ vụ án', headers, rows(),
+                spool_size=current_app.config.get('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+        return send_file(spool, as_attachment=True, download_name=download_name, mimetype=XLSX_MIMETYPE)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('', methods=['POST'])
 @require_auth
 def create_vu_an():
@@ -89,9 +144,8 @@ def create_vu_an():
         if not data.get('dieu_tra_vien'):
             return jsonify({'error': 'Điều tra viên bắt buộc nhập'}), 400
         
-        # Auto-generate STT
-        max_stt = db.session.query(func.max(VuAn.stt)).scalar() or 0
-        new_stt = max_stt + 1
+        # Auto-generate STT (atomic counter, no max(stt) race between concurrent requests)
+        new_stt = sequence_service.allocate_stt(VuAn)
         
         # Parse dates
         ngay_xay_ra = datetime.strptime(data['ngay_xay_ra'], '%Y-%m-%d').date() if data.get('ngay_xay_ra') else None
@@ -143,36 +197,73 @@ def create_vu_an():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _detail_etag(vu_an_id):
+    """
+    ETag of the vụ án detail view, from one aggregate query over the case, its
+    tin báo and its bị can / tạm giam rows: the latest updated_at catches edits
+    and soft deletes, the row counts catch hard deletes. None if the case is gone.
+    """
+    children = []
+    for model_class in (BiCan, TamGiam):
+        children.append(
+            select(func.max(model_class.updated_at)).where(model_class.vu_an_id == vu_an_id).scalar_subquery())
+        children.append(
+            select(func.count(model_class.id)).where(model_class.vu_an_id == vu_an_id).scalar_subquery())
+    tin_bao_updated = select(TinBao.updated_at).where(TinBao.id == VuAn.tin_bao_id).scalar_subquery()
+
+    row = db.session.execute(
+        select(VuAn.updated_at, tin_bao_updated, *children)
+        .where(VuAn.id == vu_an_id, VuAn.is_deleted == False)
+    ).first()
+    if row is None:
+        return None
+    return hashlib.sha1(f'{vu_an_id}:{tuple(row)}'.encode('utf-8')).hexdigest()
+
 @bp.route('/<vu_an_id>', methods=['GET'])
 @require_auth
 def get_vu_an_detail(vu_an_id):
     """Chi tiết vụ án kèm danh sách bị can"""
     try:
-        vu_an = VuAn.query.filter_by(id=vu_an_id, is_deleted=False).first()
+        etag = _detail_etag(vu_an_id)
+        if etag is None:
+            return jsonify({'error': 'Vụ án không tồn tại'}), 404
+        
+        # Unchanged since the client's copy: skip loading and serializing
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        # Case + tin báo + bị can + tạm giam in a fixed number of statements
+        vu_an = VuAn.query.options(
+            selectinload(VuAn.tin_bao),
+            selectinload(VuAn.bi_can_list.and_(BiCan.is_deleted == False)),
+            selectinload(VuAn.tam_giam_list.and_(TamGiam.is_deleted == False))
+        ).filter_by(id=vu_an_id, is_deleted=False).first()
         if not vu_an:
             return jsonify({'error': 'Vụ án không tồn tại'}), 404
         
         result = vu_an.to_dict()
         
         # Thêm thông tin tin báo nếu có
-        if vu_an.tin_bao_id:
-            tin_bao = TinBao.query.get(vu_an.tin_bao_id)
-            if tin_bao:
-                result['tin_bao'] = {
-                    'id': tin_bao.id,
-                    'stt': tin_bao.stt,
-                    'dieu_luat': tin_bao.dieu_luat
-                }
+        if vu_an.tin_bao:
+            result['tin_bao'] = {
+                'id': vu_an.tin_bao.id,
+                'stt': vu_an.tin_bao.stt,
+                'dieu_luat': vu_an.tin_bao.dieu_luat
+            }
         
         # Thêm danh sách bị can
-        bi_can_list = BiCan.query.filter_by(vu_an_id=vu_an_id, is_deleted=False).all()
-        result['bi_can_list'] = [bc.to_dict() for bc in bi_can_list]
+        result['bi_can_list'] = [bc.to_dict() for bc in vu_an.bi_can_list]
         
         # Thêm danh sách tạm giam
-        tam_giam_list = TamGiam.query.filter_by(vu_an_id=vu_an_id, is_deleted=False).all()
-        result['tam_giam_list'] = [tg.to_dict() for tg in tam_giam_list]
+        result['tam_giam_list'] = [tg.to_dict() for tg in vu_an.tam_giam_list]
         
-        return jsonify(result), 200
+        response = jsonify(result)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response, 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
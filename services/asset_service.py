@@ -6,9 +6,39 @@ from models import (
     DanhSachThietBiVanPhongDoanhTrai,
     DanhSachTrangThietBiThuy
 )
+from services.fuzzy_search_service import FuzzySearchService
+from services.sequence_service import SequenceService
+from services.stats_service import AssetStatsService
+from utils.artifact_cache import artifact_key, data_version, get_artifact_cache
 from utils.date_utils import calculate_next_inspection_date, generate_asset_code
+from utils.metrics import EXCEL_IMPORT_ROWS
+from utils.pagination import InvalidCursorError, iter_keyset, paginate
 from datetime import datetime
-from sqlalchemy import or_, and_
+import uuid
+from sqlalchemy import or_, and_, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+# Prefix of auto-generated mã tài sản per asset type (BR-001)
+ASSET_CODE_PREFIXES = {
+    'weapons': 'VK',
+    'vehicles': 'PT',
+    'technical': 'TB',
+    'office': 'VP',
+    'water': 'TT'
+}
+
+# Columns filled by the bulk import itself rather than taken from the sheet
+_BULK_MANAGED_COLUMNS = ('id', 'created_at', 'updated_at', 'is_deleted', 'search_text')
+
+def _begin_transaction():
+    """
+    Open the session's transaction now. pysqlite only sends BEGIN before DML, so a
+    SAVEPOINT issued first would start a transaction of its own and its RELEASE would
+    commit; inside an explicit BEGIN the savepoints nest and commit/rollback cover them.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite' and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN')
 
 class AssetService:
     def __init__(self):
@@ -20,9 +50,13 @@ class AssetService:
             'office': DanhSachThietBiVanPhongDoanhTrai,
             'water': DanhSachTrangThietBiThuy
         }
+        self.stats_service = AssetStatsService()
+        self.fuzzy_search = FuzzySearchService()
+        self.sequence_service = SequenceService()
     
-    def get_assets(self, asset_type, page=1, per_page=20, search='', filters=None):
-        """Get paginated list of assets"""
+    def get_assets(self, asset_type, page=1, per_page=20, search='', filters=None, cursor=None, with_total=True,
+                   match=None):
+        """Get paginated list of assets (offset pages, or keyset pages on (created_at, id) when cursor is given)"""
         model_class = self.model_map.get(asset_type)
         if not model_class:
             raise ValueError(f"Invalid asset type: {asset_type}")
@@ -30,56 +64,60 @@ class AssetService:
         # Base query
         query = model_class.query.filter_by(is_deleted=False)
         
-        # Apply search
-        if search:
-            search_pattern = f'%{search}%'
-            if asset_type == 'weapons':
-                query = query.filter(
-                    or_(
-                        DanhSachVuKhiCongCuHoTro.ma_tai_san.like(search_pattern),
-                        DanhSachVuKhiCongCuHoTro.ten_tai_san.like(search_pattern),
-                        DanhSachVuKhiCongCuHoTro.so_hieu.like(search_pattern)
-                    )
-                )
-            elif asset_type == 'vehicles':
-                query = query.filter(
-                    or_(
-                        DanhSachPhuongTien.ma_tai_san.like(search_pattern),
-                        DanhSachPhuongTien.ten_phuong_tien.like(search_pattern),
-                        DanhSachPhuongTien.bien_so_ky_hieu.like(search_pattern)
-                    )
-                )
-            elif asset_type == 'water':
-                query = query.filter(
-                    or_(
-                        DanhSachTrangThietBiThuy.ma_tai_san.like(search_pattern),
-                        DanhSachTrangThietBiThuy.ten_trang_bi.like(search_pattern),
-                        DanhSachTrangThietBiThuy.ma_hieu.like(search_pattern)
-                    )
-                )
-            else:
-                query = query.filter(
-                    or_(
-                        model_class.ma_tai_san.like(search_pattern),
-                        model_class.ten_tai_san.like(search_pattern)
-                    )
-                )
-        
         # Apply filters
         if filters:
             for key, value in filters.items():
                 if value and hasattr(model_class, key):
                     query = query.filter(getattr(model_class, key) == value)
         
-        # Get total count
-        total = query.count()
+        if search and match == 'fuzzy':
+            if cursor is not None:
+                raise InvalidCursorError('Cursor không dùng được với match=fuzzy')
+            return self._get_fuzzy_page(asset_type, query, search, page, per_page)
+        
+        # Apply search (accent-insensitive, on the folded search_text column)
+        if search:
+            query = model_class.apply_search(query, search)
         
         # Pagination
-        offset = (page - 1) * per_page
-        items = query.offset(offset).limit(per_page).all()
+        items, meta = paginate(
+            query,
+            [(model_class.created_at, False), (model_class.id, False)],
+            page=page,
+            per_page=per_page,
+            cursor=cursor,
+            with_total=with_total
+        )
         
         return {
             'data': [item.to_dict() for item in items],
+            **meta
+        }
+    
+    def _get_fuzzy_page(self, asset_type, query, search, page, per_page):
+        """Page of assets ranked by trigram similarity of their codes/plates/serials to `search`"""
+        model_class = self.model_map[asset_type]
+        per_page = max(per_page, 1)
+        ranked = self.fuzzy_search.search(asset_type, search)
+        if not ranked:
+            return {'data': [], 'total': 0, 'page': page, 'per_page': per_page, 'total_pages': 0}
+        
+        # Ranked ids come from the index; the query applies the remaining filters
+        scores = dict(ranked)
+        rank = {asset_id: position for position, (asset_id, _) in enumerate(ranked)}
+        items = query.filter(model_class.id.in_(list(scores))).all()
+        items.sort(key=lambda item: rank[item.id])
+        total = len(items)
+        start = (max(page, 1) - 1) * per_page
+        
+        data = []
+        for item in items[start:start + per_page]:
+            item_dict = item.to_dict()
+            item_dict['match_score'] = scores[item.id]
+            data.append(item_dict)
+        
+        return {
+            'data': data,
             'total': total,
             'page': page,
             'per_page': per_page,
@@ -103,14 +141,7 @@ class AssetService:
         
         # Auto-generate mã tài sản if not provided
         if not data.get('ma_tai_san'):
-            prefix_map = {
-                'weapons': 'VK',
-                'vehicles': 'PT',
-                'technical': 'TB',
-                'office': 'VP',
-                'water': 'TT'
-            }
-            prefix = prefix_map.get(asset_type, 'TS')
+            prefix = ASSET_CODE_PREFIXES.get(asset_type, 'TS')
             data['ma_tai_san'] = self._generate_asset_code(prefix, model_class)
         
         # Auto-calculate ngay_kiem_tra_tiep_theo if needed
@@ -140,6 +171,7 @@ class AssetService:
         # Create new asset
         asset = model_class(**data)
         db.session.add(asset)
+        self.stats_service.record_change(asset_type, self.stats_service.snapshot(None), self.stats_service.snapshot(asset))
         db.session.commit()
         
         return asset.to_dict()
@@ -184,11 +216,13 @@ class AssetService:
                 data[key] = datetime.fromisoformat(data[key]).date()
         
         # Update fields
+        before = self.stats_service.snapshot(asset)
         for key, value in data.items():
             if hasattr(asset, key):
                 setattr(asset, key, value)
         
         asset.updated_at = datetime.utcnow()
+        self.stats_service.record_change(asset_type, before, self.stats_service.snapshot(asset))
         db.session.commit()
         
         return asset.to_dict()
@@ -203,43 +237,105 @@ class AssetService:
         if not asset:
             return None
         
+        before = self.stats_service.snapshot(asset)
         asset.is_deleted = True
         asset.updated_at = datetime.utcnow()
+        self.stats_service.record_change(asset_type, before, self.stats_service.snapshot(asset))
         db.session.commit()
         
         return asset.to_dict()
     
     def _generate_asset_code(self, prefix, model_class):
         """Generate unique asset code"""
+        return self._allocate_asset_codes(prefix, model_class, 1)[0]
+    
+    def _allocate_asset_codes(self, prefix, model_class, count, reserved=()):
+        """
+        `count` unused codes [Prefix][YY][MM][XXX] for this month, skipping `reserved`.
+        Taken from the per-(prefix, month) counter in one UPDATE, so the cost does not
+        grow with the number of assets; the sequence goes past 999 (VK26101000).
+        """
         now = datetime.now()
         yy = str(now.year)[-2:]
         mm = str(now.month).zfill(2)
         search_pattern = f"{prefix}{yy}{mm}"
         
-        # Get existing codes for this month
-        existing = model_class.query.filter(
-            model_class.ma_tai_san.like(f'{search_pattern}%')
-        ).all()
+        if not self.sequence_service.available():
+            # sequence_counters not migrated yet: scan this month's codes
+            codes = []
+            seq = self._max_code_sequence(search_pattern, model_class)
+            while len(codes) < count:
+                seq += 1
+                code = f"{search_pattern}{str(seq).zfill(3)}"
+                if code not in reserved:
+                    codes.append(code)
+            return codes
+        
+        codes = []
+        while len(codes) < count:
+            needed = count - len(codes)
+            first = self.sequence_service.allocate(
+                f'ma_tai_san:{search_pattern}', needed,
+                seed=lambda: self._max_code_sequence(search_pattern, model_class)
+            )
+            block = [f"{search_pattern}{str(seq).zfill(3)}" for seq in range(first, first + needed)]
+            
+            # Codes typed in by hand can collide with the counter: skip those
+            used = set(db.session.execute(
+                select(model_class.ma_tai_san).where(model_class.ma_tai_san.in_(block))
+            ).scalars())
+            codes.extend(code for code in block if code not in used and code not in reserved)
+        return codes
+    
+    def _max_code_sequence(self, search_pattern, model_class):
+        """Highest numeric suffix among existing codes starting with `search_pattern`"""
+        existing = db.session.execute(
+            select(model_class.ma_tai_san).where(model_class.ma_tai_san.like(f'{search_pattern}%'))
+        ).scalars()
         
-        # Find highest sequence number
         max_seq = 0
-        for item in existing:
-            ma_tai_san = item.ma_tai_san
-            if ma_tai_san.startswith(search_pattern):
-                try:
-                    seq = int(ma_tai_san[-3:])
-                    max_seq = max(max_seq, seq)
-                except ValueError:
-                    pass
-        
-        # Generate next sequence
-        next_seq = max_seq + 1
-        return f"{search_pattern}{str(next_seq).zfill(3)}"
+        for ma_tai_san in existing:
+            suffix = ma_tai_san[len(search_pattern):]
+            if suffix.isdigit():
+                max_seq = max(max_seq, int(suffix))
+        return max_seq
     
     def export_to_excel(self, asset_type, filters=None):
-        """Export assets to Excel"""
+        """Export assets to Excel; returns a rewound file with the xlsx bytes"""
+        from flask import current_app
+        from services.export_service import ExportService
+        
+        model_class, assets = self._export_rows(asset_type, filters)
+        
+        def build():
+            export_service = ExportService()
+            return export_service.export_assets_to_excel(
+                assets(), asset_type, filters,
+                spool_size=current_app.config.get('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+        
+        # Unchanged table + same filters -> the file built last time
+        key = artifact_key('asset_export', asset_type, filters, data_version(model_class))
+        return get_artifact_cache().open(key, build)
+    
+    def export_to_csv(self, asset_type, filters=None):
+        """Export assets as CSV; returns a generator of UTF-8 chunks that runs the query as it is consumed"""
+        from flask import current_app
         from services.export_service import ExportService
         
+        export_service = ExportService()
+        _, assets = self._export_rows(asset_type, filters)
+        
+        def rows():
+            yield export_service.get_headers(asset_type)
+            for asset in assets():
+                yield export_service.get_asset_values(asset, asset_type)
+        
+        return export_service.stream_csv(rows(), current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+    
+    def _export_rows(self, asset_type, filters=None):
+        """(model class, function returning a generator of asset dicts) for an export"""
+        from flask import current_app
+        
         # Get all assets (no pagination for export)
         model_class = self.model_map.get(asset_type)
         if not model_class:
@@ -253,25 +349,28 @@ class AssetService:
                 if value and hasattr(model_class, key):
                     query = query.filter(getattr(model_class, key) == value)
         
-        assets = query.all()
-        assets_dict = [asset.to_dict() for asset in assets]
-        
-        # Export to Excel
-        export_service = ExportService()
-        filepath = export_service.export_assets_to_excel(assets_dict, asset_type, filters)
+        def assets():
+            # Keyset batches instead of loading them all; no cursor stays open between batches
+            rows = iter_keyset(query, [(model_class.created_at, False), (model_class.id, False)],
+                               current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+            return (asset.to_dict() for asset in rows)
         
-        return filepath
+        return model_class, assets
     
-    def import_from_excel(self, filepath, asset_type):
-        """Import assets from Excel file"""
+    def import_from_excel(self, filepath, asset_type, progress=None):
+        """
+        Import assets from Excel file, inserted in chunks (one transaction per chunk).
+        progress(rows_processed, errors=...) is called after each chunk (background jobs).
+        """
+        from flask import current_app
         from services.import_service import ImportService
-        from utils.validation import validate_asset_data
-        from database import db
         
         import_service = ImportService()
         errors = []
         success_count = 0
         skipped_count = 0
+        read_stats = {}
+        chunk_size = max(current_app.config.get('IMPORT_CHUNK_SIZE', 500), 1)
         
         # Get model class
         model_class = self.model_map.get(asset_type)
@@ -281,8 +380,9 @@ class AssetService:
         # Process rows from Excel
         row_num = 2  # Start from row 2 (after header)
         header_errors = []
+        chunk = []
         
-        for item in import_service.import_from_excel(filepath, asset_type):
+        for item in import_service.import_from_excel(filepath, asset_type, stats=read_stats):
             # Check if this is an error result
             if isinstance(item, dict) and 'success' in item:
                 if not item.get('success'):
@@ -293,41 +393,144 @@ class AssetService:
             
             # This is a row data
             row_num += 1
-            row_data = item
-            
-            try:
-                # Validate data
-                validation_error = validate_asset_data(asset_type, row_data)
-                if validation_error:
-                    errors.append(f"Dòng {row_num}: {validation_error}")
-                    skipped_count += 1
-                    continue
-                
-                # Generate ma_tai_san if not provided
-                if not row_data.get('ma_tai_san'):
-                    row_data['ma_tai_san'] = self._generate_ma_tai_san(asset_type)
-                
-                # Create asset
-                asset = model_class(**row_data)
-                db.session.add(asset)
-                db.session.commit()
-                success_count += 1
-                
-            except Exception as e:
-                db.session.rollback()
-                errors.append(f"Dòng {row_num}: Lỗi khi tạo tài sản - {str(e)}")
-                skipped_count += 1
+            chunk.append((row_num, item))
+            if len(chunk) >= chunk_size:
+                inserted, chunk_errors = self._import_chunk(asset_type, chunk)
+                success_count += inserted
+                skipped_count += len(chunk) - inserted
+                errors.extend(chunk_errors)
+                chunk = []
+                if progress:
+                    progress(success_count + skipped_count, errors=len(header_errors) + len(errors))
+        
+        if chunk:
+            inserted, chunk_errors = self._import_chunk(asset_type, chunk)
+            success_count += inserted
+            skipped_count += len(chunk) - inserted
+            errors.extend(chunk_errors)
+        
+        if success_count:
+            # Bulk inserts bypass the ORM flush hooks that keep the fuzzy index current
+            self.fuzzy_search.invalidate(asset_type)
         
         # Combine header errors with row errors
         all_errors = header_errors + errors
+        EXCEL_IMPORT_ROWS.inc(read_stats.get('rows_read', 0), asset_type=asset_type)
         
         return {
             'success': True,
             'errors': all_errors,
             'success_count': success_count,
-            'skipped_count': skipped_count
+            'skipped_count': skipped_count,
+            'rows_read': read_stats.get('rows_read', 0),
+            'read_rows_per_second': read_stats.get('rows_per_second')
         }
     
+    def _import_chunk(self, asset_type, chunk):
+        """
+        Validate and insert [(row_num, row_data)] with one executemany INSERT and
+        one commit. If the INSERT fails, rows are retried one by one, each in its
+        own savepoint, so only the bad rows are rejected. Returns (inserted, errors).
+        """
+        from utils.validation import validate_asset_data
+        
+        model_class = self.model_map[asset_type]
+        errors = []
+        
+        # Validate data
+        valid = []
+        for row_num, row_data in chunk:
+            validation_error = validate_asset_data(asset_type, row_data)
+            if validation_error:
+                errors.append(f"Dòng {row_num}: {validation_error}")
+            else:
+                valid.append((row_num, row_data))
+        
+        # Reject codes already used (in the table or earlier in this chunk) before inserting
+        given_codes = [row_data['ma_tai_san'] for _, row_data in valid if row_data.get('ma_tai_san')]
+        taken = set()
+        if given_codes:
+            taken = set(db.session.execute(
+                select(model_class.ma_tai_san).where(model_class.ma_tai_san.in_(given_codes))
+            ).scalars())
+        rows = []
+        for row_num, row_data in valid:
+            code = row_data.get('ma_tai_san')
+            if code:
+                if code in taken:
+                    errors.append(f"Dòng {row_num}: Mã tài sản '{code}' đã tồn tại")
+                    continue
+                taken.add(code)
+            rows.append((row_num, row_data))
+        
+        # Pre-allocate mã tài sản for every row without one
+        missing = [row_data for _, row_data in rows if not row_data.get('ma_tai_san')]
+        
+        def allocate_codes():
+            if missing:
+                prefix = ASSET_CODE_PREFIXES.get(asset_type, 'TS')
+                codes = self._allocate_asset_codes(prefix, model_class, len(missing), reserved=taken)
+                for row_data, code in zip(missing, codes):
+                    row_data['ma_tai_san'] = code
+        
+        allocate_codes()
+        if not rows:
+            return 0, errors
+        
+        now = datetime.utcnow()
+        values = [(row_num, self._bulk_insert_values(model_class, row_data, now)) for row_num, row_data in rows]
+        # Core insert: every row sends every key, so the chunk goes out as one executemany
+        # (the ORM bulk insert splits rows by their pattern of None values)
+        table_insert = insert(model_class.__table__)
+        try:
+            db.session.execute(table_insert, [row_values for _, row_values in values])
+            inserted = [row_values for _, row_values in values]
+        except SQLAlchemyError:
+            db.session.rollback()
+            # The savepoints must nest in one transaction that also holds the stats delta
+            _begin_transaction()
+            # The rollback undid the counter UPDATE too: take the codes again
+            allocate_codes()
+            values = [(row_num, self._bulk_insert_values(model_class, row_data, now)) for row_num, row_data in rows]
+            inserted = []
+            for row_num, row_values in values:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(table_insert, [row_values])
+                    inserted.append(row_values)
+                except SQLAlchemyError as e:
+                    errors.append(f"Dòng {row_num}: Lỗi khi tạo tài sản - {getattr(e, 'orig', None) or e}")
+        
+        try:
+            if inserted:
+                self.stats_service.record_change(
+                    asset_type, self.stats_service.snapshot(None), self.stats_service.snapshot_rows(inserted))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return len(inserted), errors
+    
+    def _bulk_insert_values(self, model_class, row_data, now):
+        """Full column dict for a bulk INSERT: same keys for every row, so they go in one executemany"""
+        values = {}
+        for column in model_class.__table__.columns:
+            if column.key in _BULK_MANAGED_COLUMNS:
+                continue
+            value = row_data.get(column.key)
+            if value is None and column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            values[column.key] = value
+        values.update(
+            id=str(uuid.uuid4()),
+            created_at=now,
+            updated_at=now,
+            is_deleted=False,
+            search_text=model_class.build_search_text(values)
+        )
+        return values
+    
     def create_import_template(self, asset_type):
         """Create Excel template for import"""
         from services.import_service import ImportService
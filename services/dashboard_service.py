@@ -1,3 +1,5 @@
+import copy
+from flask import current_app
 from database import db
 from models import (
     DanhSachVuKhiCongCuHoTro,
@@ -7,7 +9,33 @@ from models import (
     DanhSachTrangThietBiThuy
 )
 from services.notification_service import NotificationService
-from sqlalchemy import func
+from services.stats_service import AssetStatsService
+from utils.cache import TTLCache, invalidate_on_write
+
+def _get_stats_cache():
+    """Get (or lazily create) the dashboard stats snapshot cache for this app"""
+    cache = current_app.extensions.get('dashboard_stats_cache')
+    if cache is None:
+        cache = TTLCache(maxsize=1, ttl=current_app.config.get('DASHBOARD_STATS_TTL', 60))
+        current_app.extensions['dashboard_stats_cache'] = cache
+    return cache
+
+def invalidate_dashboard_stats():
+    """Drop the stats snapshot after asset writes (write-through invalidation)"""
+    cache = current_app.extensions.get('dashboard_stats_cache')
+    if cache is not None:
+        cache.clear()
+
+invalidate_on_write(
+    [
+        DanhSachVuKhiCongCuHoTro,
+        DanhSachPhuongTien,
+        DanhSachThietBiKyThuatNghiepVu,
+        DanhSachThietBiVanPhongDoanhTrai,
+        DanhSachTrangThietBiThuy
+    ],
+    invalidate_dashboard_stats
+)
 
 class DashboardService:
     def __init__(self):
@@ -18,11 +46,20 @@ class DashboardService:
             'technical': DanhSachThietBiKyThuatNghiepVu,
             'office': DanhSachThietBiVanPhongDoanhTrai
         }
+        self.notification_service = NotificationService()
+        self.stats_service = AssetStatsService()
     
     def get_stats(self):
         """Get dashboard statistics"""
-        from sqlalchemy import inspect
-        
+        cache = _get_stats_cache()
+        stats = cache.get('stats')
+        if stats is None:
+            stats = self._compute_stats()
+            cache.set('stats', stats)
+        return copy.deepcopy(stats)
+    
+    def _compute_stats(self):
+        """Totals read from the incrementally maintained asset_stats table"""
         stats = {
             'total_assets': 0,
             'by_type': {
@@ -38,58 +75,20 @@ class DashboardService:
             }
         }
         
-        # Check if database tables exist
         try:
-            inspector = inspect(db.engine)
-            existing_tables = inspector.get_table_names()
+            totals = self.stats_service.get_totals()
         except Exception as e:
             raise Exception(f"Database connection error: {str(e)}. Please run 'python init_db.py' to initialize the database.")
         
-        try:
-            for asset_type, model_class in self.models.items():
-                table_name = model_class.__tablename__
-                
-                # Check if table exists
-                if table_name not in existing_tables:
-                    print(f"Warning: Table {table_name} does not exist")
-                    continue
-                
-                try:
-                    count = model_class.query.filter_by(is_deleted=False).count()
-                    stats['by_type'][asset_type] = count
-                    stats['total_assets'] += count
-                except Exception as e:
-                    print(f"Warning: Could not count {asset_type}: {str(e)}")
-                    continue
-                
-                # Sum values - handle NULL values and missing columns
-                try:
-                    # Check if columns exist
-                    columns = [col.name for col in inspector.get_columns(table_name)]
-                    
-                    if 'nguyen_gia' in columns and 'gia_tri_con_lai' in columns:
-                        result = db.session.query(
-                            func.sum(model_class.nguyen_gia).label('total_nguyen_gia'),
-                            func.sum(model_class.gia_tri_con_lai).label('total_gia_tri_con_lai')
-                        ).filter_by(is_deleted=False).first()
-                        
-                        if result:
-                            if result.total_nguyen_gia is not None:
-                                stats['total_value']['nguyen_gia'] += float(result.total_nguyen_gia)
-                            if result.total_gia_tri_con_lai is not None:
-                                stats['total_value']['gia_tri_con_lai'] += float(result.total_gia_tri_con_lai)
-                except Exception as e:
-                    # If there's an error (e.g., column doesn't exist), skip value calculation
-                    print(f"Warning: Could not calculate values for {asset_type}: {str(e)}")
-                    pass
-        except Exception as e:
-            print(f"Error in get_stats: {str(e)}")
-            raise
+        for asset_type, values in totals.items():
+            stats['by_type'][asset_type] = values['total']
+            stats['total_assets'] += values['total']
+            stats['total_value']['nguyen_gia'] += values['nguyen_gia']
+            stats['total_value']['gia_tri_con_lai'] += values['gia_tri_con_lai']
         
         return stats
     
     def get_top_alerts(self, limit=5):
         """Get top priority alerts"""
-        notification_service = NotificationService()
-        notifications = notification_service.get_notifications(limit=limit)
+        notifications = self.notification_service.get_notifications(limit=limit)
         return notifications
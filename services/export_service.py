@@ -1,14 +1,107 @@
+from flask import Response, stream_with_context
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
-from datetime import datetime
-import os
+from tempfile import SpooledTemporaryFile
+import csv
+import io
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_MIMETYPE = 'text/csv'
+CSV_BOM = '\ufeff'  # lets Excel detect UTF-8 when the CSV is opened directly
+
+# Register exports (?format=csv|xlsx): (field, header) in sổ thụ lý order
+REGISTER_COLUMNS = {
+    'tin_bao': (
+        ('stt', 'STT'),
+        ('dieu_luat', 'Điều luật'),
+        ('ten_nguon_tin', 'Tên nguồn tin'),
+        ('ngay_xay_ra', 'Ngày xảy ra'),
+        ('noi_xay_ra', 'Nơi xảy ra'),
+        ('noi_dung_nguon_tin', 'Nội dung nguồn tin'),
+        ('so_qd_phan_cong_ptt', 'Số QĐ phân công PTT/Trưởng CAX ủy quyền'),
+        ('so_qd_phan_cong_dtv', 'Số QĐ phân công ĐTV'),
+        ('ngay_phan_cong', 'Ngày phân công'),
+        ('ket_qua_giai_quyet', 'Kết quả giải quyết'),
+        ('dia_chi_bi_hai', 'Địa chỉ bị hại'),
+        ('thong_tin_doi_tuong', 'Thông tin đối tượng'),
+        ('cong_an_phu_trach', 'Điều tra viên'),
+        ('don_vi', 'Đơn vị'),
+        ('kiem_sat_vien', 'Kiểm sát viên'),
+        ('gia_han', 'Gia hạn'),
+        ('ngay_het_han', 'Ngày hết hạn'),
+        ('tinh_trang_ho_so', 'Tình trạng hồ sơ'),
+        ('trang_thai', 'Trạng thái'),
+        ('ghi_chu', 'Ghi chú')
+    ),
+    'vu_an': (
+        ('stt', 'STT'),
+        ('tin_bao_stt', 'STT tin báo'),
+        ('dieu_luat', 'Điều luật'),
+        ('toi_danh', 'Tội danh'),
+        ('ngay_xay_ra', 'Ngày xảy ra'),
+        ('noi_xay_ra', 'Nơi xảy ra'),
+        ('thong_tin_vu_an', 'Thông tin vụ án'),
+        ('so_qd_phan_cong_ptt', 'Số QĐ phân công PTT/Trưởng CAX ủy quyền'),
+        ('so_qd_phan_cong_dtv', 'Số QĐ phân công ĐTV'),
+        ('ngay_phan_cong', 'Ngày phân công'),
+        ('so_khoi_to_vu_an', 'Số QĐ khởi tố vụ án'),
+        ('ngay_khoi_to_vu_an', 'Ngày khởi tố vụ án'),
+        ('tong_so_bi_can', 'Tổng số bị can'),
+        ('thong_tin_bi_can', 'Thông tin bị can'),
+        ('bien_phap_ngan_chan', 'Biện pháp ngăn chặn'),
+        ('so_khoi_to_bi_can', 'Số QĐ khởi tố bị can'),
+        ('ngay_khoi_to_bi_can', 'Ngày khởi tố bị can'),
+        ('dang_vien', 'Đảng viên'),
+        ('ket_qua_giai_quyet', 'Kết quả giải quyết'),
+        ('bi_can_giai_quyet', 'Bị can đã giải quyết'),
+        ('dieu_tra_vien', 'Điều tra viên'),
+        ('can_bo_quan_ly_ho_so', 'Cán bộ quản lý hồ sơ'),
+        ('don_vi', 'Đơn vị'),
+        ('kiem_sat_vien', 'Kiểm sát viên'),
+        ('ngay_het_han', 'Ngày hết hạn'),
+        ('tinh_trang_ho_so', 'Tình trạng hồ sơ'),
+        ('trang_thai', 'Trạng thái'),
+        ('ngay_chuyen_tu_tin_bao', 'Ngày chuyển từ tin báo'),
+        ('ghi_chu', 'Ghi chú')
+    )
+}
+
+HEADER_STYLE = 'asset_header'
+CELL_STYLE = 'asset_cell'
+
+
+def register_styles(wb):
+    """Add the shared header/cell named styles to a workbook (once)"""
+    existing = set(wb.named_styles)
+    if HEADER_STYLE not in existing:
+        wb.add_named_style(NamedStyle(
+            name=HEADER_STYLE,
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center")
+        ))
+    if CELL_STYLE not in existing:
+        wb.add_named_style(NamedStyle(name=CELL_STYLE, alignment=Alignment(horizontal="left", vertical="center")))
+
+
+def csv_response(chunks, download_name):
+    """
+    Streamed CSV download. The request context (and its DB session) stays open
+    until the generator is exhausted, so `chunks` may run its query lazily.
+    """
+    return Response(
+        stream_with_context(chunks),
+        mimetype=CSV_MIMETYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename={download_name}',
+            'X-Accel-Buffering': 'no'  # nginx: pass chunks through as they are produced
+        }
+    )
 
 class ExportService:
     def __init__(self):
-        self.export_dir = 'exports'
-        if not os.path.exists(self.export_dir):
-            os.makedirs(self.export_dir)
         self.type_names = {
             'weapons': 'Vũ khí, VLN, CCHT',
             'vehicles': 'Phương tiện',
@@ -17,40 +110,86 @@ class ExportService:
             'office': 'Thiết bị VP & DT'
         }
     
-    def export_assets_to_excel(self, assets, asset_type, filters=None):
-        """Export assets to Excel file"""
-        wb = Workbook()
-        ws = wb.active
-        self.write_asset_sheet(ws, asset_type, assets)
+    def export_assets_to_excel(self, assets, asset_type, filters=None, spool_size=8 * 1024 * 1024):
+        """
+        Export assets (any iterable of asset dicts) to an xlsx in a spooled temp
+        file, rewound and ready to stream. The write-only workbook keeps no rows
+        in memory, so a generator of rows is exported in constant memory.
+        """
+        return self.export_rows_to_excel(
+            f"Danh sách {self.type_names.get(asset_type, asset_type)}",
+            self.get_headers(asset_type),
+            (self.get_asset_values(asset, asset_type) for asset in assets),
+            spool_size
+        )
+    
+    def export_rows_to_excel(self, title, headers, rows, spool_size=8 * 1024 * 1024):
+        """One-sheet write-only xlsx of `rows` (lists of cell values) in a rewound spool"""
+        wb = Workbook(write_only=True)
+        register_styles(wb)
+        ws = wb.create_sheet()
+        ws.title = title[:31]
+        
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 20
+        ws.append([self._styled_cell(ws, header, HEADER_STYLE) for header in headers])
         
-        # Save file
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{asset_type}_{timestamp}.xlsx"
-        filepath = os.path.join(self.export_dir, filename)
-        wb.save(filepath)
+        for row in rows:
+            ws.append([self._styled_cell(ws, value, CELL_STYLE) for value in row])
         
-        return filepath
+        return self.save_to_spool(wb, spool_size)
+    
+    @staticmethod
+    def stream_csv(rows, batch_size=1000):
+        """
+        Encode rows (lists of cell values) as UTF-8 CSV with a BOM, yielding bytes:
+        the first row at once, then one chunk per batch_size rows. Nothing is kept
+        between chunks, so a generator of rows streams in constant memory.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write(CSV_BOM)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if count == 1 or count % batch_size == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+    
+    @staticmethod
+    def save_to_spool(wb, spool_size=8 * 1024 * 1024):
+        """Save a workbook to a temp file (in memory up to spool_size bytes), rewound for send_file"""
+        spool = SpooledTemporaryFile(max_size=spool_size, suffix='.xlsx')
+        try:
+            wb.save(spool)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+    
+    @staticmethod
+    def _styled_cell(ws, value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
     
     def write_asset_sheet(self, ws, asset_type, assets, sheet_title=None):
         """Populate a worksheet with asset data"""
         title = sheet_title or f"Danh sách {self.type_names.get(asset_type, asset_type)}"
         ws.title = title[:31]
+        register_styles(ws.parent)
         
         headers = self.get_headers(asset_type)
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        
         for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+            ws.cell(row=1, column=col, value=header).style = HEADER_STYLE
         
         for row_idx, asset in enumerate(assets, start=2):
             values = self.get_asset_values(asset, asset_type)
             for col_idx, value in enumerate(values, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.alignment = Alignment(horizontal="left", vertical="center")
+                ws.cell(row=row_idx, column=col_idx, value=value).style = CELL_STYLE
         
         for col in range(1, len(headers) + 1):
             column_letter = get_column_letter(col)
@@ -75,6 +214,13 @@ class ExportService:
                 'Định kỳ kiểm tra', 'Ngày kiểm tra gần nhất', 'Ngày kiểm tra tiếp theo',
                 'Kết quả kiểm tra', 'Ghi chú'
             ]
+        elif asset_type == 'water':
+            return [
+                'Mã tài sản', 'Danh mục', 'Tên trang bị', 'Đơn vị tính',
+                'Nguyên giá', 'Số lượng', 'Mã hiệu', 'Năm trang bị',
+                'Loại tài sản', 'Ngày kiểm tra gần nhất', 'Ngày kiểm tra tiếp theo',
+                'Kết quả kiểm tra', 'Năm hết hạn', 'Phương thức xử lý', 'Ghi chú'
+            ]
         elif asset_type == 'technical':
             return [
                 'Mã tài sản', 'Tên thiết bị', 'Năm sử dụng', 'Số lượng',
@@ -96,6 +242,14 @@ class ExportService:
                 'Nguyên giá', 'Giá trị còn lại', 'Loại tài sản', 'Ghi chú'
             ]
     
+    def get_register_headers(self, register):
+        """Headers of the tin_bao / vu_an register export"""
+        return [header for _, header in REGISTER_COLUMNS[register]]
+    
+    def get_register_values(self, item, register):
+        """Values for a register row (dict from to_dict()/row_to_dict())"""
+        return [item.get(field, '') for field, _ in REGISTER_COLUMNS[register]]
+    
     def get_asset_values(self, asset, asset_type):
         """Get values for asset row"""
         if asset_type == 'weapons':
@@ -140,6 +294,24 @@ class ExportService:
                 asset.get('ket_qua_kiem_tra', ''),
                 asset.get('ghi_chu', '')
             ]
+        elif asset_type == 'water':
+            return [
+                asset.get('ma_tai_san', ''),
+                asset.get('danh_muc_trang_thiet_bi', ''),
+                asset.get('ten_trang_bi', ''),
+                asset.get('don_vi_tinh', ''),
+                asset.get('nguyen_gia', ''),
+                asset.get('so_luong', ''),
+                asset.get('ma_hieu', ''),
+                asset.get('nam_trang_bi', ''),
+                asset.get('loai_tai_san', ''),
+                asset.get('ngay_kiem_tra_gan_nhat', ''),
+                asset.get('ngay_kiem_tra_tiep_theo', ''),
+                asset.get('ket_qua_kiem_tra', ''),
+                asset.get('nam_het_han', ''),
+                asset.get('phuong_thuc_xu_ly', ''),
+                asset.get('ghi_chu', '')
+            ]
         elif asset_type == 'technical':
             return [
                 asset.get('ma_tai_san', ''),
@@ -157,7 +329,7 @@ class ExportService:
                 asset.get('nam_het_han', ''),
                 asset.get('ghi_chu', '')
             ]
-        else:  # office
+        elif asset_type == 'office':
             return [
                 asset.get('ma_tai_san', ''),
                 asset.get('ten_tai_san', ''),
@@ -177,4 +349,15 @@ class ExportService:
                 asset.get('nam_het_han', ''),
                 asset.get('ghi_chu', '')
             ]
+        else:  # default
+            return [
+                asset.get('ma_tai_san', ''),
+                asset.get('ten_tai_san', ''),
+                asset.get('don_vi_tinh', ''),
+                asset.get('so_luong', ''),
+                asset.get('nguyen_gia', ''),
+                asset.get('gia_tri_con_lai', ''),
+                asset.get('loai_tai_san', ''),
+                asset.get('ghi_chu', '')
+            ]
 
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database import db
+from models import (
+    DanhSachVuKhiCongCuHoTro,
+    DanhSachPhuongTien,
+    DanhSachThietBiKyThuatNghiepVu,
+    DanhSachThietBiVanPhongDoanhTrai,
+    DanhSachTrangThietBiThuy
+)
+from utils.trigram import TrigramIndex
+
+# Identifier columns indexed for ?match=fuzzy, per asset type
+FUZZY_FIELDS = {
+    'weapons': ('ma_tai_san', 'so_hieu'),
+    'vehicles': ('ma_tai_san', 'bien_so_ky_hieu', 'so_khung_so_than_vo', 'so_may'),
+    'water': ('ma_tai_san', 'ma_hieu'),
+    'technical': ('ma_tai_san',),
+    'office': ('ma_tai_san',)
+}
+
+_build_lock = threading.Lock()
+
+
+class FuzzySearchService:
+    """Per-asset-type trigram indexes, built lazily and updated after asset commits"""
+
+    def __init__(self):
+        self.model_map = {
+            'weapons': DanhSachVuKhiCongCuHoTro,
+            'vehicles': DanhSachPhuongTien,
+            'water': DanhSachTrangThietBiThuy,
+            'technical': DanhSachThietBiKyThuatNghiepVu,
+            'office': DanhSachThietBiVanPhongDoanhTrai
+        }
+
+    def search(self, asset_type, term, limit=None):
+        """[(asset_id, score)] ranked fuzzy matches of `term` against the identifier columns"""
+        if asset_type not in FUZZY_FIELDS:
+            raise ValueError(f"Invalid asset type: {asset_type}")
+        limit = limit or current_app.config.get('FUZZY_SEARCH_MAX_RESULTS', 200)
+        threshold = current_app.config.get('FUZZY_SEARCH_THRESHOLD', 0.3)
+        return self._get_index(asset_type).search(term, limit=limit, threshold=threshold)
+
+    def invalidate(self, asset_type):
+        """Drop a type's index (e.g. after bulk inserts); the next search rebuilds it"""
+        _get_indexes().pop(asset_type, None)
+
+    def _get_index(self, asset_type):
+        indexes = _get_indexes()
+        entry = indexes.get(asset_type)
+        max_age = current_app.config.get('FUZZY_INDEX_MAX_AGE', 300)
+        if entry is None or (max_age and time.monotonic() - entry['built_at'] > max_age):
+            with _build_lock:
+                entry = indexes.get(asset_type)
+                if entry is None or (max_age and time.monotonic() - entry['built_at'] > max_age):
+                    entry = {'index': self._build_index(asset_type), 'built_at': time.monotonic()}
+                    indexes[asset_type] = entry
+        return entry['index']
+
+    def _build_index(self, asset_type):
+        """Load id + identifier columns of every live asset (no ORM hydration)"""
+        model_class = self.model_map[asset_type]
+        fields = FUZZY_FIELDS[asset_type]
+        index = TrigramIndex()
+        rows = db.session.execute(
+            select(model_class.id, *[getattr(model_class, name) for name in fields])
+            .where(model_class.is_deleted == False)
+        )
+        for row in rows:
+            index.add(row[0], row[1:])
+        return index
+
+
+def _get_indexes():
+    """{asset_type: {'index', 'built_at'}} for this app"""
+    return current_app.extensions.setdefault('asset_trigram_indexes', {})
+
+
+# Rebuilding is periodic (FUZZY_INDEX_MAX_AGE) so other worker processes' writes
+# show up too; writes made by this process are applied right after they commit.
+_TYPE_BY_MODEL = {
+    DanhSachVuKhiCongCuHoTro: 'weapons',
+    DanhSachPhuongTien: 'vehicles',
+    DanhSachTrangThietBiThuy: 'water',
+    DanhSachThietBiKyThuatNghiepVu: 'technical',
+    DanhSachThietBiVanPhongDoanhTrai: 'office'
+}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_asset_changes(session, flush_context):
+    changes = None
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        asset_type = _TYPE_BY_MODEL.get(type(obj))
+        if asset_type is None:
+            continue
+        if changes is None:
+            changes = session.info.setdefault('_trigram_changes', [])
+        if obj in session.deleted or obj.is_deleted:
+            changes.append((asset_type, obj.id, None))
+        else:
+            changes.append((asset_type, obj.id, [getattr(obj, name, None) for name in FUZZY_FIELDS[asset_type]]))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_asset_changes(session):
+    changes = session.info.pop('_trigram_changes', None)
+    if not changes:
+        return
+    indexes = _get_indexes()
+    for asset_type, asset_id, values in changes:
+        entry = indexes.get(asset_type)
+        if entry is None:
+            continue  # Not built yet: the first search loads current data
+        if values is None:
+            entry['index'].remove(asset_id)
+        else:
+            entry['index'].add(asset_id, values)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_asset_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('_trigram_changes', None)
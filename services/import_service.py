@@ -2,8 +2,42 @@ from openpyxl import Workbook, load_workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 from datetime import datetime
+import io
 import os
-from dateutil import parser as date_parser
+import time
+
+from utils.artifact_cache import artifact_key, get_artifact_cache
+from utils.date_parsing import DateParser
+
+INT_FIELDS = frozenset(['so_luong', 'nam_su_dung', 'nam_trang_bi', 'nam_het_han'])
+FLOAT_FIELDS = frozenset(['nguyen_gia', 'gia_tri_con_lai', 'chi_phi', 'phi_duong_bo'])
+
+
+def _to_int(value):
+    if isinstance(value, (int, float)):
+        return int(value)
+    elif isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _to_float(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    elif isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _to_str(value):
+    return str(value).strip() if value else None
+
 
 class ImportService:
     def __init__(self):
@@ -12,7 +46,13 @@ class ImportService:
             os.makedirs(self.import_dir)
     
     def create_template(self, asset_type):
-        """Create Excel template for import"""
+        """Create Excel template for import; returns the path of the cached file"""
+        headers, field_mappings, required_fields = self._get_field_config(asset_type)
+        example_data = self._get_example_data(asset_type)
+        key = artifact_key('import_template', asset_type, headers, example_data)
+        return get_artifact_cache().path(key, lambda: self._build_template(asset_type, headers, example_data))
+    
+    def _build_template(self, asset_type, headers, example_data):
         wb = Workbook()
         ws = wb.active
         
@@ -27,9 +67,6 @@ class ImportService:
         title = f"Mẫu nhập {type_names.get(asset_type, asset_type)}"
         ws.title = title[:31]
         
-        # Get headers and field mappings
-        headers, field_mappings, required_fields = self._get_field_config(asset_type)
-        
         # Header row
         header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
         header_font = Font(bold=True, color="FFFFFF")
@@ -50,7 +87,6 @@ class ImportService:
             cell.font = Font(italic=True)
         
         # Add example data based on asset type
-        example_data = self._get_example_data(asset_type)
         for col, value in enumerate(example_data, start=1):
             ws.cell(row=example_row, column=col, value=value)
         
@@ -66,48 +102,46 @@ class ImportService:
             column_letter = get_column_letter(col)
             ws.column_dimensions[column_letter].width = 25
         
-        # Save file
-        filename = f"mau_nhap_{asset_type}.xlsx"
-        filepath = os.path.join(self.import_dir, filename)
-        wb.save(filepath)
-        
-        return filepath
+        output = io.BytesIO()
+        wb.save(output)
+        output.seek(0)
+        return output
     
-    def import_from_excel(self, filepath, asset_type):
-        """Import assets from Excel file - generator that yields row data"""
+    def import_from_excel(self, filepath, asset_type, stats=None):
+        """
+        Import assets from Excel file - generator that yields row data.
+        The sheet is streamed (read-only mode); if given, `stats` is filled with
+        rows_read, duration_seconds and rows_per_second.
+        """
+        started = time.perf_counter()
+        rows_read = 0
+        wb = None
         try:
-            wb = load_workbook(filepath, data_only=True)
+            wb = load_workbook(filepath, read_only=True, data_only=True)
             ws = wb.active
+            rows = ws.iter_rows(values_only=True)
             
             # Get field configuration
             headers, field_mappings, required_fields = self._get_field_config(asset_type)
             
             # Validate headers
-            excel_headers = []
-            for col in range(1, ws.max_column + 1):
-                header = ws.cell(row=1, column=col).value
-                if header:
-                    excel_headers.append(str(header).strip())
+            header_row = next(rows, ())
+            excel_headers = [(col, str(header).strip()) for col, header in enumerate(header_row) if header]
             
             # Check if headers match
             if len(excel_headers) != len(headers):
                 yield {'success': False, 'errors': [f"Số lượng cột không khớp. Yêu cầu: {len(headers)}, Tìm thấy: {len(excel_headers)}"], 'success_count': 0, 'skipped_count': 0}
                 return
             
-            # Map Excel columns to field names
-            column_mapping = {}
+            # Map Excel columns to (field name, converter), matched case-insensitive, with/without asterisk
+            expected = {header.replace('*', '').strip().lower(): field for header, field in zip(headers, field_mappings)}
+            column_mapping = []
             header_errors = []
-            for idx, excel_header in enumerate(excel_headers):
-                # Try to find matching header (case-insensitive, with/without asterisk)
-                excel_header_clean = excel_header.replace('*', '').strip()
-                found = False
-                for header_idx, expected_header in enumerate(headers):
-                    expected_clean = expected_header.replace('*', '').strip()
-                    if excel_header_clean.lower() == expected_clean.lower():
-                        column_mapping[idx] = field_mappings[header_idx]
-                        found = True
-                        break
-                if not found:
+            for col, excel_header in excel_headers:
+                field_name = expected.get(excel_header.replace('*', '').strip().lower())
+                if field_name:
+                    column_mapping.append((col, field_name, self._get_converter(field_name)))
+                else:
                     header_errors.append(f"Cột '{excel_header}' không khớp với cấu trúc mẫu")
             
             if header_errors:
@@ -115,30 +149,24 @@ class ImportService:
                 return
             
             # Process data rows (skip header and example rows)
-            start_row = 2
-            for row_idx in range(start_row, ws.max_row + 1):
-                row_data = {}
+            for row_idx, row in enumerate(rows, start=2):
+                rows_read += 1
                 
                 # Skip empty rows
-                if all(ws.cell(row=row_idx, column=col).value is None for col in range(1, ws.max_column + 1)):
+                if all(value is None for value in row):
                     continue
                 
                 # Extract data from row
-                for col_idx, field_name in column_mapping.items():
-                    cell_value = ws.cell(row=row_idx, column=col_idx + 1).value
-                    
-                    # Convert value based on field type
-                    converted_value = self._convert_value(cell_value, field_name, asset_type)
-                    if converted_value is not None:
-                        row_data[field_name] = converted_value
+                row_data = {}
+                row_length = len(row)
+                for col, field_name, convert in column_mapping:
+                    if col < row_length:
+                        converted_value = convert(row[col])
+                        if converted_value is not None:
+                            row_data[field_name] = converted_value
                 
                 # Validate required fields
-                missing_fields = []
-                for field in required_fields:
-                    if field not in row_data or row_data[field] is None or row_data[field] == '':
-                        missing_fields.append(field)
-                
-                if missing_fields:
+                if any(row_data.get(field) in (None, '') for field in required_fields):
                     # Skip this row, will be counted as error by caller
                     continue
                 
@@ -153,6 +181,14 @@ class ImportService:
                 
         except Exception as e:
             yield {'success': False, 'errors': [f"Lỗi khi đọc file Excel: {str(e)}"], 'success_count': 0, 'skipped_count': 0}
+        finally:
+            if wb is not None:
+                wb.close()
+            if stats is not None:
+                duration = time.perf_counter() - started
+                stats['rows_read'] = rows_read
+                stats['duration_seconds'] = round(duration, 3)
+                stats['rows_per_second'] = round(rows_read / duration, 1) if duration > 0 else None
     
     def _get_field_config(self, asset_type):
         """Get field configuration for asset type"""
@@ -252,34 +288,23 @@ class ImportService:
     
     def _convert_value(self, value, field_name, asset_type):
         """Convert Excel cell value to appropriate Python type"""
-        if value is None:
-            return None
-        
+        return self._get_converter(field_name)(value)
+    
+    @staticmethod
+    def _get_converter(field_name):
+        """Conversion function for a field, chosen once per column instead of per cell"""
         # Date fields
         if 'ngay' in field_name or 'date' in field_name:
-            if isinstance(value, datetime):
-                return value.date()
-            elif isinstance(value, str):
-                try:
-                    return date_parser.parse(value).date()
-                except:
-                    return None
-            return None
+            return DateParser().parse  # own format sniffing and memo per column
         
         # Number fields
-        if field_name in ['so_luong', 'nguyen_gia', 'gia_tri_con_lai', 'nam_su_dung', 
-                          'nam_trang_bi', 'nam_het_han', 'chi_phi', 'phi_duong_bo']:
-            if isinstance(value, (int, float)):
-                return int(value) if field_name in ['so_luong', 'nam_su_dung', 'nam_trang_bi', 'nam_het_han'] else float(value)
-            elif isinstance(value, str):
-                try:
-                    return int(value) if field_name in ['so_luong', 'nam_su_dung', 'nam_trang_bi', 'nam_het_han'] else float(value)
-                except:
-                    return None
-            return None
+        if field_name in INT_FIELDS:
+            return _to_int
+        if field_name in FLOAT_FIELDS:
+            return _to_float
         
         # String fields
-        return str(value).strip() if value else None
+        return _to_str
     
     def _validate_row_data(self, row_data, asset_type, row_num):
         """Validate row data format"""
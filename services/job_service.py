@@ -0,0 +1,245 @@
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+
+from database import db
+from models import Job
+from utils.metrics import time_excel_job
+from utils.schema import table_columns
+
+# Job type -> config key of its concurrency limit (each type gets its own pool)
+JOB_TYPES = {
+    'asset_import': 'JOB_IMPORT_CONCURRENCY',
+    'tin_bao_import': 'JOB_IMPORT_CONCURRENCY',
+    'asset_export': 'JOB_EXPORT_CONCURRENCY',
+    'report_export': 'JOB_EXPORT_CONCURRENCY'
+}
+
+_executors_lock = threading.Lock()
+
+# Tells this process apart from an earlier one that had the same pid (e.g. PID 1 in a container)
+_BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def wants_async(request):
+    """Opt-in background mode: ?async=1 or a `Prefer: respond-async` header"""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
+
+
+class JobContext:
+    """Handed to a job function: progress reporting and the result file"""
+
+    def __init__(self, job_id, results_dir, progress_interval):
+        self.job_id = job_id
+        self.results_dir = results_dir
+        self.progress_interval = progress_interval
+        self.file = None
+        self._last_progress = 0.0
+
+    def progress(self, processed=None, total=None, errors=None, force=False):
+        """Record rows processed / expected and errors so far (throttled, own transaction)"""
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+
+        values = {'updated_at': datetime.utcnow()}
+        if processed is not None:
+            values['processed'] = processed
+        if total is not None:
+            values['total'] = total
+        if errors is not None:
+            values['error_count'] = errors
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(update(Job.__table__).where(Job.__table__.c.id == self.job_id).values(**values))
+        except OperationalError:
+            pass  # Database busy (SQLite write lock): the next update catches up
+
+    def save_file(self, fileobj, filename, mimetype):
+        """Keep the job's output (an export spool) for /api/jobs/<id>/download"""
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, f'{self.job_id}{os.path.splitext(filename)[1]}')
+        with open(path, 'wb') as output:
+            shutil.copyfileobj(fileobj, output)
+        fileobj.close()
+        self.file = (path, filename, mimetype)
+
+
+class JobService:
+    """
+    Background jobs in per-type thread pools; state is kept in the jobs table.
+    The pools belong to the process that queued the job (jobs.worker), so the
+    JOB_*_CONCURRENCY limits apply per server process, not per deployment.
+    """
+
+    def submit(self, job_type, func, *args, params=None, user_id=None, **kwargs):
+        """
+        Queue func(job_context, *args, **kwargs) and return the new job's dict at once.
+        The function runs in an app context of its own and returns a JSON-able result.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Invalid job type: {job_type}")
+
+        self.purge_expired()
+        job = Job(job_type=job_type, status='queued', created_by=user_id, worker=_worker_id(),
+                  params=json.dumps(params, ensure_ascii=False, default=str) if params else None)
+        db.session.add(job)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        _get_executor(job_type).submit(self._run, app, job.id, func, args, kwargs)
+        return job.to_dict()
+
+    def get_job(self, job_id):
+        return Job.query.filter_by(id=job_id, is_deleted=False).first()
+
+    def fail_interrupted(self):
+        """Mark queued/running jobs whose worker process is gone as failed; returns how many"""
+        if 'worker' not in table_columns('jobs'):
+            return 0
+        jobs = Job.__table__
+        pending = jobs.c.status.in_(('queued', 'running'))
+        orphaned = [
+            job_id for job_id, worker in db.session.execute(select(jobs.c.id, jobs.c.worker).where(pending))
+            if not _worker_alive(worker)
+        ]
+        if not orphaned:
+            return 0
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(jobs)
+            .where(jobs.c.id.in_(orphaned), pending)  # unless it finished meanwhile
+            .values(status='failed', error='Interrupted by restart', finished_at=now, updated_at=now)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def purge_expired(self):
+        """Delete result files of jobs finished more than JOB_RESULT_MAX_AGE seconds ago"""
+        max_age = current_app.config.get('JOB_RESULT_MAX_AGE', 86400)
+        if not max_age:
+            return
+        expired = Job.query.filter(
+            Job.result_path.isnot(None),
+            Job.finished_at < datetime.utcnow() - timedelta(seconds=max_age)
+        ).all()
+        for job in expired:
+            try:
+                os.remove(job.result_path)
+            except OSError:
+                pass
+            job.result_path = None
+        if expired:
+            db.session.commit()
+
+    def _run(self, app, job_id, func, args, kwargs):
+        with app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            context = JobContext(
+                job_id,
+                app.config.get('JOB_RESULTS_DIR', 'job_results'),
+                app.config.get('JOB_PROGRESS_INTERVAL', 1.0)
+            )
+            try:
+                with time_excel_job(job.job_type):
+                    result = func(context, *args, **kwargs)
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(Job, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+                if getattr(e, 'payload', None):
+                    # File rejected (e.g. TinBaoImportError): keep the details the 400 response would have had
+                    job.result = json.dumps(e.payload, ensure_ascii=False, default=str)
+                else:
+                    app.logger.exception('Job %s (%s) failed', job_id, job.job_type)
+            else:
+                job = db.session.get(Job, job_id)
+                db.session.refresh(job)  # processed/error_count were written by JobContext
+                job.status = 'succeeded'
+                job.result = json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+                if context.file:
+                    job.result_path, job.result_filename, job.result_mimetype = context.file
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+
+def init_jobs(app):
+    """
+    At startup, fail the jobs of worker processes that are gone (restarted or crashed).
+    Jobs of live processes (other server workers, or the server while a CLI
+    command loads the app) are left to them.
+    """
+    with app.app_context():
+        try:
+            count = JobService().fail_interrupted()
+            if count:
+                app.logger.warning('Marked %d interrupted job(s) as failed', count)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning('Could not recover interrupted jobs: %s', e)
+
+
+def _worker_id():
+    """host:pid:boot id of this process, recorded on the jobs it queues"""
+    return f'{socket.gethostname()}:{os.getpid()}:{_BOOT_ID}'
+
+
+def _worker_alive(worker):
+    if not worker:
+        return False  # Queued before owners were recorded
+    host, _, rest = worker.partition(':')
+    pid, _, boot_id = rest.partition(':')
+    if host != socket.gethostname():
+        return True  # Another machine's processes cannot be checked from here
+    if int(pid) == os.getpid():
+        return boot_id == _BOOT_ID
+    return _process_exists(int(pid))
+
+
+def _process_exists(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT on Windows
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def _get_executor(job_type):
+    """ThreadPoolExecutor for this job type, sized by its concurrency setting"""
+    executors = current_app.extensions.setdefault('job_executors', {})
+    executor = executors.get(job_type)
+    if executor is None:
+        with _executors_lock:
+            executor = executors.get(job_type)
+            if executor is None:
+                workers = max(current_app.config.get(JOB_TYPES[job_type], 1), 1)
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'job-{job_type}')
+                executors[job_type] = executor
+    return executor
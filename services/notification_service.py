@@ -1,4 +1,7 @@
-from datetime import date, datetime
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, literal, select, union_all
 
 from database import db
 from models import (
@@ -7,8 +10,42 @@ from models import (
     DanhSachThietBiVanPhongDoanhTrai,
     DanhSachVuKhiCongCuHoTro,
     DanhSachTrangThietBiThuy,
+    LichSuKiemTraBaoTri,
+)
+from utils.cache import TTLCache, invalidate_on_write
+from utils.schema import get_schema
+
+# Same threshold as utils.date_utils.get_inspection_status (BR-003)
+DUE_SOON_DAYS = 15
+
+
+def _get_count_cache():
+    """Get (or lazily create) the notification badge count cache for this app"""
+    cache = current_app.extensions.get("notification_count_cache")
+    if cache is None:
+        cache = TTLCache(maxsize=4, ttl=current_app.config.get("NOTIFICATION_COUNT_CACHE_TTL", 30))
+        current_app.extensions["notification_count_cache"] = cache
+    return cache
+
+
+def invalidate_notification_counts():
+    """Drop cached badge counts so the next poll recounts from database"""
+    cache = current_app.extensions.get("notification_count_cache")
+    if cache is not None:
+        cache.clear()
+
+
+invalidate_on_write(
+    [
+        DanhSachVuKhiCongCuHoTro,
+        DanhSachPhuongTien,
+        DanhSachTrangThietBiThuy,
+        DanhSachThietBiKyThuatNghiepVu,
+        DanhSachThietBiVanPhongDoanhTrai,
+        LichSuKiemTraBaoTri,
+    ],
+    invalidate_notification_counts,
 )
-from utils.date_utils import get_inspection_status
 
 
 class NotificationService:
@@ -30,128 +67,152 @@ class NotificationService:
 
     def get_notifications(self, priority=None, limit=None):
         """Get all notifications/alerts"""
-        from sqlalchemy import inspect
-
-        all_notifications = []
         today = date.today()
 
+        query = self._build_alert_query(today, priority, limit)
+        if query is None:
+            return []
+
+        rows = db.session.execute(query).all()
+        return [self._build_notification(row, today) for row in rows]
+
+    def _alert_sources(self):
+        """(asset_type, model, name_field, date_field, label) for every tracked date"""
         try:
-            inspector = inspect(db.engine)
-            existing_tables = inspector.get_table_names()
+            existing_tables = get_schema()
         except Exception:
             return []
 
+        sources = []
         for asset_type, model_class, name_field in self.models:
-            table_name = model_class.__tablename__
-            if table_name not in existing_tables:
+            if model_class.__tablename__ not in existing_tables:
                 continue
 
-            try:
-                assets = model_class.query.filter_by(is_deleted=False).all()
-            except Exception:
-                continue
+            # Always check upcoming inspection date if available
+            sources.append(
+                (asset_type, model_class, name_field, "ngay_kiem_tra_tiep_theo", "Ngày kiểm tra tiếp theo")
+            )
+
+            # Additional vehicle schedules
+            if asset_type == "vehicles":
+                for field_name, label in self.vehicle_date_fields:
+                    sources.append((asset_type, model_class, name_field, field_name, label))
+        return sources
+
+    def _status_conditions(self, date_column, today):
+        """Date-range predicates for each status, usable by the date indexes"""
+        due_soon_until = today + timedelta(days=DUE_SOON_DAYS)
+        return {
+            "overdue": date_column < today,
+            "due_soon": date_column.between(today, due_soon_until),
+            "normal": date_column > due_soon_until,
+        }
 
-            for asset in assets:
-                asset_name = getattr(asset, name_field, "")
-
-                # Always check upcoming inspection date if available
-                notifications = []
-                notifications.extend(
-                    self._build_notification(
-                        asset_type,
-                        asset,
-                        asset_name,
-                        getattr(asset, "ngay_kiem_tra_tiep_theo", None),
-                        "Ngày kiểm tra tiếp theo",
-                        today,
-                        priority,
-                    )
-                )
-
-                # Additional vehicle schedules
-                if asset_type == "vehicles":
-                    for field_name, label in self.vehicle_date_fields:
-                        date_value = getattr(asset, field_name, None)
-                        notifications.extend(
-                            self._build_notification(
-                                asset_type,
-                                asset,
-                                asset_name,
-                                date_value,
-                                label,
-                                today,
-                                priority,
-                            )
-                        )
-
-                all_notifications.extend(notifications)
-
-        priority_order = {"high": 0, "medium": 1, "low": 2}
-        all_notifications.sort(
-            key=lambda x: (priority_order.get(x["priority"], 99), x["days_until"])
+    def _status_case(self, conditions):
+        return case(
+            (conditions["overdue"], "overdue"),
+            (conditions["due_soon"], "due_soon"),
+            else_="normal",
         )
 
+    def _build_alert_query(self, today, priority_filter=None, limit=None):
+        """
+        One UNION ALL over every (table, date field) pair, classified with CASE
+        and ordered/limited in the database.
+        """
+        priority_status = {"high": "overdue", "medium": "due_soon", "low": "normal"}
+        if priority_filter and priority_filter not in priority_status:
+            return None
+
+        branches = []
+        for asset_type, model_class, name_field, date_field, label in self._alert_sources():
+            date_column = getattr(model_class, date_field)
+            conditions = self._status_conditions(date_column, today)
+
+            branch = select(
+                literal(asset_type).label("asset_type"),
+                model_class.id.label("asset_id"),
+                model_class.ma_tai_san.label("ma_tai_san"),
+                getattr(model_class, name_field).label("ten_tai_san"),
+                literal(label).label("target_label"),
+                date_column.label("target_date"),
+                self._status_case(conditions).label("status"),
+                case(
+                    (conditions["overdue"], 0),
+                    (conditions["due_soon"], 1),
+                    else_=2,
+                ).label("priority_rank"),
+            ).where(model_class.is_deleted == False, date_column.isnot(None))
+
+            if priority_filter:
+                branch = branch.where(conditions[priority_status[priority_filter]])
+
+            if limit:
+                # Priority rank only grows with the due date, so the global top N
+                # is contained in each branch's N earliest dates (index range scan)
+                branch = select(branch.order_by(date_column).limit(limit).subquery())
+
+            branches.append(branch)
+
+        if not branches:
+            return None
+
+        alerts = union_all(*branches).subquery()
+        query = select(alerts).order_by(alerts.c.priority_rank, alerts.c.target_date)
         if limit:
-            all_notifications = all_notifications[:limit]
-
-        return all_notifications
-
-    def _build_notification(
-        self,
-        asset_type,
-        asset,
-        asset_name,
-        date_value,
-        label,
-        today,
-        priority_filter,
-    ):
-        if not date_value:
-            return []
+            query = query.limit(limit)
+        return query
 
-        # Convert to date object
-        if isinstance(date_value, datetime):
-            due_date = date_value.date()
-        elif isinstance(date_value, str):
-            try:
-                due_date = datetime.fromisoformat(date_value).date()
-            except ValueError:
-                return []
-        else:
-            due_date = date_value
-
-        status = get_inspection_status(due_date, today)
+    def _build_notification(self, row, today):
         priority_map = {"overdue": "high", "due_soon": "medium", "normal": "low"}
-        notification_priority = priority_map.get(status, "low")
+        due_date = row.target_date
 
-        if priority_filter and notification_priority != priority_filter:
-            return []
-
-        days_until = (due_date - today).days
-
-        notification = {
-            "asset_type": asset_type,
-            "ma_tai_san": asset.ma_tai_san,
-            "ten_tai_san": asset_name,
+        return {
+            "asset_type": row.asset_type,
+            "ma_tai_san": row.ma_tai_san,
+            "ten_tai_san": row.ten_tai_san,
             "target_date": due_date.isoformat(),
-            "target_label": label,
+            "target_label": row.target_label,
             "ngay_kiem_tra_tiep_theo": due_date.isoformat(),
-            "status": status,
-            "priority": notification_priority,
-            "days_until": days_until,
-            "asset_id": asset.id,
+            "status": row.status,
+            "priority": priority_map.get(row.status, "low"),
+            "days_until": (due_date - today).days,
+            "asset_id": row.asset_id,
         }
 
-        return [notification]
-
     def get_notification_counts(self):
-        notifications = self.get_notifications()
-
-        counts = {"high": 0, "medium": 0, "low": 0, "total": len(notifications)}
-
-        for notification in notifications:
-            priority = notification["priority"]
-            if priority in counts:
-                counts[priority] += 1
-
-        return counts
+        """Badge counts by priority from one grouped query, cached for a short TTL"""
+        today = date.today()
+        cache = _get_count_cache()
+        counts = cache.get(today)
+        if counts is not None:
+            return dict(counts)
+
+        counts = {"high": 0, "medium": 0, "low": 0, "total": 0}
+        query = self._build_count_query(today)
+        if query is not None:
+            priority_map = {"overdue": "high", "due_soon": "medium", "normal": "low"}
+            for status, count in db.session.execute(query):
+                counts[priority_map[status]] += count
+                counts["total"] += count
+
+        # Keyed by day so statuses roll over at midnight
+        cache.set(today, counts)
+        return dict(counts)
+
+    def _build_count_query(self, today):
+        """SELECT status, COUNT(*) over the same UNION ALL as the alert list"""
+        branches = []
+        for asset_type, model_class, name_field, date_field, label in self._alert_sources():
+            date_column = getattr(model_class, date_field)
+            conditions = self._status_conditions(date_column, today)
+            branches.append(
+                select(self._status_case(conditions).label("status"))
+                .where(model_class.is_deleted == False, date_column.isnot(None))
+            )
+
+        if not branches:
+            return None
+
+        alerts = union_all(*branches).subquery()
+        return select(alerts.c.status, func.count()).group_by(alerts.c.status)
@@ -9,8 +9,10 @@ from datetime import datetime, timedelta, date
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.chart import PieChart, Reference
+from flask import current_app
 from services.export_service import ExportService
-import os
+from utils.artifact_cache import artifact_key, data_version, get_artifact_cache
+from utils.pagination import iter_keyset
 from sqlalchemy import or_, and_
 
 class ReportService:
@@ -120,7 +122,13 @@ class ReportService:
         }
     
     def export_report(self, report_type, filters=None):
-        """Export report to Excel"""
+        """Export report to Excel; returns a rewound file with the xlsx bytes"""
+        # Due/overdue counts depend on today's date as well as the data
+        key = artifact_key('report_export', report_type, filters, date.today(),
+                           data_version(*self.models.values()))
+        return get_artifact_cache().open(key, self._build_report)
+    
+    def _build_report(self):
         export_service = ExportService()
         assets_by_type = self._collect_assets_by_type()
         summary = self._build_summary_data(assets_by_type)
@@ -136,11 +144,29 @@ class ReportService:
             sheet_title = self.type_names.get(asset_type, asset_type)
             export_service.write_asset_sheet(ws, asset_type, assets, sheet_title=sheet_title)
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"bao_cao_{report_type}_{timestamp}.xlsx"
-        filepath = os.path.join(export_service.export_dir, filename)
-        wb.save(filepath)
-        return filepath
+        return export_service.save_to_spool(wb, current_app.config.get('EXPORT_SPOOL_MAX_SIZE', 8 * 1024 * 1024))
+    
+    def export_report_csv(self, report_type, filters=None):
+        """
+        Export report as CSV (generator of UTF-8 chunks): one section per asset type
+        (title row, column headers, rows). The summary sheet and chart are Excel-only.
+        """
+        export_service = ExportService()
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+        
+        def rows():
+            for index, asset_type in enumerate(self.type_order):
+                if index:
+                    yield []
+                yield [self.type_names.get(asset_type, asset_type)]
+                yield export_service.get_headers(asset_type)
+                model_class = self.models[asset_type]
+                query = model_class.query.filter_by(is_deleted=False)
+                order_by = [(model_class.created_at, False), (model_class.id, False)]
+                for asset in iter_keyset(query, order_by, batch_size):
+                    yield export_service.get_asset_values(asset.to_dict(), asset_type)
+        
+        return export_service.stream_csv(rows(), batch_size)
     
     def _collect_assets_by_type(self):
         assets_by_type = {}
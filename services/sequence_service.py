@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import SequenceCounter, TinBao, VuAn
+from utils.schema import get_schema
+
+# Models numbered with a unique STT, one counter each ('tin_bao.stt', 'vu_an.stt')
+STT_MODELS = (TinBao, VuAn)
+
+
+class SequenceService:
+    """Named counters in sequence_counters, incremented atomically inside the caller's transaction"""
+
+    def available(self):
+        return SequenceCounter.__tablename__ in get_schema()
+
+    def allocate(self, name, count=1, seed=None):
+        """
+        Reserve `count` consecutive values of counter `name` and return the first.
+        A missing counter starts after seed() (the highest value already used,
+        e.g. found by scanning existing rows), which runs once per counter.
+        The row stays locked until the caller commits, so concurrent workers
+        never get overlapping blocks; a rollback gives the block back.
+        """
+        if count < 1:
+            raise ValueError('count must be at least 1')
+
+        last = self._increment(name, count)
+        if last is None:
+            start = (seed() if seed else 0) or 0
+            if self._create(name, start + count):
+                last = start + count
+            else:
+                # Another worker created the counter first
+                last = self._increment(name, count)
+        return last - count + 1
+
+    def raise_to(self, name, value, seed=None):
+        """Make sure counter `name` is at least `value` (numbers taken explicitly, e.g. STTs from an import file)"""
+        statement = (
+            update(SequenceCounter)
+            .where(SequenceCounter.name == name, SequenceCounter.value < value)
+            .values(value=value, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if db.session.execute(statement).rowcount:
+            return
+        exists = db.session.execute(select(SequenceCounter.name).where(SequenceCounter.name == name)).first()
+        if exists is None and not self._create(name, max((seed() if seed else 0) or 0, value)):
+            db.session.execute(statement)
+
+    def reconcile(self, name, value):
+        """Reseed counter `name` to `value` (the highest number in use), creating it if needed"""
+        counter = db.session.get(SequenceCounter, name)
+        if counter is None:
+            counter = SequenceCounter(name=name)
+            db.session.add(counter)
+        counter.value = value
+        counter.updated_at = datetime.utcnow()
+        db.session.flush()
+
+    def stt_counter_name(self, model_class):
+        return f'{model_class.__tablename__}.stt'
+
+    def max_stt(self, model_class):
+        """Highest STT in the table, soft-deleted rows included (they still hold their number)"""
+        return db.session.query(func.max(model_class.stt)).scalar() or 0
+
+    def allocate_stt(self, model_class, count=1):
+        """First of `count` new consecutive STT numbers for tin báo / vụ án"""
+        if not self.available():
+            # sequence_counters not migrated yet
+            return self.max_stt(model_class) + 1
+        return self.allocate(self.stt_counter_name(model_class), count, seed=lambda: self.max_stt(model_class))
+
+    def raise_stt(self, model_class, value):
+        """Keep the STT counter ahead of an STT that was given explicitly"""
+        if self.available():
+            self.raise_to(self.stt_counter_name(model_class), value, seed=lambda: self.max_stt(model_class))
+
+    def _create(self, name, value):
+        """Insert counter `name` at `value`; False if another worker created it first"""
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(SequenceCounter).values(name=name, value=value, updated_at=datetime.utcnow()))
+            return True
+        except IntegrityError:
+            return False
+
+    def _increment(self, name, count):
+        """New counter value after adding `count`, or None if the counter does not exist"""
+        statement = (
+            update(SequenceCounter)
+            .where(SequenceCounter.name == name)
+            .values(value=SequenceCounter.value + count, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if db.engine.dialect.update_returning:
+            return db.session.execute(statement.returning(SequenceCounter.value)).scalar()
+
+        # No UPDATE ... RETURNING (MySQL): the row is locked by the UPDATE until commit
+        if db.session.execute(statement).rowcount == 0:
+            return None
+        return db.session.execute(select(SequenceCounter.value).where(SequenceCounter.name == name)).scalar()
@@ -0,0 +1,157 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from database import db
+from models import (
+    AssetStats,
+    DanhSachVuKhiCongCuHoTro,
+    DanhSachPhuongTien,
+    DanhSachThietBiKyThuatNghiepVu,
+    DanhSachThietBiVanPhongDoanhTrai,
+    DanhSachTrangThietBiThuy
+)
+from sqlalchemy import func, literal, null, select, union_all, update
+from utils.schema import get_schema
+
+VALUE_FIELDS = ('nguyen_gia', 'gia_tri_con_lai')
+
+
+class AssetStatsService:
+    """Maintain the asset_stats summary table with explicit deltas from AssetService"""
+
+    def __init__(self):
+        self.model_map = {
+            'weapons': DanhSachVuKhiCongCuHoTro,
+            'vehicles': DanhSachPhuongTien,
+            'water': DanhSachTrangThietBiThuy,
+            'technical': DanhSachThietBiKyThuatNghiepVu,
+            'office': DanhSachThietBiVanPhongDoanhTrai
+        }
+
+    def snapshot(self, asset):
+        """(counted, nguyen_gia, gia_tri_con_lai) contribution of one asset to its type's totals"""
+        if asset is None or asset.is_deleted:
+            return (0, Decimal(0), Decimal(0))
+        return (1,) + tuple(self._to_decimal(getattr(asset, field, None)) for field in VALUE_FIELDS)
+
+    def snapshot_rows(self, rows):
+        """Combined snapshot of new asset rows given as column dicts (bulk inserts)"""
+        count = 0
+        totals = [Decimal(0) for _ in VALUE_FIELDS]
+        for row in rows:
+            if row.get('is_deleted'):
+                continue
+            count += 1
+            for idx, field in enumerate(VALUE_FIELDS):
+                totals[idx] += self._to_decimal(row.get(field))
+        return (count,) + tuple(totals)
+
+    def record_change(self, asset_type, before, after):
+        """Apply the difference between two snapshots inside the caller's transaction"""
+        delta = tuple(new - old for old, new in zip(before, after))
+        if any(delta):
+            self.apply_delta(asset_type, *delta)
+
+    def apply_delta(self, asset_type, count=0, nguyen_gia=0, gia_tri_con_lai=0):
+        """Atomic UPDATE ... SET total = total + :delta; missing rows are rebuilt from the asset table"""
+        if AssetStats.__tablename__ not in get_schema():
+            return
+        
+        result = db.session.execute(
+            update(AssetStats)
+            .where(AssetStats.asset_type == asset_type)
+            .values(
+                total=AssetStats.total + count,
+                nguyen_gia=AssetStats.nguyen_gia + nguyen_gia,
+                gia_tri_con_lai=AssetStats.gia_tri_con_lai + gia_tri_con_lai,
+                updated_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            # Not initialised yet: the flushed asset rows already include this change
+            db.session.flush()
+            self.rebuild([asset_type])
+
+    def get_totals(self):
+        """{asset_type: {total, nguyen_gia, gia_tri_con_lai}} read from the summary table"""
+        if AssetStats.__tablename__ not in get_schema():
+            # Summary table not migrated yet: aggregate on the fly
+            return {
+                asset_type: {key: value if key == 'total' else float(value) for key, value in values.items()}
+                for asset_type, values in self.compute_totals().items()
+            }
+
+        rows = {row.asset_type: row for row in AssetStats.query.all()}
+        missing = [asset_type for asset_type in self.model_map if asset_type not in rows]
+        if missing:
+            self.rebuild(missing)
+            db.session.commit()
+            rows = {row.asset_type: row for row in AssetStats.query.all()}
+        return {asset_type: row.to_dict() for asset_type, row in rows.items() if asset_type in self.model_map}
+
+    def rebuild(self, asset_types=None):
+        """Recompute totals from the asset tables (one UNION ALL) and overwrite asset_stats rows"""
+        asset_types = list(asset_types or self.model_map.keys())
+        totals = self.compute_totals(asset_types)
+        now = datetime.utcnow()
+
+        for asset_type in asset_types:
+            values = totals.get(asset_type, {'total': 0, 'nguyen_gia': 0, 'gia_tri_con_lai': 0})
+            row = db.session.get(AssetStats, asset_type)
+            if row is None:
+                row = AssetStats(asset_type=asset_type)
+                db.session.add(row)
+            row.total = values['total']
+            row.nguyen_gia = values['nguyen_gia']
+            row.gia_tri_con_lai = values['gia_tri_con_lai']
+            row.updated_at = now
+
+        db.session.flush()
+        return totals
+
+    def compute_totals(self, asset_types=None):
+        """COUNT/SUM per asset type straight from the asset tables"""
+        schema = get_schema()
+        branches = []
+        for asset_type in asset_types or self.model_map.keys():
+            model_class = self.model_map[asset_type]
+            table_name = model_class.__tablename__
+            if table_name not in schema:
+                continue
+
+            # Sum only value columns present in this table (vehicles/water have no gia_tri_con_lai)
+            value_columns = []
+            for column_name in VALUE_FIELDS:
+                if column_name in schema[table_name] and hasattr(model_class, column_name):
+                    value_columns.append(func.sum(getattr(model_class, column_name)).label(column_name))
+                else:
+                    value_columns.append(null().label(column_name))
+
+            branches.append(
+                select(
+                    literal(asset_type).label('asset_type'),
+                    func.count().label('total'),
+                    *value_columns
+                ).select_from(model_class).where(model_class.is_deleted == False)
+            )
+
+        if not branches:
+            return {}
+
+        totals = {}
+        for row in db.session.execute(union_all(*branches)):
+            totals[row.asset_type] = {
+                'total': row.total,
+                'nguyen_gia': self._to_decimal(row.nguyen_gia),
+                'gia_tri_con_lai': self._to_decimal(row.gia_tri_con_lai)
+            }
+        return totals
+
+    def _to_decimal(self, value):
+        if value is None or value == '':
+            return Decimal(0)
+        try:
+            return Decimal(str(value).replace(',', ''))
+        except (InvalidOperation, ValueError):
+            return Decimal(0)
@@ -0,0 +1,247 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+
+from database import db
+from models import TinBao
+from services.sequence_service import SequenceService
+from utils.date_parsing import DateParser
+
+REQUIRED_COLUMNS = ('Điều luật', 'Ngày xảy ra', 'Nơi xảy ra', 'Nội dung nguồn tin')
+STATUS_COLUMN = 'Kết quả giải quyết (Khởi tố, Không KT, TĐC, chuyển)'
+DEFAULT_DON_VI = 'CAX Phước Thái'
+
+# Optional text columns copied as-is (blank -> NULL)
+TEXT_COLUMNS = {
+    'ten_nguon_tin': 'Tên nguồn tin',
+    'so_qd_phan_cong_ptt': 'Số QĐ phân công PTT/Trưởng CAX ủy quyền',
+    'so_qd_phan_cong_dtv': 'Số QĐ phân công ĐTV',
+    'thong_tin_doi_tuong': 'Bị can (đối với vụ khởi tố)',
+    'cong_an_phu_trach': 'Điều tra viên',
+    'kiem_sat_vien': 'Kiểm sát viên',
+    'tinh_trang_ho_so': 'Tình trạng hồ sơ'
+}
+
+# Extra columns kept in ghi_chu as "label: value", joined with " | "
+NOTE_COLUMNS = (
+    ('Số QĐ', 'Số QĐ: '),
+    ('Ngày ra QĐ', 'Ngày ra QĐ: '),
+    ('Cán bộ quản lý hồ sơ', 'Cán bộ quản lý hồ sơ: '),
+    ('Ghi chú', '')
+)
+
+
+class TinBaoImportError(Exception):
+    """File rejected as a whole (missing columns, bad or conflicting STTs); `payload` is the 400 body"""
+
+    def __init__(self, payload):
+        super().__init__(payload['error'])
+        self.payload = payload
+
+
+class TinBaoImportService:
+    """
+    Tin báo Excel import as a columnar pipeline: every column is cleaned, parsed
+    and validated once for the whole sheet, then the valid rows go in with one
+    bulk INSERT.
+    """
+
+    def __init__(self):
+        self.sequence_service = SequenceService()
+
+    def import_from_excel(self, file, progress=None):
+        """
+        Import the first sheet of `file` (upload or path); returns the summary dict for the API response.
+        progress(rows_processed, total=..., errors=...) is called once the rows are read and validated.
+        """
+        df = pd.read_excel(file, sheet_name=0, dtype=object)
+        df.index = pd.RangeIndex(len(df))
+        if progress:
+            progress(0, total=len(df))
+
+        missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+        if missing_columns:
+            raise TinBaoImportError({'error': f'Thiếu các cột bắt buộc: {", ".join(missing_columns)}'})
+
+        stt = self._check_stt(df)
+
+        dieu_luat = _text(df, 'Điều luật')
+        noi_xay_ra = _text(df, 'Nơi xảy ra')
+        noi_dung = _text(df, 'Nội dung nguồn tin')
+        ngay_xay_ra, ngay_xay_ra_blank, ngay_xay_ra_invalid = DateParser().parse_column(df['Ngày xảy ra'])
+        ngay_phan_cong, _, ngay_phan_cong_invalid = DateParser().parse_column(_column(df, 'Ngày phân công'))
+        ngay_het_han, _, ngay_het_han_invalid = DateParser().parse_column(_column(df, 'Ngày hết hạn'))
+
+        # First failing check of each row, in the order the form validates them
+        error_messages = pd.Series(np.select(
+            [
+                dieu_luat.str.len() < 2,
+                noi_xay_ra.str.len() < 5,
+                noi_dung.str.len() < 20,
+                ngay_xay_ra_blank,
+                ngay_xay_ra_invalid,
+                ngay_phan_cong_invalid,
+                ngay_het_han_invalid
+            ],
+            [
+                'Điều luật bắt buộc, tối thiểu 2 ký tự',
+                'Nơi xảy ra bắt buộc, tối thiểu 5 ký tự',
+                'Nội dung nguồn tin bắt buộc, tối thiểu 20 ký tự',
+                'Ngày xảy ra bắt buộc',
+                _invalid_date_message('Ngày xảy ra'),
+                _invalid_date_message('Ngày phân công'),
+                _invalid_date_message('Ngày hết hạn')
+            ],
+            default=''
+        ), index=df.index)
+        valid = error_messages == ''
+        errors = [f"Dòng {index + 2}: {message}" for index, message in error_messages[~valid].items()]  # header = row 1
+        if progress:
+            progress(len(df), errors=len(errors))
+
+        trang_thai = _text(df, STATUS_COLUMN)
+        columns = {
+            'stt': stt,
+            'dieu_luat': dieu_luat,
+            'ngay_xay_ra': ngay_xay_ra,
+            'noi_xay_ra': noi_xay_ra,
+            'noi_dung_nguon_tin': noi_dung,
+            'ngay_phan_cong': ngay_phan_cong,
+            'ngay_het_han': ngay_het_han,
+            'ket_qua_giai_quyet': _blank_to_none(trang_thai),
+            'trang_thai': trang_thai.where(trang_thai != '', 'Tiếp nhận'),
+            'don_vi': _text(df, 'Đơn vị').replace('', DEFAULT_DON_VI),
+            'gia_han': _parse_ints(_column(df, 'Gia hạn')),
+            'ghi_chu': _blank_to_none(_join_notes(df)),
+            'dia_chi_bi_hai': None
+        }
+        for field, column in TEXT_COLUMNS.items():
+            columns[field] = _blank_to_none(_text(df, column))
+
+        # Writes start here, once the whole file is validated
+        # Dọn sạch các bản ghi đã bị soft-delete để tránh chiếm STT
+        TinBao.query.filter_by(is_deleted=True).delete(synchronize_session=False)
+
+        rows = pd.DataFrame(columns, index=df.index)[valid]
+        records = self._complete_records(rows.astype(object).where(rows.notna(), None).to_dict('records'))
+        if records:
+            # Core insert: every record sends every key (NULLs included), so the rows go out
+            # as one executemany; the ORM bulk insert would split them by null pattern
+            db.session.execute(insert(TinBao.__table__), records)
+        db.session.commit()
+
+        return {
+            'message': f'Import thành công {len(records)} tin báo',
+            'success_count': len(records),
+            'error_count': len(errors),
+            'errors': errors[:10]  # Chỉ trả về 10 lỗi đầu tiên
+        }
+
+    def _check_stt(self, df):
+        """STT column as nullable ints; rejects the file on non-numeric, duplicated or already used STTs"""
+        if 'STT' not in df.columns:
+            return pd.Series(None, index=df.index, dtype=object)
+
+        text = _text(df, 'STT')
+        numbers = pd.to_numeric(text.where(text != ''), errors='coerce')
+        invalid = (text != '') & ~np.isfinite(numbers.astype(float))
+        if invalid.any():
+            raise TinBaoImportError({
+                'error': 'STT không hợp lệ trong file import',
+                'details': [f"Dòng {index + 2}: STT phải là số nguyên" for index in invalid[invalid].index]
+            })
+
+        stt = np.trunc(numbers).astype('Int64')
+        provided = stt.dropna()
+        duplicate_stts = sorted(int(value) for value in provided[provided.duplicated()].unique())
+        if duplicate_stts:
+            raise TinBaoImportError({
+                'error': 'Trùng STT ngay trong file import',
+                'conflict_stt': duplicate_stts,
+                'message': 'Mỗi tin báo phải có STT duy nhất. Vui lòng chỉnh sửa file trước khi import.'
+            })
+
+        provided_stts = [int(value) for value in provided]
+        if provided_stts:
+            existing_conflicts = (
+                TinBao.query
+                .filter(TinBao.is_deleted == False, TinBao.stt.in_(provided_stts))
+                .with_entities(TinBao.stt)
+                .all()
+            )
+            if existing_conflicts:
+                raise TinBaoImportError({
+                    'error': 'STT đã tồn tại trong hệ thống',
+                    'conflict_stt': sorted({value for (value,) in existing_conflicts}),
+                    'message': 'Vui lòng xóa các tin báo có STT này trong hệ thống trước khi import file Excel mới.'
+                })
+        return stt.astype(object).where(stt.notna(), None)
+
+    def _complete_records(self, records):
+        """Fill in STT for rows without one (one block from the counter, file order) plus the managed columns"""
+        provided_stts = [record['stt'] for record in records if record['stt'] is not None]
+        if provided_stts:
+            # STTs given in the file must never be handed out by the counter afterwards
+            self.sequence_service.raise_stt(TinBao, int(max(provided_stts)))
+        pending = [record for record in records if record['stt'] is None]
+        if pending:
+            first_stt = self.sequence_service.allocate_stt(TinBao, len(pending))
+            for offset, record in enumerate(pending):
+                record['stt'] = first_stt + offset
+
+        now = datetime.utcnow()
+        for record in records:
+            record['stt'] = int(record['stt'])
+            record.update(
+                id=str(uuid.uuid4()),
+                created_at=now,
+                updated_at=now,
+                is_deleted=False,
+                vu_an_id=None,
+                search_text=TinBao.build_search_text(record)
+            )
+        return records
+
+
+def _column(df, name):
+    """Column `name`, or an all-blank column if the sheet does not have it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def _text(df, name):
+    """Stripped text of a column, '' for blank cells"""
+    column = _column(df, name)
+    return column.where(column.notna(), '').astype(str).str.strip()
+
+
+def _blank_to_none(text):
+    return text.where(text != '', None)
+
+
+def _join_notes(df):
+    """ghi_chu built from the extra columns: "Số QĐ: … | Ngày ra QĐ: … | …" """
+    notes = pd.Series('', index=df.index)
+    for name, label in NOTE_COLUMNS:
+        text = _text(df, name)
+        part = (label + text).where(text != '', '')
+        separator = pd.Series(np.where((notes != '') & (part != ''), ' | ', ''), index=df.index)
+        notes = notes + separator + part
+    return notes
+
+
+def _parse_ints(column):
+    """Integer cells (gia_han): numbers, else the first digits in the text ("2 lần"), else 0"""
+    text = column.where(column.notna(), '').astype(str).str.strip()
+    numbers = pd.to_numeric(text.where(text != ''), errors='coerce')
+    numbers = numbers.where(np.isfinite(numbers.astype(float)))
+    digits = pd.to_numeric(text.str.extract(r'(\d+)', expand=False), errors='coerce')
+    return np.trunc(numbers.fillna(digits).fillna(0)).astype(int).astype(object)
+
+
+def _invalid_date_message(label):
+    return f"{label} không hợp lệ (hỗ trợ các định dạng YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY)"
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import time: point it at a scratch database and directories first
+_WORK_DIR = tempfile.mkdtemp(prefix='cds_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_WORK_DIR, 'test.db')}"
+os.environ['UPLOAD_DIR'] = os.path.join(_WORK_DIR, 'imports')
+os.environ['ARTIFACT_CACHE_DIR'] = os.path.join(_WORK_DIR, 'exports')
+os.environ['JOB_RESULTS_DIR'] = os.path.join(_WORK_DIR, 'job_results')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    from database import db
+    from utils.schema import refresh_schema
+
+    with flask_app.app_context():
+        db.create_all()
+        refresh_schema()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def admin_headers(app):
+    from database import db
+    from models import User
+    from utils.auth import generate_token, hash_password
+
+    with app.app_context():
+        user = User(username='test_admin', email='test_admin@phuocthai.local',
+                    password_hash=hash_password('test-password'), full_name='Test Admin',
+                    role='admin', is_active=True)
+        db.session.add(user)
+        db.session.commit()
+        return {'Authorization': f'Bearer {generate_token(user)}'}
@@ -0,0 +1,35 @@
+import io
+
+from openpyxl import Workbook
+
+
+def build_import_file(asset_type, rows):
+    """Workbook with the import template's headers and `rows` minimal valid rows"""
+    from services.import_service import ImportService
+
+    headers, field_mappings, _ = ImportService()._get_field_config(asset_type)
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for idx in range(rows):
+        values = {'ten_tai_san': f'Máy tính kiểm thử {idx}', 'so_luong': 1}
+        ws.append([values.get(field) for field in field_mappings])
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def test_import_refreshes_cached_dashboard_stats(client, admin_headers):
+    before = client.get('/api/dashboard/stats', headers=admin_headers)
+    assert before.status_code == 200
+    technical_before = before.get_json()['by_type']['technical']
+
+    response = client.post('/api/assets/technical/import', headers=admin_headers,
+                           data={'file': (build_import_file('technical', 5), 'technical.xlsx')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['success_count'] == 5
+
+    after = client.get('/api/dashboard/stats', headers=admin_headers)
+    assert after.get_json()['by_type']['technical'] == technical_before + 5
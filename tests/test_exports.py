@@ -0,0 +1,33 @@
+import csv
+import io
+
+import pytest
+
+ASSET_TYPES = ('weapons', 'vehicles', 'water', 'technical', 'office')
+
+
+@pytest.mark.parametrize('asset_type', ASSET_TYPES)
+def test_headers_and_values_have_the_same_layout(asset_type):
+    from services.export_service import ExportService
+
+    export_service = ExportService()
+    assert len(export_service.get_headers(asset_type)) == len(export_service.get_asset_values({}, asset_type))
+
+
+def test_water_csv_export_rows_match_the_header(app, client, admin_headers):
+    from database import db
+    from models import DanhSachTrangThietBiThuy
+
+    with app.app_context():
+        db.session.add(DanhSachTrangThietBiThuy(
+            ma_tai_san='TB-TEST-001', danh_muc_trang_thiet_bi='Xuồng', ten_trang_bi='Xuồng cao su',
+            don_vi_tinh='Chiếc', so_luong=1, ma_hieu='XCS-01'
+        ))
+        db.session.commit()
+
+    response = client.get('/api/assets/water/export?format=csv', headers=admin_headers)
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert len(rows) >= 2
+    assert all(len(row) == len(rows[0]) for row in rows[1:])
+    assert 'Xuồng cao su' in rows[1]
@@ -0,0 +1,26 @@
+import subprocess
+
+
+def test_only_jobs_of_gone_workers_are_failed(app):
+    from database import db
+    from models import Job
+    from services.job_service import JobService, _worker_id
+
+    finished = subprocess.Popen(['true'])
+    finished.wait()
+    with app.app_context():
+        host = _worker_id().split(':')[0]
+        jobs = {
+            'own': Job(job_type='asset_export', status='running', worker=_worker_id()),
+            'gone': Job(job_type='asset_export', status='running', worker=f'{host}:{finished.pid}:x'),
+            'legacy': Job(job_type='asset_export', status='queued'),
+        }
+        db.session.add_all(jobs.values())
+        db.session.commit()
+
+        assert JobService().fail_interrupted() == 2
+        db.session.expire_all()
+        assert jobs['own'].status == 'running'
+        assert jobs['gone'].status == 'failed'
+        assert jobs['legacy'].status == 'failed'
+        assert jobs['gone'].error == 'Interrupted by restart'
@@ -0,0 +1,166 @@
+"""
+Content-addressed cache of generated files (Excel exports, import templates).
+
+An artifact is stored under the sha256 of its key, e.g. (report type, filters,
+data version). The data version is built from the row count and the latest
+updated_at of the source tables, so any write makes the next request build and
+store a new file; the old one is never served again and ages out. A hit refreshes
+the file's mtime, and after every store the directory is trimmed least recently
+used first, down to ARTIFACT_CACHE_MAX_SIZE bytes, dropping files idle for more
+than ARTIFACT_CACHE_MAX_AGE seconds. Several processes can share the directory:
+files are written to a temp name and renamed into place.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from database import db
+
+
+def artifact_key(*parts):
+    """Stable hex digest of JSON-able key parts (dict order does not matter)"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def data_version(*model_classes):
+    """[(row count, max updated_at)] of each table, fetched in one statement"""
+    columns = []
+    for model_class in model_classes:
+        columns.append(select(func.count()).select_from(model_class).scalar_subquery())
+        columns.append(select(func.max(model_class.updated_at)).scalar_subquery())
+    row = db.session.execute(select(*columns)).one()
+    return [[row[index], row[index + 1]] for index in range(0, len(row), 2)]
+
+
+class ArtifactCache:
+    """Generated files on disk keyed by content, with size/age LRU eviction"""
+
+    def __init__(self, directory, max_size, max_age):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def path(self, key, build, suffix='.xlsx'):
+        """Path of the cached artifact for `key`, created with build() on a miss"""
+        path = os.path.join(self.directory, f'{key}{suffix}')
+        if self._touch(path):
+            return path
+
+        with self._lock(key):
+            if self._touch(path):
+                return path  # Built by another thread while this one waited
+            fileobj = build()
+            try:
+                self._store(path, fileobj)
+            finally:
+                fileobj.close()
+        self.evict(keep=path)
+        return path
+
+    def open(self, key, build, suffix='.xlsx'):
+        """Cached artifact for `key` opened for reading (send_file closes it)"""
+        if not self.enabled:
+            return build()
+        return open(self.path(key, build, suffix), 'rb')
+
+    def evict(self, keep=None):
+        """Drop artifacts idle longer than max_age, then least recently used ones over max_size (never `keep`)"""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.directory)
+                if entry.is_file() and not entry.name.startswith('.') and entry.path != keep
+            ]
+        except FileNotFoundError:
+            return
+
+        now = time.time()
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if self.max_age and now - stat.st_mtime > self.max_age:
+                _remove(entry.path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            _remove(path)
+            total -= size
+
+    def clear(self):
+        """Remove every cached artifact"""
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.is_file():
+                _remove(entry.path)
+
+    def _touch(self, path):
+        """Mark a hit for LRU; False if the artifact is not there"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _store(self, path, fileobj):
+        os.makedirs(self.directory, exist_ok=True)
+        # Dot-prefixed temp name: eviction and readers ignore it until the rename
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                shutil.copyfileobj(fileobj, output)
+            os.replace(tmp_path, path)
+        except Exception:
+            _remove(tmp_path)
+            raise
+
+    def _lock(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                if len(self._locks) > 1024:
+                    self._locks.clear()
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_artifact_cache():
+    """ArtifactCache for this app, configured from ARTIFACT_CACHE_*"""
+    cache = current_app.extensions.get('artifact_cache')
+    if cache is None:
+        cache = ArtifactCache(
+            current_app.config.get('ARTIFACT_CACHE_DIR', 'exports'),
+            max_size=current_app.config.get('ARTIFACT_CACHE_MAX_SIZE', 256 * 1024 * 1024),
+            max_age=current_app.config.get('ARTIFACT_CACHE_MAX_AGE', 7 * 86400)
+        )
+        current_app.extensions['artifact_cache'] = cache
+    return cache
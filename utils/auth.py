@@ -1,11 +1,52 @@
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 from models import User
 from database import db
+from utils.cache import TTLCache
 from werkzeug.security import check_password_hash, generate_password_hash
 
+def _get_user_cache():
+    """Get (or lazily create) the cross-request cache of user principals for this app"""
+    cache = current_app.extensions.get('auth_user_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config.get('AUTH_USER_CACHE_SIZE', 1024),
+            ttl=current_app.config.get('AUTH_USER_CACHE_TTL', 60)
+        )
+        current_app.extensions['auth_user_cache'] = cache
+    return cache
+
+def _load_user(user_id):
+    """Load active user, using the principal cache to skip the SELECT when possible"""
+    cache = _get_user_cache()
+    snapshot = cache.get(user_id)
+    if snapshot is not None:
+        # Rebuild a detached instance from the snapshot and attach it without a query
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
+    user = User.query.filter_by(id=user_id, is_active=True, is_deleted=False).first()
+    if user:
+        cache.set(user_id, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+    return user
+
+def invalidate_user_cache(user_id):
+    """Drop cached principal so the next request reloads the user from database"""
+    cache = current_app.extensions.get('auth_user_cache')
+    if cache is not None:
+        cache.pop(user_id)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_on_write(mapper, connection, target):
+    """Password, role, is_active and is_deleted changes must not be served from cache"""
+    invalidate_user_cache(target.id)
+
 def generate_token(user):
     """Generate JWT token for user"""
     payload = {
@@ -22,24 +63,30 @@ def verify_token(token):
     try:
         payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=[current_app.config['JWT_ALGORITHM']])
         user_id = payload.get('user_id')
-        user = User.query.filter_by(id=user_id, is_active=True, is_deleted=False).first()
-        return user
+        if not user_id:
+            return None
+        return _load_user(user_id)
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
 def get_current_user():
-    """Get current user from request token"""
+    """Get current user from request token (resolved once per request)"""
+    if '_current_user' in g:
+        return g._current_user
+    
+    user = None
     auth_header = request.headers.get('Authorization')
-    if not auth_header:
-        return None
+    if auth_header:
+        try:
+            token = auth_header.split(' ')[1]  # Bearer <token>
+            user = verify_token(token)
+        except (IndexError, AttributeError):
+            user = None
     
-    try:
-        token = auth_header.split(' ')[1]  # Bearer <token>
-        return verify_token(token)
-    except (IndexError, AttributeError):
-        return None
+    g._current_user = user
+    return user
 
 def require_auth(f):
     """Decorator to require authentication"""
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return cached value or default if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Remove a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_write_listeners = []
+_write_listeners_lock = threading.Lock()
+
+
+def invalidate_on_write(models, callback):
+    """
+    Call `callback()` after every commit that wrote a row of any of `models`,
+    through the unit of work (add/delete/dirty objects) or bulk
+    insert/update/delete statements, ORM or Core on the model's table.
+    """
+    with _write_listeners_lock:
+        if not _write_listeners:
+            _install_write_hooks()
+        _write_listeners.append((tuple(models), callback))
+
+
+def _install_write_hooks():
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    event.listen(Session, 'after_flush', _collect_flushed_writes)
+    event.listen(Session, 'do_orm_execute', _collect_bulk_writes)
+    event.listen(Session, 'after_commit', _run_write_callbacks)
+    event.listen(Session, 'after_soft_rollback', _discard_write_callbacks)
+
+
+def _mark_written(session, written_classes):
+    pending = session.info.setdefault('_cache_invalidations', [])
+    for models, callback in _write_listeners:
+        if callback not in pending and any(issubclass(cls, models) for cls in written_classes):
+            pending.append(callback)
+
+
+def _collect_flushed_writes(session, flush_context):
+    written = {type(obj) for obj in session.new} | {type(obj) for obj in session.dirty} | {type(obj) for obj in session.deleted}
+    if written:
+        _mark_written(session, written)
+
+
+def _collect_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark_written(orm_execute_state.session, {mapper.class_})
+            return
+        # Core DML on a mapped table (insert(Model.__table__)) carries no mapper: match by table
+        table = getattr(orm_execute_state.statement, 'table', None)
+        written = {model for models, _ in _write_listeners for model in models
+                   if table is not None and getattr(model, '__table__', None) is table}
+        if written:
+            _mark_written(orm_execute_state.session, written)
+
+
+def _run_write_callbacks(session):
+    # Fire only once the data is committed, so readers cannot re-cache stale rows
+    for callback in session.info.pop('_cache_invalidations', []):
+        callback()
+
+
+def _discard_write_callbacks(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('_cache_invalidations', None)
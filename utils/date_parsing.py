@@ -0,0 +1,147 @@
+"""
+Date parsing shared by the Excel importers.
+
+A DateParser handles one column. Text cells are tried against the column's
+dominant format first: it is sniffed from a sample of the column, and kept
+up to date as cells are parsed, so the usual cost is one strptime call.
+Results are memoized per distinct string, because imports repeat the same
+few dates over and over. Cells holding Excel serial numbers are converted
+with plain arithmetic (in bulk for pandas columns).
+"""
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from dateutil import parser as date_parser
+
+# Text formats accepted in import files, Vietnamese day-first order
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%d %m %Y')
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+_EXCEL_EPOCH_DAY = np.datetime64('1899-12-30', 'D')
+MAX_EXCEL_SERIAL = 2958465  # 9999-12-31
+
+
+class DateParser:
+    """Parser for the date cells of one column (create one per column and per import)"""
+
+    def __init__(self, formats=DATE_FORMATS, sample_size=50):
+        self.sample_size = sample_size
+        self._formats = list(formats)
+        self._hits = dict.fromkeys(self._formats, 0)
+        self._cache = {}
+
+    @property
+    def dominant_format(self):
+        return self._formats[0]
+
+    def sniff(self, sample):
+        """Order the formats by how many strings of `sample` each one parses"""
+        texts = (text.strip() for text in sample if isinstance(text, str))
+        sample = list(islice((text for text in texts if text), self.sample_size))
+        for fmt in self._formats:
+            self._hits[fmt] += sum(1 for text in sample if _strptime(text, fmt) is not None)
+        self._formats.sort(key=lambda fmt: -self._hits[fmt])
+
+    def parse(self, value):
+        """date for one cell value; None when the cell is blank or not a date"""
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, (bool, np.bool_)):
+            return None
+        if isinstance(value, (int, float, np.number)):
+            return excel_serial_to_date(value)
+        if not isinstance(value, str):
+            return None
+
+        try:
+            return self._cache[value]
+        except KeyError:
+            parsed = self._cache[value] = self._parse_text(value.strip())
+            return parsed
+
+    def parse_column(self, column):
+        """
+        (dates, blank, invalid) for a pandas column: an object Series of date/None
+        plus two boolean masks. Date cells, serial numbers and text are converted
+        one group at a time; each distinct string is parsed once.
+        """
+        is_date = column.map(lambda value: isinstance(value, date))
+        is_number = column.map(
+            lambda value: isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+        ) & column.notna()
+        text = column.where(~is_date & ~is_number & column.notna(), '').astype(str).str.strip()
+        blank = column.isna() | (~is_date & ~is_number & (text == ''))
+
+        dates = pd.Series(None, index=column.index, dtype=object)
+        if is_date.any():
+            dates[is_date] = column[is_date].map(self.parse)
+        if is_number.any():
+            dates[is_number] = excel_serials_to_dates(column[is_number])
+
+        has_text = text != ''
+        if has_text.any():
+            uniques = pd.unique(text[has_text])
+            unseen = [value for value in uniques if value not in self._cache]
+            if unseen:
+                self.sniff(unseen)
+                # Dominant format for every unseen string at once; the rest one by one
+                parsed = pd.to_datetime(pd.Series(unseen), format=self.dominant_format, errors='coerce')
+                for value, timestamp in zip(unseen, parsed):
+                    self._cache[value] = timestamp.date() if pd.notna(timestamp) else self._parse_text(value)
+            dates[has_text] = text[has_text].map(self._cache)
+
+        dates = dates.where(dates.notna(), None)
+        invalid = ~blank & dates.isna()
+        return dates, blank, invalid
+
+    def _parse_text(self, text):
+        if not text:
+            return None
+        if len(text) == 10 and text[4] == '-' and text[7] == '-':
+            try:
+                return date.fromisoformat(text)  # yyyy-mm-dd without strptime
+            except ValueError:
+                pass
+
+        for index, fmt in enumerate(self._formats):
+            parsed = _strptime(text, fmt)
+            if parsed is not None:
+                self._hits[fmt] += 1
+                if index and self._hits[fmt] > self._hits[self._formats[index - 1]]:
+                    # Keep the most used format first
+                    self._formats[index - 1], self._formats[index] = fmt, self._formats[index - 1]
+                return parsed
+
+        try:
+            return date_parser.parse(text, dayfirst=True).date()
+        except (ValueError, OverflowError):
+            return None
+
+
+def excel_serial_to_date(serial):
+    """date for an Excel serial day number (1900 date system), None if out of range"""
+    if not 0 < serial <= MAX_EXCEL_SERIAL:  # also rejects NaN
+        return None
+    return (EXCEL_EPOCH + timedelta(days=float(serial))).date()
+
+
+def excel_serials_to_dates(serials):
+    """excel_serial_to_date over a pandas Series, as one numpy datetime64[D] operation"""
+    numbers = pd.to_numeric(serials, errors='coerce').to_numpy(dtype=float)
+    valid = (numbers > 0) & (numbers <= MAX_EXCEL_SERIAL)
+    days = np.where(valid, numbers, 0).astype('int64').astype('timedelta64[D]')
+    dates = (_EXCEL_EPOCH_DAY + days).astype(object)
+    return pd.Series(np.where(valid, dates, None), index=serials.index, dtype=object)
+
+
+def _strptime(text, fmt):
+    try:
+        return datetime.strptime(text, fmt).date()
+    except ValueError:
+        return None
@@ -0,0 +1,144 @@
+"""
+SQLite FTS5 full-text indexes for the tin báo and vụ án narrative fields.
+
+Each index is a contentless FTS5 table (no duplicated text) over the source
+table's search_text column, kept in sync by INSERT/UPDATE/DELETE triggers.
+search_text is already folded by utils.text.fold_text (no accents, đ -> d,
+lower case) and the MATCH terms are folded the same way, so "dong nai" matches
+"Đồng Nai"; the unicode61 tokenizer's remove_diacritics alone keeps đ.
+Queries are ranked with BM25 and every term is a prefix query. On other
+databases, or before the index exists, callers fall back to the LIKE search
+on search_text.
+
+The source tables have string UUID keys and implicit rowids, which VACUUM may
+renumber, so the index is not keyed on them: <table>_fts_docids gives each id
+a stable INTEGER docid (maintained by the same triggers) and the FTS rowid is
+that docid.
+"""
+import re
+
+from sqlalchemy import column, event, table, text
+
+from database import db
+from models import TinBao, VuAn
+from utils.schema import get_schema
+from utils.text import fold_text
+
+# Indexed columns per table: the folded search_text built from the model's __search_fields__
+FTS_INDEXES = {
+    'tin_bao': ('search_text',),
+    'vu_an': ('search_text',),
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table_name(table_name):
+    return f'{table_name}_fts'
+
+
+def docid_table_name(table_name):
+    return f'{table_name}_fts_docids'
+
+
+def create_statements(table_name, columns=None):
+    """DDL for the docid table, the FTS5 table and their sync triggers (columns default to FTS_INDEXES)"""
+    fts = fts_table_name(table_name)
+    docids = docid_table_name(table_name)
+    columns = columns or FTS_INDEXES[table_name]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{name}' for name in columns)
+    old_values = ', '.join(f'old.{name}' for name in columns)
+    old_docid = f'(SELECT docid FROM {docids} WHERE id = old.id)'
+
+    # Contentless: a 'delete' must repeat the indexed values, which the triggers have in old.*
+    return [
+        f"CREATE TABLE IF NOT EXISTS {docids} (docid INTEGER PRIMARY KEY, id VARCHAR(36) NOT NULL UNIQUE)",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {docids}(id) VALUES (new.id); "
+        f"INSERT INTO {fts}(rowid, {column_list}) "
+        f"VALUES ((SELECT docid FROM {docids} WHERE id = new.id), {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', {old_docid}, {old_values}); "
+        f"DELETE FROM {docids} WHERE id = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column_list} ON {table_name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', {old_docid}, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES ({old_docid}, {new_values}); END",
+    ]
+
+
+def drop_statements(table_name):
+    fts = fts_table_name(table_name)
+    return [
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TABLE IF EXISTS {fts}',
+        f'DROP TABLE IF EXISTS {docid_table_name(table_name)}',
+    ]
+
+
+def create_fts_index(connection, table_name, columns=None):
+    """Create the index and triggers, then index the rows already in the table"""
+    for statement in create_statements(table_name, columns):
+        connection.execute(text(statement))
+    rebuild_fts_index(connection, table_name, columns)
+
+
+def rebuild_fts_index(connection, table_name, columns=None):
+    """Re-number the docids and re-index every row of the source table"""
+    fts = fts_table_name(table_name)
+    docids = docid_table_name(table_name)
+    columns = columns or FTS_INDEXES[table_name]
+    column_list = ', '.join(columns)
+    source_values = ', '.join(f'source.{name}' for name in columns)
+    connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('delete-all')"))
+    connection.execute(text(f"DELETE FROM {docids}"))
+    connection.execute(text(f"INSERT INTO {docids}(id) SELECT id FROM {table_name}"))
+    connection.execute(text(
+        f"INSERT INTO {fts}(rowid, {column_list}) "
+        f"SELECT docids.docid, {source_values} FROM {table_name} AS source JOIN {docids} AS docids ON docids.id = source.id"
+    ))
+
+
+def _create_on_table_create(target, connection, **kw):
+    # db.create_all() (init_db.py, benchmarks) creates the index with the table
+    if connection.dialect.name == 'sqlite':
+        create_fts_index(connection, target.name)
+
+
+for _model in (TinBao, VuAn):
+    event.listen(_model.__table__, 'after_create', _create_on_table_create)
+
+
+def fts_available(table_name):
+    return db.engine.dialect.name == 'sqlite' and fts_table_name(table_name) in get_schema()
+
+
+def build_match_query(search):
+    """FTS5 MATCH expression: every folded word of the search as a quoted prefix term (implicit AND)"""
+    tokens = _TOKEN_RE.findall(fold_text(search))
+    return ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+
+def apply_fts_search(query, model_class, search):
+    """
+    Restrict an ORM query to rows matching `search` in the FTS index and order
+    them by BM25 rank (best first). Returns None when the index can't be used.
+    """
+    table_name = model_class.__tablename__
+    match = build_match_query(search)
+    if not match or not fts_available(table_name):
+        return None
+
+    docids = table(docid_table_name(table_name), column('docid'), column('id'))
+    fts = table(fts_table_name(table_name), column('rowid'), column('rank'))
+    return (
+        query
+        .join(docids, docids.c.id == model_class.id)
+        .join(fts, fts.c.rowid == docids.c.docid)
+        .filter(text(f'{fts.name} MATCH :fts_match').bindparams(fts_match=match))
+        .order_by(fts.c.rank)
+    )
@@ -0,0 +1,282 @@
+"""
+In-process metrics registry exported in Prometheus text format (GET /api/metrics).
+Tracks per-route latency, in-flight requests, errors by status code,
+DB pool checkout wait and Excel import/export job durations.
+Disabled unless METRICS_ENABLED; METRICS_TOKEN puts the endpoint behind a bearer token.
+"""
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, jsonify, request
+
+from database import db
+from utils.query_stats import get_endpoint_stats
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            for labelvalues, value in items:
+                lines.extend(self._render_sample(labelvalues, value))
+        return lines
+
+    def _render_sample(self, labelvalues, value):
+        return [f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+                self._values[key] = state
+            for idx, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state['buckets'][idx] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the wrapped block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, labelvalues, state):
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets, state['buckets']):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, ('le', _format_value(upper)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f'{self.name}_sum{labels} {_format_value(state["sum"])}')
+        lines.append(f'{self.name}_count{labels} {state["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ('blueprint', 'route', 'method')
+))
+REQUESTS_IN_PROGRESS = registry.register(Gauge(
+    'http_requests_in_progress', 'Requests currently being served',
+    ('blueprint',)
+))
+REQUESTS_TOTAL = registry.register(Counter(
+    'http_requests_total', 'Requests served by route and status code',
+    ('blueprint', 'route', 'method', 'status')
+))
+REQUEST_ERRORS = registry.register(Counter(
+    'http_request_errors_total', 'Requests answered with a 4xx/5xx status code',
+    ('blueprint', 'route', 'status')
+))
+DB_POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled DB connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+))
+DB_POOL_CHECKED_OUT = registry.register(Gauge(
+    'db_pool_connections_checked_out', 'Pooled DB connections in use at scrape time'
+))
+EXCEL_JOB_DURATION = registry.register(Histogram(
+    'excel_job_duration_seconds', 'Duration of Excel import/export jobs',
+    ('job',)
+))
+EXCEL_IMPORT_ROWS = registry.register(Counter(
+    'excel_import_rows_total', 'Data rows read from uploaded Excel imports',
+    ('asset_type',)
+))
+
+
+def time_excel_job(job):
+    """Context manager recording the duration of an Excel import/export job"""
+    return EXCEL_JOB_DURATION.time(job=job)
+
+
+def init_metrics(app):
+    """Register request hooks, pool instrumentation and the /api/metrics endpoint"""
+    if not app.config.get('METRICS_ENABLED', False):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    _instrument_pool(engine)
+
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_finish_request)
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Metrics in Prometheus text exposition format"""
+        token = app.config.get('METRICS_TOKEN')
+        authorization = request.headers.get('Authorization', '').encode()
+        if token and not hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+            return jsonify({'error': 'Unauthorized. Metrics token required.'}), 401
+        checkedout = getattr(engine.pool, 'checkedout', None)
+        if checkedout:
+            DB_POOL_CHECKED_OUT.set(checkedout())
+        body = registry.render() + _render_query_stats()
+        return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _instrument_pool(engine):
+    # Pools expose no "before checkout" event, so time the pool's own getter
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        start = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+    pool._do_get = timed_do_get
+
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule else 'unmatched'
+    return request.blueprint or 'app', rule
+
+
+def _start_request():
+    blueprint, _ = _route_labels()
+    g._metrics_start = time.perf_counter()
+    g._metrics_blueprint = blueprint
+    REQUESTS_IN_PROGRESS.inc(blueprint=blueprint)
+
+
+def _record_response(response):
+    start = g.get('_metrics_start')
+    if start is None:
+        return response
+
+    blueprint, route = _route_labels()
+    status = str(response.status_code)
+    REQUEST_LATENCY.observe(time.perf_counter() - start, blueprint=blueprint, route=route, method=request.method)
+    REQUESTS_TOTAL.inc(blueprint=blueprint, route=route, method=request.method, status=status)
+    if response.status_code >= 400:
+        REQUEST_ERRORS.inc(blueprint=blueprint, route=route, status=status)
+    return response
+
+
+def _finish_request(exc):
+    blueprint = g.pop('_metrics_blueprint', None)
+    if blueprint is not None:
+        REQUESTS_IN_PROGRESS.dec(blueprint=blueprint)
+
+
+def _render_query_stats():
+    """Expose per-endpoint SQL statement totals when SQL_INSTRUMENTATION is on"""
+    endpoint_stats = get_endpoint_stats()
+    if not endpoint_stats:
+        return ''
+
+    lines = [
+        '# HELP db_statements_total SQL statements issued per endpoint',
+        '# TYPE db_statements_total counter'
+    ]
+    for endpoint, stats in sorted(endpoint_stats.items()):
+        lines.append(f'db_statements_total{_format_labels(("endpoint",), (endpoint,))} {stats["statements"]}')
+    lines.extend([
+        '# HELP db_time_seconds_total Time spent executing SQL per endpoint',
+        '# TYPE db_time_seconds_total counter'
+    ])
+    for endpoint, stats in sorted(endpoint_stats.items()):
+        lines.append(f'db_time_seconds_total{_format_labels(("endpoint",), (endpoint,))} {_format_value(stats["db_time_ms"] / 1000)}')
+    return '\n'.join(lines) + '\n'
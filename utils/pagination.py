@@ -0,0 +1,146 @@
+"""
+Offset and keyset (cursor) pagination for list endpoints, and keyset batches
+for exports that stream every row (iter_keyset).
+
+Offset mode (?page=N) keeps the existing response. Cursor mode (?cursor=...)
+seeks past the last row of the previous page on the list's sort key, so deep
+pages cost the same as the first one. ?with_total=false skips the COUNT query
+in both modes.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, false, or_, true
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def get_pagination_args(args, default_per_page=20):
+    """page, per_page, cursor and with_total from the query string"""
+    cursor = args.get('cursor', None)
+    return {
+        'page': args.get('page', 1, type=int),
+        'per_page': args.get('per_page', default_per_page, type=int),
+        # Empty cursor (?cursor=) starts cursor mode at the first row
+        'cursor': cursor.strip() if cursor is not None else None,
+        'with_total': args.get('with_total', 'true').strip().lower() not in ('false', '0', 'no')
+    }
+
+
+def encode_cursor(values):
+    """Opaque URL-safe token for the sort key values of the last row on a page"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order_by):
+    """Sort key values from a cursor token, converted back to the column types"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursorError('Cursor không hợp lệ')
+    if not isinstance(payload, list) or len(payload) != len(order_by):
+        raise InvalidCursorError('Cursor không hợp lệ')
+
+    values = []
+    for value, (column, _) in zip(payload, order_by):
+        if value is not None:
+            try:
+                python_type = column.type.python_type
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif python_type is date:
+                    value = date.fromisoformat(value)
+                elif python_type is int:
+                    value = int(value)
+            except (TypeError, ValueError, NotImplementedError):
+                raise InvalidCursorError('Cursor không hợp lệ')
+        values.append(value)
+    return values
+
+
+def _after(column, descending, value):
+    # NULL sorts before every value (SQLite/MySQL): first in ASC, last in DESC
+    if value is None:
+        return false() if descending else column.isnot(None)
+    if descending:
+        return or_(column < value, column.is_(None)) if column.nullable else column < value
+    return column > value
+
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def keyset_filter(order_by, values):
+    """WHERE clause selecting rows strictly after `values` in `order_by` order"""
+    clauses = []
+    for idx, (column, descending) in enumerate(order_by):
+        prefix = [_equal(order_column, value) for (order_column, _), value in zip(order_by[:idx], values[:idx])]
+        clauses.append(and_(*prefix, _after(column, descending, values[idx])))
+    return or_(*clauses) if clauses else true()
+
+
+def paginate(query, order_by, page=1, per_page=20, cursor=None, with_total=True):
+    """
+    Paginate an ORM query ordered by `order_by` [(column, descending), ...].
+    The last column must be unique (usually id) so the order is total.
+    Returns (items, meta).
+    """
+    per_page = max(per_page, 1)
+    total = query.order_by(None).count() if with_total else None
+    ordered = query.order_by(*[column.desc() if descending else column.asc() for column, descending in order_by])
+
+    if cursor is None:
+        items = ordered.offset((max(page, 1) - 1) * per_page).limit(per_page).all()
+        meta = {
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': (total + per_page - 1) // per_page if total is not None else None
+        }
+        return items, meta
+
+    if cursor:
+        ordered = ordered.filter(keyset_filter(order_by, decode_cursor(cursor, order_by)))
+
+    # One extra row tells whether another page exists without counting
+    items = ordered.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column, _ in order_by])
+
+    meta = {
+        'total': total,
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
+    return items, meta
+
+
+def iter_keyset(query, order_by, batch_size=1000):
+    """
+    Every row of `query` in `order_by` order, fetched one keyset page at a time.
+    Each page is a short query that is read to the end before its rows are handed
+    out, so no cursor (on SQLite: no read lock) stays open while the caller works
+    through a batch, e.g. while a streamed download waits on the client.
+    """
+    batch_size = max(batch_size, 1)
+    ordered = query.order_by(*[column.desc() if descending else column.asc() for column, descending in order_by])
+    last = None
+    while True:
+        page = ordered if last is None else ordered.filter(keyset_filter(order_by, last))
+        items = page.limit(batch_size).all()
+        yield from items
+        if len(items) < batch_size:
+            return
+        last = [getattr(items[-1], column.key) for column, _ in order_by]
@@ -0,0 +1,109 @@
+"""
+Opt-in SQL instrumentation: counts statements and DB time per request,
+groups them per endpoint and flags repeated statement shapes (N+1 queries).
+Enable with SQL_INSTRUMENTATION=true.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from database import db
+
+# Bind parameter styles of the supported drivers: qmark, pyformat, format, named, numeric
+_PLACEHOLDER_RE = re.compile(r"\?|%\(\w+\)s|%s|(?<!:):\w+|\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_endpoint_stats = {}
+_endpoint_lock = threading.Lock()
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so that queries differing only by values share one shape"""
+    shape = _PLACEHOLDER_RE.sub('?', statement)
+    shape = _LITERAL_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('(?)', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+def init_query_instrumentation(app):
+    """Register engine and request hooks when SQL_INSTRUMENTATION is enabled"""
+    if not app.config.get('SQL_INSTRUMENTATION'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def get_endpoint_stats():
+    """Snapshot of aggregated statement counts and DB time per endpoint"""
+    with _endpoint_lock:
+        return {endpoint: dict(stats) for endpoint, stats in _endpoint_stats.items()}
+
+
+def _current_stats():
+    if not has_request_context():
+        return None
+    return g.get('_query_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    start_times = conn.info.get('query_start_time')
+    if stats is None or not start_times:
+        return
+
+    stats['count'] += 1
+    stats['duration'] += time.perf_counter() - start_times.pop()
+    stats['fingerprints'][fingerprint(statement)] += 1
+
+
+def _start_request():
+    g._query_stats = {'count': 0, 'duration': 0.0, 'fingerprints': Counter()}
+
+
+def _finish_request(response):
+    stats = g.pop('_query_stats', None)
+    if stats is None:
+        return response
+
+    duration_ms = stats['duration'] * 1000
+    response.headers['X-Query-Count'] = str(stats['count'])
+    response.headers['Server-Timing'] = f'db;dur={duration_ms:.2f};desc="{stats["count"]} queries"'
+
+    endpoint = request.endpoint or 'unknown'
+    with _endpoint_lock:
+        endpoint_stats = _endpoint_stats.setdefault(endpoint, {
+            'requests': 0,
+            'statements': 0,
+            'db_time_ms': 0.0,
+            'max_statements': 0
+        })
+        endpoint_stats['requests'] += 1
+        endpoint_stats['statements'] += stats['count']
+        endpoint_stats['db_time_ms'] += duration_ms
+        endpoint_stats['max_statements'] = max(endpoint_stats['max_statements'], stats['count'])
+
+    threshold = current_app.config.get('SQL_REPEATED_STATEMENT_THRESHOLD', 10)
+    for shape, count in stats['fingerprints'].items():
+        if count > threshold:
+            current_app.logger.warning(
+                'Possible N+1 in %s %s (%s): statement repeated %d times: %s',
+                request.method, request.path, endpoint, count, shape[:300]
+            )
+
+    return response
@@ -0,0 +1,49 @@
+"""
+Database schema snapshot (tables and their columns) taken once at startup,
+so request handlers don't run inspector catalog queries on every call.
+"""
+from flask import current_app
+from sqlalchemy import inspect
+
+from database import db
+
+
+def load_schema(app):
+    """Inspect the database and store {table_name: {column names}} on the app"""
+    with app.app_context():
+        inspector = inspect(db.engine)
+        schema = {
+            table_name: {column['name'] for column in inspector.get_columns(table_name)}
+            for table_name in inspector.get_table_names()
+        }
+    app.extensions['db_schema'] = schema
+    return schema
+
+
+def init_schema(app):
+    """Snapshot the schema at startup; a missing database is retried lazily"""
+    try:
+        load_schema(app)
+    except Exception as e:
+        print(f"Warning: Could not inspect database schema: {str(e)}")
+
+
+def get_schema():
+    """Cached schema for the current app, loaded on first use if startup inspection failed"""
+    schema = current_app.extensions.get('db_schema')
+    if not schema:
+        schema = load_schema(current_app._get_current_object())
+    return schema
+
+
+def refresh_schema():
+    """Re-inspect after migrations or create_all"""
+    return load_schema(current_app._get_current_object())
+
+
+def table_exists(table_name):
+    return table_name in get_schema()
+
+
+def table_columns(table_name):
+    return get_schema().get(table_name, set())
@@ -0,0 +1,21 @@
+"""
+Build API dicts straight from column tuples, for list endpoints that would
+otherwise load full ORM objects just to call to_dict() on them.
+"""
+from datetime import date, datetime
+
+# Internal columns that the models' to_dict() leaves out
+HIDDEN_COLUMNS = ('search_text', 'is_deleted')
+
+
+def list_columns(model_class, exclude=HIDDEN_COLUMNS):
+    """The model's column attributes that appear in its to_dict(), in table order"""
+    return [getattr(model_class, column.key) for column in model_class.__table__.columns if column.key not in exclude]
+
+
+def row_to_dict(row):
+    """dict of a result row, dates as ISO strings like to_dict()"""
+    return {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in row._mapping.items()
+    }
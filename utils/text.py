@@ -0,0 +1,20 @@
+import unicodedata
+
+_D_MAP = str.maketrans({'đ': 'd', 'Đ': 'D'})
+
+
+def fold_text(value):
+    """
+    Bỏ dấu tiếng Việt và chuyển chữ thường: "Phước Thái" -> "phuoc thai".
+    Used for both the stored search_text columns and the search terms.
+    """
+    if value is None:
+        return ''
+    text = unicodedata.normalize('NFD', str(value).translate(_D_MAP))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def fold_terms(search):
+    """Folded search words; every word must appear in search_text"""
+    return fold_text(search).split()
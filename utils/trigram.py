@@ -0,0 +1,121 @@
+"""
+In-process trigram index for fuzzy lookup of short identifiers
+(asset codes, plate numbers, serials).
+
+Values are normalized to lower-case ASCII letters and digits, so "60B4-388.72",
+"60b4 38872" and "60B438872" are the same string. A document matches when at
+least `threshold` of the query's trigrams occur in one of its values, which
+tolerates typos and missing characters. Candidates come from the rarest query
+trigrams only (prefix filtering), so common prefixes such as "VKBM" do not
+force a scan of every posting list.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+
+from utils.text import fold_text
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_identifier(value):
+    return _NON_ALNUM_RE.sub('', fold_text(value))
+
+
+def trigrams(normalized):
+    """Trigrams of a normalized identifier, padded so the start and end also count"""
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Thread-safe trigram index of doc_id -> identifier values"""
+
+    def __init__(self):
+        self._postings = defaultdict(set)
+        self._doc_grams = {}
+        self._doc_values = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_grams)
+
+    def add(self, doc_id, values):
+        """Index (or re-index) a document's identifier values"""
+        normalized = [value for value in (normalize_identifier(v) for v in values if v) if value]
+        value_grams = [trigrams(value) for value in normalized]
+        grams = set().union(*value_grams)
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            if not grams:
+                return
+            self._doc_grams[doc_id] = grams
+            self._doc_values[doc_id] = list(zip(normalized, value_grams))
+            for gram in grams:
+                self._postings[gram].add(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        grams = self._doc_grams.pop(doc_id, None)
+        self._doc_values.pop(doc_id, None)
+        if not grams:
+            return
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, term, limit=100, threshold=0.3):
+        """[(doc_id, score)] best first; score is the share of query trigrams found (1.0 = substring)"""
+        query = normalize_identifier(term)
+        if not query:
+            return []
+
+        with self._lock:
+            if len(query) < 4:
+                # Too short for trigrams to find it mid-value: plain substring match on the normalized values
+                matches = [
+                    (doc_id, 1.0) for doc_id, values in self._doc_values.items()
+                    if any(query in value for value, _ in values)
+                ]
+                return sorted(matches, key=lambda match: min(len(v) for v, _ in self._doc_values[match[0]]))[:limit]
+
+            query_grams = trigrams(query)
+            needed = max(1, math.ceil(threshold * len(query_grams)))
+
+            # Any doc sharing `needed` grams must contain one of the rarest (len - needed + 1)
+            rarest = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set()
+            for gram in rarest[:len(query_grams) - needed + 1]:
+                candidates |= self._postings.get(gram, set())
+
+            scored = []
+            for doc_id in candidates:
+                if len(query_grams & self._doc_grams[doc_id]) < needed:
+                    continue
+                # Score against the best single value, not the union of all of them
+                best = None
+                for value, value_grams in self._doc_values[doc_id]:
+                    shared = len(query_grams & value_grams)
+                    if query in value:
+                        containment = 1.0
+                    elif shared >= needed:
+                        containment = shared / len(query_grams)
+                    else:
+                        continue
+                    # Tie-break on Jaccard similarity: closer-length identifiers first
+                    jaccard = shared / (len(query_grams) + len(value_grams) - shared)
+                    if best is None or (containment, jaccard) > best:
+                        best = (containment, jaccard)
+                if best is not None:
+                    scored.append((best[0], best[1], doc_id))
+
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [(doc_id, round(containment, 3)) for containment, _, doc_id in scored[:limit]]